@@ -0,0 +1,217 @@
+"""
+Audit log pipeline.
+
+Handlers call ``record()`` (via the ``get_auditor`` dependency), which only
+appends a tuple to an in-memory ring buffer. A background task drains the
+buffer into the ``audit_events`` table in batched inserts, one transaction per
+batch, whenever ``AUDIT_BATCH_SIZE`` events are waiting or every
+``AUDIT_FLUSH_INTERVAL_MS``. Whatever is left is written when the
+application shuts down.
+
+``AUDIT_SYNCHRONOUS`` sets SQLite's fsync policy for the audit writes:
+``FULL`` syncs every batch, ``NORMAL`` (default, with WAL) syncs at
+checkpoints, ``OFF`` leaves it to the OS. If events arrive faster than they
+can be written, the buffer (``AUDIT_BUFFER_SIZE``) drops the oldest ones and
+counts them in ``stats()["dropped"]``.
+
+Audit details must not contain PHI: record sizes and identifiers, never
+prompt or requirement text.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from starlette.requests import Request
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() != "false"
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "100000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "1000"))
+AUDIT_FLUSH_INTERVAL_MS = float(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "1000"))
+AUDIT_SYNCHRONOUS = os.getenv("AUDIT_SYNCHRONOUS", "NORMAL").upper()
+
+# Routers that emit audit events; apps without them do not start the pipeline
+AUDITED_ROUTERS = {"auth", "projects", "disease", "testcase"}
+
+
+class AuditLog:
+    """Ring buffer of audit events with a batching background writer"""
+
+    def __init__(self, engine=None, capacity: int = AUDIT_BUFFER_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval_ms: float = AUDIT_FLUSH_INTERVAL_MS, synchronous: str = AUDIT_SYNCHRONOUS):
+        from database import SYNCHRONOUS_MODES
+
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        self.engine = engine
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.synchronous = synchronous
+        # deque.append/popleft are atomic, so sync handlers in the threadpool can record too
+        self._buffer = deque(maxlen=capacity)
+        self._flush_lock = threading.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    # Producers ------------------------------------------------------------
+
+    def record(self, action: str, username: Optional[str] = None, outcome: str = "success",
+               client: Optional[str] = None, detail: Optional[dict] = None):
+        """Queue one event; never blocks on the database"""
+        self._buffer.append((datetime.utcnow(), action, username, outcome, client,
+                             json.dumps(detail, separators=(",", ":")) if detail else None))
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size and self._wake is not None and not self._wake.is_set():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # Writer ---------------------------------------------------------------
+
+    def _take_batch(self) -> list:
+        batch = []
+        buffer = self._buffer
+        try:
+            for _ in range(self.batch_size):
+                batch.append(buffer.popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        from database import AuditEvent, SQLITE_SYNCHRONOUS
+
+        columns = ("created_at", "action", "username", "outcome", "client", "detail")
+        insert = AuditEvent.__table__.insert()
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                try:
+                    with self.engine.connect() as connection:
+                        # SQLite refuses to change the sync level inside a transaction,
+                        # so set it before the insert and restore it after the commit
+                        override = (connection.dialect.name == "sqlite"
+                                    and self.synchronous != SQLITE_SYNCHRONOUS)
+                        if override:
+                            connection.exec_driver_sql(f"PRAGMA synchronous={self.synchronous}")
+                        try:
+                            connection.execute(insert, [dict(zip(columns, row)) for row in batch])
+                            connection.commit()
+                        finally:
+                            if override:
+                                connection.rollback()
+                                connection.exec_driver_sql(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+                                connection.commit()
+                except Exception as e:
+                    # Put the batch back (oldest first) and try again on the next flush
+                    self.failed_batches += 1
+                    self._buffer.extendleft(reversed(batch))
+                    logger.error(f"Audit flush failed, {len(batch)} events kept for retry: {str(e)}")
+                    break
+                written += len(batch)
+        self.written += written
+        return written
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._buffer:
+                await loop.run_in_executor(None, self.flush)
+
+    async def start(self):
+        """Start the background writer (the table comes from database.init_db)"""
+        if self.engine is None:
+            from database import engine
+            self.engine = engine
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        if self.engine is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+        if self._buffer:
+            logger.error(f"{len(self._buffer)} audit events could not be written")
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "buffered": len(self._buffer),
+            "dropped": max(0, self.recorded - self.written - len(self._buffer)),
+            "failed_batches": self.failed_batches,
+        }
+
+
+def build_audit_log(router_names) -> Optional[AuditLog]:
+    """An audit log for apps that mount an audited router, unless AUDIT_ENABLED is false"""
+    if not AUDIT_ENABLED or not AUDITED_ROUTERS.intersection(router_names):
+        return None
+    return AuditLog()
+
+# ============================================================================
+# Request helpers
+# ============================================================================
+
+async def get_auditor(request: Request) -> Callable[..., None]:
+    """Route dependency: ``audit(action, username=None, outcome="success", **detail)``.
+
+    The client address is filled in, and so is the username when the request
+    carries a valid bearer token.
+    """
+    audit_log = getattr(request.app.state, "audit_log", None)
+    client = request.client.host if request.client else None
+
+    def audit(action: str, username: Optional[str] = None, outcome: str = "success", **detail):
+        if audit_log is None:
+            return
+        if username is None:
+            from auth import username_from_authorization
+            username = username_from_authorization(request.headers.get("authorization"))
+        audit_log.record(action, username, outcome, client, detail or None)
+
+    return audit
+
+
+@contextmanager
+def audited(audit: Callable[..., None], action: str, username: Optional[str] = None, **detail):
+    """Record ``action`` as a success, or as a failure if the block raises"""
+    try:
+        yield
+    except Exception:
+        audit(action, username, "failure", **detail)
+        raise
+    audit(action, username, "success", **detail)
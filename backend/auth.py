@@ -1,8 +1,9 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Dict, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,18 +12,34 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose and passlib (and the crypto backends they pull in) are imported on first
+# use rather than at module import, so workers that never authenticate do not
+# pay for them at boot.
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Return the shared bcrypt password context"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def __getattr__(name):
+    # Keep ``auth.pwd_context`` working for existing callers
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def verify_password(plain_password, hashed_password):
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -32,13 +49,71 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
-    """Verify and decode JWT token"""
+class RevocationList:
+    """Revoked session ids, each kept until the last access token it issued has expired.
+
+    Checked on every token verification, so it is a plain dict lookup; the
+    session store fills it from the database and ``compact()`` drops entries
+    that no live token can match any more.
+    """
+
+    def __init__(self):
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        until = self._until.get(session_id)
+        return until is not None and until > time.time()
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+    def revoke(self, session_id: str, revoked_at: Optional[datetime] = None):
+        """Reject access tokens of this session issued up to ``revoked_at`` (default: now)"""
+        revoked = (revoked_at or datetime.utcnow()) - datetime(1970, 1, 1)
+        until = revoked.total_seconds() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        with self._lock:
+            self._until[session_id] = max(until, self._until.get(session_id, 0.0))
+
+    def compact(self) -> int:
+        """Forget sessions whose access tokens have all expired; returns entries removed"""
+        now = time.time()
+        with self._lock:
+            expired = [session_id for session_id, until in self._until.items() if until <= now]
+            for session_id in expired:
+                del self._until[session_id]
+        return len(expired)
+
+# Shared by every app in the process, like the password context
+REVOKED_SESSIONS = RevocationList()
+
+def decode_token(token: str) -> Optional[dict]:
+    """Claims of a valid access token whose session has not been revoked"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("sub") is None:
+        return None
+    session_id = payload.get("sid")
+    if session_id is not None and session_id in REVOKED_SESSIONS:
+        return None
+    return payload
+
+def verify_token(token: str):
+    """Verify and decode JWT token"""
+    payload = decode_token(token)
+    return payload["sub"] if payload is not None else None
+
+def claims_from_authorization(authorization: Optional[str]) -> Optional[dict]:
+    """Token claims from an ``Authorization: Bearer`` header value, if the token is valid"""
+    if not authorization or authorization[:7].lower() != "bearer ":
+        return None
+    return decode_token(authorization[7:])
+
+def username_from_authorization(authorization: Optional[str]) -> Optional[str]:
+    """Username from an ``Authorization: Bearer`` header value, if the token is valid"""
+    claims = claims_from_authorization(authorization)
+    return claims["sub"] if claims is not None else None
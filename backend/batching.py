@@ -0,0 +1,106 @@
+"""
+Async micro-batching.
+
+``MicroBatcher`` collects items submitted by concurrent coroutines and hands
+them to a batch handler together: a batch is dispatched when it reaches
+``max_batch_size`` items or when its oldest item has waited ``max_wait_ms``,
+whichever comes first. Each caller gets back the result (or exception) for
+its own item.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group concurrent ``submit()`` calls into calls of ``handler(items)``.
+
+    ``handler`` must return one result per item, in order. At most
+    ``max_concurrent_batches`` batches run at once; later batches wait, which
+    bounds the load put on the backend.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Awaitable[List[R]]], max_batch_size: int = 8,
+                 max_wait_ms: float = 5.0, max_concurrent_batches: int = 4):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: T) -> R:
+        """Queue ``item`` and wait for its result"""
+        if self._closed:
+            raise RuntimeError("batcher is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Dispatch everything pending as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future]]):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        async with self._slots:
+            # Callers that gave up (cancelled) while waiting are dropped
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                return
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = await self.handler([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch handler returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    async def close(self):
+        """Dispatch pending items and wait for in-flight batches"""
+        self._closed = True
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
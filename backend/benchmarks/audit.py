@@ -0,0 +1,69 @@
+"""
+Audit log throughput benchmark.
+
+Records events into ``audit.AuditLog`` against a scratch SQLite database in
+WAL mode and reports how fast handlers can record (the cost on the request
+path) and how fast batches are written, for each ``synchronous`` setting.
+
+Usage (from backend/):
+    python -m benchmarks.audit --events 200000 --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+SYNCHRONOUS = ("OFF", "NORMAL", "FULL")
+
+
+def run(events: int, batch_size: int, synchronous: str, directory: str) -> dict:
+    from sqlalchemy import create_engine, event
+
+    from audit import AuditLog
+    from database import AuditEvent
+
+    engine = create_engine(f"sqlite:///{os.path.join(directory, f'audit_{synchronous}.db')}")
+
+    @event.listens_for(engine, "connect")
+    def set_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    AuditEvent.__table__.create(bind=engine, checkfirst=True)
+    log = AuditLog(engine=engine, capacity=events, batch_size=batch_size, synchronous=synchronous)
+
+    start = time.perf_counter()
+    for i in range(events):
+        log.record("disease.chat", f"user{i % 500}", "success", "127.0.0.1", {"prompt_chars": i % 400})
+    record_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    written = log.flush()
+    flush_seconds = time.perf_counter() - start
+    engine.dispose()
+    return {
+        "written": written,
+        "record_per_sec": events / record_seconds,
+        "record_us": record_seconds / events * 1e6,
+        "write_per_sec": written / flush_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure audit log throughput")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.events:,} audit events, batches of {args.batch_size:,}, SQLite WAL")
+    with tempfile.TemporaryDirectory() as directory:
+        for synchronous in SYNCHRONOUS:
+            result = run(args.events, args.batch_size, synchronous, directory)
+            print(f"  synchronous={synchronous:6s} record {result['record_per_sec']:12,.0f}/s "
+                  f"({result['record_us']:.2f} us/event)   write {result['write_per_sec']:10,.0f}/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
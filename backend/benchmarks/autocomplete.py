@@ -0,0 +1,81 @@
+"""
+Autocomplete benchmark for the search prefix index.
+
+Builds ``search_history.PrefixIndex`` over synthetic disease queries with
+Zipf-distributed counts, then reports lookup latency for prefixes of 0-6
+characters and the cost of counting a search (including new queries).
+
+Usage (from backend/):
+    python -m benchmarks.autocomplete --queries 100000 --lookups 20000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+TERMS = (
+    "diabetes", "type", "hypertension", "asthma", "migraine", "anxiety", "depression", "arthritis",
+    "chronic", "acute", "kidney", "disease", "heart", "failure", "covid", "symptoms", "treatment",
+    "in", "children", "adults", "pregnancy", "pain", "lower", "back", "allergic", "rhinitis",
+)
+
+
+def synthetic_queries(count: int, rng: random.Random):
+    seen = set()
+    while len(seen) < count:
+        words = rng.sample(TERMS, rng.randint(1, 3))
+        if rng.random() < 0.5:
+            words.append(str(rng.randint(1, 500)))
+        seen.add(" ".join(words))
+    return sorted(seen)
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure autocomplete latency")
+    parser.add_argument("--queries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--updates", type=int, default=20_000)
+    args = parser.parse_args()
+
+    from search_history import PrefixIndex
+
+    rng = random.Random(42)
+    queries = synthetic_queries(args.queries, rng)
+    rng.shuffle(queries)
+    items = [(query, max(1, int(100_000 / (rank + 1) ** 1.1))) for rank, query in enumerate(queries)]
+
+    index = PrefixIndex(max_queries=args.queries + args.updates)
+    start = time.perf_counter()
+    index.build(items)
+    build_seconds = time.perf_counter() - start
+    print(f"Index of {len(index):,} queries built in {build_seconds:.2f}s "
+          f"({len(index._top):,} prefixes with cached top-k)")
+
+    prefixes = [query[:rng.randint(0, 6)] for query in rng.choices(queries, k=args.lookups)]
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.complete(prefix)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"  lookup   p50 {percentile(samples, 0.5) * 1e6:7.1f} us   p99 {percentile(samples, 0.99) * 1e6:7.1f} us   "
+          f"max {samples[-1] * 1e6:7.1f} us")
+
+    updates = rng.choices(queries, k=args.updates // 2)
+    updates += [f"new query {i}" for i in range(args.updates - len(updates))]
+    rng.shuffle(updates)
+    start = time.perf_counter()
+    for query in updates:
+        index.increment(query)
+    update_seconds = time.perf_counter() - start
+    print(f"  update   {update_seconds / len(updates) * 1e6:7.1f} us/search ({len(updates):,} searches, half new)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Catalog answer serving benchmark.
+
+Compares building a ``/chat`` catalog response per request (JSON encoding,
+plus gzip when the client accepts it) with looking up the pre-rendered
+bundle (``bundles.BundleStore``).
+
+Usage (from backend/):
+    python -m benchmarks.bundles --requests 100000
+"""
+
+import argparse
+import gzip
+import sys
+import time
+
+
+def per_request(requests: int, message: str, compress: bool) -> float:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from catalog import generate_disease_response
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        body = JSONResponse(jsonable_encoder({"response": generate_disease_response(message)})).body
+        if compress:
+            body = gzip.compress(body)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bundled(requests: int, message: str, accept_encoding: str) -> float:
+    from bundles import BundleStore
+    from catalog import match_disease
+
+    store = BundleStore.build()
+    start = time.perf_counter()
+    for _ in range(requests):
+        store.response("chat", match_disease(message), accept_encoding)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request rendering with pre-rendered bundles")
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+    message = "What are the symptoms of diabetes?"
+
+    print(f"{args.requests:,} catalog responses")
+    print(f"  rendered per request   identity {per_request(args.requests, message, False):7.2f} us   "
+          f"gzip {per_request(args.requests // 10, message, True):7.2f} us")
+    print(f"  pre-rendered bundle    identity {bundled(args.requests, message, 'identity'):7.2f} us   "
+          f"gzip {bundled(args.requests, message, 'gzip, deflate, br'):7.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
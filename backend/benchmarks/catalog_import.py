@@ -0,0 +1,77 @@
+"""
+Imported disease catalog benchmark.
+
+Writes a synthetic ICD-10-scale CSV (codes with names, descriptions and
+synonyms), stream-imports it with ``catalog_store.import_catalog`` and
+reports the import time, the time to open the result and the latency of
+code lookups and prompt matching.
+
+Usage (from backend/):
+    python -m benchmarks.catalog_import --codes 70000
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def write_source(path: str, codes: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = [f"{a}{b}" for a in ("cardio", "neuro", "gastro", "derma", "pulmo", "nephro", "osteo", "hepato")
+             for b in ("pathy", "itis", "algia", "osis", "oma", "plasia")]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["code", "name", "description", "synonyms"])
+        for i in range(codes):
+            code = f"{chr(65 + i % 26)}{i // 26 % 100:02d}.{i // 2600}"
+            name = f"{rng.choice(words)} of the {rng.choice(words)} type {i}"
+            description = " ".join(rng.choice(words) for _ in range(rng.randint(10, 40)))
+            synonyms = "; ".join(f"{rng.choice(words)} {i}-{n}" for n in range(rng.randint(0, 3)))
+            writer.writerow([code, name, description, synonyms])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time importing, opening and querying a disease catalog")
+    parser.add_argument("--codes", type=int, default=70000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    from catalog_store import CatalogHandle, import_catalog
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "icd10.csv")
+        write_source(source, args.codes)
+        started = time.perf_counter()
+        import_catalog(source, os.path.join(directory, "catalog"))
+        import_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = CatalogHandle(os.path.join(directory, "catalog")).current()
+        open_ms = (time.perf_counter() - started) * 1000
+
+        codes = [code.decode() for code in store.codes[:args.lookups].tolist()]
+        started = time.perf_counter()
+        for code in codes:
+            store.by_code(code)
+        code_us = (time.perf_counter() - started) / len(codes) * 1e6
+
+        prompts = [f"What should I know about {store.entry(i).name.lower()} in adults?"
+                   for i in range(0, len(store), max(1, len(store) // 1000))]
+        started = time.perf_counter()
+        matched = sum(store.match(prompt) is not None for prompt in prompts)
+        match_us = (time.perf_counter() - started) / len(prompts) * 1e6
+
+        size = os.path.getsize(store.path)
+        print(f"{len(store):,} codes, {len(store.hashes):,} terms, {os.path.getsize(source) / 1e6:.1f} MB source, "
+              f"{size / 1e6:.1f} MB catalog")
+        print(f"  import {import_s:6.2f} s   open {open_ms:6.2f} ms   by code {code_us:6.1f} us   "
+              f"match {match_us:6.1f} us ({matched}/{len(prompts)} matched)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
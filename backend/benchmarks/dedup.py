@@ -0,0 +1,71 @@
+"""
+Test case dedup benchmark.
+
+Builds a suite of template-style cases where each is a light rewording of
+one of a smaller set of distinct cases, finds near-duplicates with ``dedup``
+and reports the time spent on signatures and on LSH, and how many cases
+were kept.
+
+Usage (from backend/):
+    python -m benchmarks.dedup --cases 500000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+
+def build_suite(cases: int, distinct: int, seed: int = 7) -> list:
+    from records import CompactTestCase
+
+    rng = random.Random(seed)
+    systems = ["EHR", "PACS", "LIS", "RIS", "Pharmacy", "Billing", "Portal", "Scheduling"]
+    actions = ["access", "update", "export", "audit", "delete", "share", "print", "sign"]
+    objects = ["patient record", "lab result", "prescription", "imaging study", "discharge summary",
+               "consent form", "allergy list", "care plan"]
+    bases = []
+    for i in range(distinct):
+        system, action, item = rng.choice(systems), rng.choice(actions), rng.choice(objects)
+        steps = tuple(f"Step {n}: {rng.choice(actions)} the {rng.choice(objects)} in {system} as user {i}"
+                      for n in range(1, rng.randint(3, 7)))
+        bases.append((f"Validate {action} of {item} in {system} ({i})",
+                      f"Verify that authorized users can {action} the {item} in the {system} system; case {i}.",
+                      steps))
+    suite = []
+    for _ in range(cases):
+        title, description, steps = rng.choice(bases)
+        if rng.random() < 0.5:
+            # Reworded near-duplicate: one step dropped or a word appended
+            steps = steps[:-1] if rng.random() < 0.5 else steps + ("Confirm the change",)
+        # Every case gets its own ticket number, so none is an exact copy
+        suite.append(CompactTestCase(title, f"{description} Ticket {rng.randrange(10 ** 7)}.", "high",
+                                     ("HIPAA",), steps))
+    return suite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time MinHash / LSH near-duplicate removal")
+    parser.add_argument("--cases", type=int, default=500000)
+    parser.add_argument("--distinct", type=int, default=20000)
+    args = parser.parse_args()
+
+    from dedup import MinHasher, case_text, find_duplicates
+
+    suite = build_suite(args.cases, args.distinct)
+    minhasher = MinHasher()
+    started = time.perf_counter()
+    signatures = minhasher.signatures([case_text(test_case) for test_case in suite])
+    signatures_s = time.perf_counter() - started
+    started = time.perf_counter()
+    kept = int((find_duplicates(signatures) < 0).sum())
+    lsh_s = time.perf_counter() - started
+
+    print(f"{args.cases:,} cases built from {args.distinct:,} distinct ones, {minhasher.num_perm} permutations")
+    print(f"  signatures {signatures_s:6.2f} s   lsh {lsh_s:6.2f} s   total {signatures_s + lsh_s:6.2f} s   "
+          f"kept {kept:,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+LLM tail-latency benchmark.
+
+Sends prompts through ``llm.agenerate`` to the fault-injecting fake backend
+(a share of calls stall) with and without hedging, and reports the latency
+percentiles callers see and how many hedges were fired.
+
+Usage (from backend/):
+    python -m benchmarks.hedging --requests 400 --stall-rate 0.05 --stall-ms 1000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run(requests: int, concurrency: int, latency_ms: float, stall_rate: float, stall_ms: float,
+        hedge: bool) -> dict:
+    import llm
+    from resilience import ResilientCaller
+
+    llm.set_backend(llm.FakeBackend(latency_ms=latency_ms, stall_rate=stall_rate, stall_ms=stall_ms, seed=7))
+    guard = ResilientCaller(hedge=hedge, hedge_ratio=0.1, timeout_s=stall_ms * 2 / 1000.0)
+    latencies = []
+
+    async def client(n: int):
+        for i in range(n):
+            started = time.perf_counter()
+            await llm.agenerate(f"prompt {i}", guard=guard)
+            latencies.append(time.perf_counter() - started)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency * 2))
+        await asyncio.gather(*(client(requests // concurrency) for _ in range(concurrency)))
+
+    asyncio.run(scenario())
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+            "hedges": guard.hedges, "hedge_wins": guard.hedge_wins}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure LLM latency percentiles with and without hedging")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.requests:,} requests, {args.concurrency} concurrent, {args.latency_ms:.0f} ms upstream, "
+          f"{args.stall_rate:.0%} stalled for {args.stall_ms:.0f} ms")
+    for hedge in (False, True):
+        result = run(args.requests, args.concurrency, args.latency_ms, args.stall_rate, args.stall_ms, hedge)
+        print(f"  hedging {'on ' if hedge else 'off'}  p50 {result['p50']:7.1f} ms  p95 {result['p95']:7.1f} ms  "
+              f"p99 {result['p99']:7.1f} ms  hedges {result['hedges']} (won {result['hedge_wins']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+In-process ASGI load generator.
+
+Drives the application through ``httpx.ASGITransport`` (no sockets, no
+uvicorn), so results measure the framework and handler cost only and are
+reproducible on one machine without network access. Each scenario is run by
+``concurrency`` coroutines issuing requests back-to-back until ``requests``
+have completed.
+
+A scenario body is either fixed JSON or an object whose ``next(previous)``
+builds each request from the same coroutine's previous response; refresh
+tokens are single-use, so ``auth_refresh`` rotates a chain of them.
+"""
+
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+TIMER = time.perf_counter
+
+TEST_CASES = [
+    {
+        "title": "Validate EHR System Access",
+        "description": "Verify that authorized users can access the EHR system with valid credentials.",
+        "priority": "high",
+        "compliance": ["HIPAA"],
+        "test_steps": ["Launch the application", "Enter valid credentials", "Click login button"],
+    }
+]
+
+BENCH_USER = {"username": "benchuser", "email": "bench@example.com", "password": "bench-password"}
+
+
+class RefreshTokens:
+    """Bodies for /auth/refresh: each token is sent once, then replaced by the one it was rotated into"""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+
+    async def prepare(self, client: httpx.AsyncClient, concurrency: int):
+        """One session per coroutine, so no token is ever presented twice"""
+        self.tokens = []
+        for _ in range(concurrency):
+            response = await client.post("/auth/login", json={
+                "username": BENCH_USER["username"], "password": BENCH_USER["password"],
+            })
+            if response.status_code == 200:
+                self.tokens.append(response.json()["refresh_token"])
+
+    def next(self, previous: Optional[httpx.Response]) -> dict:
+        if previous is not None and previous.status_code == 200:
+            self.tokens.append(previous.json()["refresh_token"])
+        return {"refresh_token": self.tokens.pop() if self.tokens else ""}
+
+
+# name -> (method, path, json body (or RefreshTokens), needs auth)
+SCENARIOS = {
+    "root": ("GET", "/", None, False),
+    "health": ("GET", "/health", None, False),
+    "api_health": ("GET", "/api/health", None, False),
+    "livez": ("GET", "/livez", None, False),
+    "readyz": ("GET", "/readyz", None, False),
+    "metrics": ("GET", "/metrics", None, False),
+    "disease_chat": ("POST", "/api/disease/chat", {"prompt": "Tell me about diabetes"}, False),
+    "chat": ("POST", "/chat", {"message": "What are the symptoms of hypertension?"}, False),
+    "disease_history_record": ("POST", "/api/disease/history", {"query": "Type 2 diabetes symptoms"}, True),
+    "disease_history": ("GET", "/api/disease/history", None, True),
+    "disease_autocomplete": ("GET", "/api/disease/autocomplete?prefix=type", None, True),
+    "testcase_generate": ("POST", "/api/testcase/generate", {
+        "requirement": "Clinicians can review lab results", "system_type": "EHR",
+        "priority": "high", "compliance": ["HIPAA"],
+    }, False),
+    "testcase_generate_stream": ("POST", "/api/testcase/generate/stream", {
+        "requirement": "Clinicians can review lab results", "system_type": "EHR",
+        "priority": "high", "compliance": ["HIPAA"],
+    }, False),
+    "testcases_generate": ("POST", "/testcases/generate", {
+        "requirement": "Clinicians can review lab results", "systemType": "EHR",
+        "priority": "high", "compliance": ["HIPAA"],
+    }, False),
+    "auth_login": ("POST", "/auth/login", {
+        "username": BENCH_USER["username"], "password": BENCH_USER["password"],
+    }, False),
+    "api_auth_login": ("POST", "/api/auth/login", {
+        "username": BENCH_USER["username"], "password": BENCH_USER["password"],
+    }, False),
+    "auth_refresh": ("POST", "/auth/refresh", RefreshTokens(), False),
+    "auth_me": ("GET", "/auth/me", None, True),
+    "api_auth_user": ("GET", "/api/auth/user", None, True),
+    "api_auth_logout": ("POST", "/api/auth/logout", None, False),
+    "export_jira": ("POST", "/integrations/jira/export", {"testCases": TEST_CASES}, False),
+    "export_testrail": ("POST", "/integrations/testrail/export", {"testCases": TEST_CASES}, False),
+    "export_azuredevops": ("POST", "/integrations/azuredevops/export", {"testCases": TEST_CASES}, False),
+    "projects": ("GET", "/projects", None, True),
+}
+
+# bcrypt makes logins ~1000x slower than other endpoints; keep their share small
+DEFAULT_REQUEST_COUNTS = {"auth_login": 20, "api_auth_login": 20}
+
+# Endpoints that create or destroy state (the bench user, its session and
+# history) and are not meaningful to repeat
+SKIPPED_ROUTES = {
+    "POST /auth/signup", "POST /api/auth/signup", "POST /auth/logout",
+    "POST /projects", "DELETE /api/disease/history",
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float, concurrency: int) -> Dict:
+    latencies.sort()
+    completed = len(latencies)
+    return {
+        "name": name,
+        "concurrency": concurrency,
+        "requests": completed,
+        "errors": errors,
+        "duration": elapsed,
+        "throughput": completed / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+async def drive(client: httpx.AsyncClient, name: str, method: str, path: str, body: Optional[dict],
+                headers: Dict[str, str], requests: int, concurrency: int) -> Dict:
+    """Issue ``requests`` calls from ``concurrency`` coroutines and summarise latency"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        response = None
+        while remaining > 0:
+            remaining -= 1
+            payload = body.next(response) if hasattr(body, "next") else body
+            start = TIMER()
+            response = await client.request(method, path, json=payload, headers=headers)
+            latencies.append(TIMER() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = TIMER()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors, TIMER() - start, concurrency)
+
+
+async def run_load_async(app, selected: Optional[List[str]], requests: int, concurrency: int,
+                         request_counts: Optional[Dict[str, int]] = None,
+                         on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/auth/signup", json=BENCH_USER)
+            login = await client.post("/auth/login", json={
+                "username": BENCH_USER["username"], "password": BENCH_USER["password"],
+            })
+            token = login.json().get("access_token", "") if login.status_code == 200 else ""
+
+            for name, (method, path, body, needs_auth) in SCENARIOS.items():
+                if selected and name not in selected:
+                    continue
+                headers = {"Authorization": f"Bearer {token}"} if needs_auth else {}
+                if hasattr(body, "prepare"):
+                    await body.prepare(client, concurrency)
+                count = min(requests, (request_counts or DEFAULT_REQUEST_COUNTS).get(name, requests))
+                result = await drive(client, name, method, path, body, headers, count, concurrency)
+                if on_result:
+                    on_result(result)
+                results.append(result)
+    return results
+
+
+def uncovered_routes(app) -> List[str]:
+    """API routes that have no load scenario"""
+    covered = {f"{method} {path.partition('?')[0]}" for method, path, _, _ in SCENARIOS.values()}
+    missing = []
+    for path, operations in app.openapi()["paths"].items():
+        for method in operations:
+            route = f"{method.upper()} {path}"
+            if route not in covered and route not in SKIPPED_ROUTES:
+                missing.append(route)
+    return missing
+
+
+def run_load(app, selected: Optional[List[str]] = None, requests: int = 1000, concurrency: int = 16,
+             request_counts: Optional[Dict[str, int]] = None) -> List[Dict]:
+    """Run the load scenarios against ``app`` and print one line per endpoint"""
+    def report(result):
+        print(f"  {result['name']:24s} {result['throughput']:10,.0f} req/s   "
+              f"p50 {result['p50'] * 1e3:7.2f} ms   p95 {result['p95'] * 1e3:7.2f} ms   "
+              f"p99 {result['p99'] * 1e3:7.2f} ms   errors {result['errors']}")
+
+    missing = uncovered_routes(app)
+    if missing:
+        print(f"  (no load scenario for: {', '.join(missing)})")
+    return asyncio.run(run_load_async(app, selected, requests, concurrency, request_counts, report))
@@ -0,0 +1,130 @@
+"""
+Memory benchmark for in-memory test-case suites.
+
+Builds a suite (default 100k cases) twice, as Pydantic ``TestCase`` models
+with per-case lists (how cases were held before) and as
+``records.CompactTestCase`` records, and reports bytes per case measured with
+``tracemalloc``. Two sources are measured:
+
+    templates  cases from the static templates across systems and compliance sets
+    llm        cases parsed from (fake) LLM JSON, where every string is a fresh copy
+
+Usage (from backend/):
+    python -m benchmarks.memory --cases 100000
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import sys
+import tracemalloc
+from typing import Callable, Dict, List
+
+SYSTEM_TYPES = ("EHR", "PACS", "LIS", "RIS", "EMR", "HIS")
+COMPLIANCE_SETS = (["HIPAA"], ["HIPAA", "GDPR"], ["FDA"], ["HIPAA", "HL7"], ["DICOM", "HIPAA", "FDA"])
+STEP_VOCABULARY = (
+    "Launch the application", "Enter valid credentials", "Click login button", "Verify successful access",
+    "Access audit logs", "Verify all actions are recorded", "Check timestamps are accurate",
+    "Capture network traffic", "Verify HTTPS/TLS usage", "Validate session timeout",
+)
+
+
+def measure(build: Callable[[], List]) -> Dict[str, float]:
+    """Peak and retained bytes allocated while building a suite"""
+    gc.collect()
+    tracemalloc.start()
+    suite = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(suite)
+    del suite
+    gc.collect()
+    return {"cases": count, "retained": retained, "peak": peak, "per_case": retained / count if count else 0.0}
+
+
+def template_requests(count: int):
+    combos = itertools.cycle(itertools.product(SYSTEM_TYPES, COMPLIANCE_SETS, ("low", "medium", "high")))
+    for _ in range(0, count, 4):
+        system_type, compliance, priority = next(combos)
+        # A fresh list per request, as a parsed JSON body would be
+        yield system_type, list(compliance), priority
+
+
+def build_template_models(count: int) -> List:
+    from schemas import TestCase
+    from catalog import TEST_CASE_TEMPLATES
+
+    suite = []
+    for system_type, compliance, priority in template_requests(count):
+        for template in TEST_CASE_TEMPLATES:
+            suite.append(TestCase(
+                title=template["title"].format(system_type=system_type),
+                description=template["description"].format(system_type=system_type),
+                priority=priority,
+                compliance=compliance,
+                test_steps=list(template["test_steps"]),
+            ))
+    return suite[:count]
+
+
+def build_template_records(count: int) -> List:
+    from catalog import generate_compact_test_cases
+
+    suite = []
+    for system_type, compliance, priority in template_requests(count):
+        suite.extend(generate_compact_test_cases("requirement", system_type, priority, compliance))
+    return suite[:count]
+
+
+def llm_documents(count: int):
+    """JSON text for each case, so every parsed string is a distinct object"""
+    for i in range(count):
+        yield json.dumps({
+            "title": f"Verify {SYSTEM_TYPES[i % 6]} access control",
+            "description": "Ensure only authorized users can view patient records.",
+            "priority": "high",
+            "compliance": COMPLIANCE_SETS[i % 5],
+            "test_steps": [STEP_VOCABULARY[(i + step) % 10] for step in range(5)],
+        })
+
+
+def build_llm_models(count: int) -> List:
+    from schemas import TestCase
+
+    return [TestCase.model_validate_json(document) for document in llm_documents(count)]
+
+
+def build_llm_records(count: int) -> List:
+    from records import CompactTestCase
+    from schemas import TestCase
+
+    return [
+        CompactTestCase.from_model(TestCase.model_validate_json(document))
+        for document in llm_documents(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per test case")
+    parser.add_argument("--cases", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Import everything first so module import allocations are not counted
+    import catalog  # noqa: F401
+    import records  # noqa: F401
+
+    print(f"Suite of {args.cases:,} test cases (bytes per case, retained / peak while building)")
+    for source, builders in (
+        ("templates", (("pydantic", build_template_models), ("compact", build_template_records))),
+        ("llm", (("pydantic", build_llm_models), ("compact", build_llm_records))),
+    ):
+        for name, build in builders:
+            result = measure(lambda: build(args.cases))
+            print(f"  {source:10s} {name:9s} {result['per_case']:8,.0f} B/case   "
+                  f"retained {result['retained'] / 2**20:7.1f} MiB   peak {result['peak'] / 2**20:7.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
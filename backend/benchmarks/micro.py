@@ -0,0 +1,92 @@
+"""
+Microbenchmarks for the hot functions behind the API.
+
+The harness follows pytest-benchmark's model: each benchmark is calibrated so
+one round runs for at least ``min_round_time`` seconds, then timed for a fixed
+number of rounds, and the per-call statistics are reported.
+"""
+
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+TIMER = time.perf_counter
+
+
+def calibrate(func: Callable[[], object], min_round_time: float) -> int:
+    """Number of calls needed for one round to take at least ``min_round_time``"""
+    iterations = 1
+    while True:
+        start = TIMER()
+        for _ in range(iterations):
+            func()
+        elapsed = TIMER() - start
+        if elapsed >= min_round_time or iterations >= 1 << 24:
+            return iterations
+        # Aim a little past the target to avoid creeping up one doubling at a time
+        iterations = max(iterations * 2, int(iterations * min_round_time * 1.2 / max(elapsed, 1e-9)))
+
+
+def bench(name: str, func: Callable[[], object], rounds: int = 10,
+          min_round_time: float = 0.05, warmup: int = 1) -> Dict:
+    """Time ``func`` and return per-call statistics in seconds"""
+    for _ in range(warmup):
+        func()
+    iterations = calibrate(func, min_round_time)
+
+    per_call: List[float] = []
+    for _ in range(rounds):
+        start = TIMER()
+        for _ in range(iterations):
+            func()
+        per_call.append((TIMER() - start) / iterations)
+
+    mean = statistics.mean(per_call)
+    return {
+        "name": name,
+        "rounds": rounds,
+        "iterations": iterations,
+        "min": min(per_call),
+        "max": max(per_call),
+        "mean": mean,
+        "median": statistics.median(per_call),
+        "stddev": statistics.stdev(per_call) if rounds > 1 else 0.0,
+        "ops": 1.0 / mean if mean else 0.0,
+    }
+
+
+def default_benchmarks() -> Dict[str, Callable[[], object]]:
+    """The functions on the request path that are worth tracking"""
+    from auth import create_access_token, get_password_hash, verify_password, verify_token
+    from catalog import generate_disease_response, generate_test_cases_logic
+    from llm import fake_response
+    from testcase_parser import build_test_case_prompt, parse_test_cases
+
+    token = create_access_token({"sub": "benchmark"})
+    password_hash = get_password_hash("benchmark-password")
+    miss_prompt = "What should I know about seasonal allergies and hay fever?"
+    llm_output = fake_response(build_test_case_prompt("Clinicians can review lab results", "EHR", "high", ["HIPAA"]))
+
+    return {
+        "generate_disease_response[hit]": lambda: generate_disease_response("Tell me about asthma symptoms"),
+        "generate_disease_response[miss]": lambda: generate_disease_response(miss_prompt),
+        "generate_test_cases_logic": lambda: generate_test_cases_logic(
+            "Clinicians can review lab results", "EHR", "high", ["HIPAA", "GDPR"]
+        ),
+        "parse_test_cases": lambda: parse_test_cases(llm_output, {"priority": "high", "compliance": ["HIPAA"]}),
+        "verify_token": lambda: verify_token(token),
+        "verify_password": lambda: verify_password("benchmark-password", password_hash),
+    }
+
+
+def run_micro(selected: Optional[List[str]] = None, rounds: int = 10,
+              min_round_time: float = 0.05) -> List[Dict]:
+    """Run the selected microbenchmarks (default: all)"""
+    results = []
+    for name, func in default_benchmarks().items():
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        result = bench(name, func, rounds=rounds, min_round_time=min_round_time)
+        print(f"  {name:38s} median {result['median'] * 1e6:12.2f} us   {result['ops']:14,.0f} ops/s")
+        results.append(result)
+    return results
@@ -0,0 +1,87 @@
+"""
+Benchmark result files and baseline comparison.
+
+A result file is JSON with run metadata plus ``micro`` and ``load`` lists.
+Comparison matches entries by name and flags a regression when a tracked
+metric is worse than the baseline by more than the tolerance.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+# metric -> True when higher is better
+MICRO_METRICS = {"median": False}
+LOAD_METRICS = {"throughput": True, "p95": False, "p99": False}
+
+
+def environment() -> Dict:
+    """Describe the machine and revision the results were produced on"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "revision": revision,
+    }
+
+
+def save(path: str, results: Dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _compare_section(section: str, current: List[Dict], baseline: List[Dict],
+                     metrics: Dict[str, bool], tolerance: float) -> List[Dict]:
+    baseline_by_name = {entry["name"]: entry for entry in baseline}
+    rows = []
+    for entry in current:
+        previous = baseline_by_name.get(entry["name"])
+        if previous is None:
+            continue
+        for metric, higher_is_better in metrics.items():
+            old, new = previous.get(metric), entry.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                "section": section,
+                "name": entry["name"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": worse > tolerance,
+            })
+    return rows
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Compare two result files; every row carries a ``regression`` flag"""
+    return (
+        _compare_section("micro", current.get("micro", []), baseline.get("micro", []), MICRO_METRICS, tolerance)
+        + _compare_section("load", current.get("load", []), baseline.get("load", []), LOAD_METRICS, tolerance)
+    )
+
+
+def print_comparison(rows: List[Dict]):
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"  {row['section']:5s} {row['name']:38s} {row['metric']:10s} "
+              f"{row['baseline']:12.6g} -> {row['current']:12.6g}  {row['change'] * 100:+7.1f}%  {flag}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Run the backend benchmark suite and compare it with a stored baseline.
+
+Everything runs in-process against a throwaway SQLite database, so the suite
+needs no network and no running server. Rate limiting is disabled so the
+load generator measures the handlers rather than 429 responses.
+
+Usage (from backend/):
+    python -m benchmarks.run                              # micro + load
+    python -m benchmarks.run --load --concurrency 64 --requests 5000
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.15
+
+Exits with status 1 when any metric regressed beyond the tolerance.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+
+def configure_environment():
+    """Isolate the run from the developer's database and limits (before importing the app)"""
+    os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ.setdefault("SEED_DEMO_USERS", "false")
+    import logging
+    logging.disable(logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend microbenchmarks and in-process load test")
+    parser.add_argument("--micro", action="store_true", help="run only the microbenchmarks")
+    parser.add_argument("--load", action="store_true", help="run only the load test")
+    parser.add_argument("--only", nargs="*", help="benchmark or scenario names to run")
+    parser.add_argument("--rounds", type=int, default=10, help="microbenchmark rounds")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per load scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per load scenario")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="write results JSON as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown before flagging a regression (default 0.10)")
+    args = parser.parse_args()
+
+    configure_environment()
+    from benchmarks import results as result_files
+
+    run_micro_suite = args.micro or not args.load
+    run_load_suite = args.load or not args.micro
+    results = {"environment": result_files.environment(), "micro": [], "load": []}
+
+    if run_micro_suite:
+        from benchmarks.micro import run_micro
+
+        print("Microbenchmarks")
+        results["micro"] = run_micro(args.only, rounds=args.rounds)
+
+    if run_load_suite:
+        from app import create_app
+        from benchmarks.load import run_load
+
+        print(f"\nLoad test (concurrency {args.concurrency}, {args.requests} requests per endpoint)")
+        results["load"] = run_load(create_app(), args.only, args.requests, args.concurrency)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            result_files.save(path, results)
+            print(f"\nResults written to {path}")
+
+    if args.baseline:
+        rows = result_files.compare(results, result_files.load(args.baseline), args.tolerance)
+        print(f"\nComparison with {args.baseline} (tolerance {args.tolerance:.0%})")
+        result_files.print_comparison(rows)
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} metric(s) regressed")
+            sys.exit(1)
+        print("\nOK: no regressions")
+
+
+if __name__ == "__main__":
+    main()
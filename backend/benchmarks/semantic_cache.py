@@ -0,0 +1,90 @@
+"""
+Semantic cache scale benchmark.
+
+Fills a ``SemanticCache`` with synthetic disease questions (default one
+million), then reports fill rate and hit/miss lookup latency percentiles.
+With ``--path`` the cache is memory-mapped and the reopen time is reported
+too.
+
+Usage (from backend/):
+    python -m benchmarks.semantic_cache --entries 1000000 --path /tmp/semcache
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.load import percentile
+
+TIMER = time.perf_counter
+
+TOPICS = ["symptom", "treatment", "cause", "diagnosis", "prevention", "risk factor", "complication",
+          "diet", "medication", "side effect", "prognosis", "screening", "test", "exercise", "therapy"]
+AUDIENCES = ["", "in children", "in adults", "during pregnancy", "in older people", "at night"]
+
+
+def synthetic_prompts(count: int, seed: int = 0) -> List[str]:
+    """Distinct questions built from a synthetic vocabulary of conditions"""
+    rng = random.Random(seed)
+    conditions = [f"condition{i}" for i in range(max(1, count // 20))]
+    return [
+        f"what is the {rng.choice(TOPICS)} of {conditions[i % len(conditions)]} {rng.choice(AUDIENCES)} "
+        f"variant{i}"
+        for i in range(count)
+    ]
+
+
+def measure(cache, prompts: List[str]) -> Dict[str, float]:
+    latencies = []
+    for prompt in prompts:
+        start = TIMER()
+        cache.get(prompt)
+        latencies.append(TIMER() - start)
+    latencies.sort()
+    return {"p50": percentile(latencies, 0.50), "p99": percentile(latencies, 0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic cache at scale")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=10_000, help="prompts per put_many call")
+    parser.add_argument("--path", help="directory for a memory-mapped cache (removed first)")
+    args = parser.parse_args()
+
+    from semantic_cache import SemanticCache
+
+    if args.path:
+        shutil.rmtree(args.path, ignore_errors=True)
+    cache = SemanticCache(path=args.path, capacity=args.entries)
+
+    prompts = synthetic_prompts(args.entries)
+    start = TIMER()
+    for offset in range(0, len(prompts), args.batch):
+        chunk = prompts[offset:offset + args.batch]
+        cache.put_many(chunk, [f"answer {offset + i}" for i in range(len(chunk))])
+    cache.segments[-1].rebuild_index()
+    elapsed = TIMER() - start
+    print(f"Filled {len(cache):,} entries in {elapsed:.1f}s ({len(cache) / elapsed:,.0f}/s)")
+
+    rng = random.Random(1)
+    hits = [prompts[rng.randrange(len(prompts))] for _ in range(args.lookups)]
+    misses = [f"how is unknownillness{i} treated" for i in range(args.lookups)]
+    for label, sample in (("hit", hits), ("miss", misses)):
+        stats = measure(cache, sample)
+        print(f"  lookup[{label}]  p50 {stats['p50'] * 1e3:7.3f} ms   p99 {stats['p99'] * 1e3:7.3f} ms")
+
+    if args.path:
+        cache.close()
+        start = TIMER()
+        cache = SemanticCache(path=args.path)
+        print(f"Reopened {len(cache):,} entries in {(TIMER() - start) * 1e3:.0f} ms")
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
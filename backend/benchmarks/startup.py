@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark based on ``python -X importtime``.
+
+Imports the application module in a fresh interpreter several times, reports
+the median total import time and the heaviest imports, and exits non-zero if
+a module that must stay lazy (jose, passlib, google.generativeai) was
+imported at startup, or if the median regressed.
+
+Import time depends on the machine, so the regression check compares the
+median with a baseline saved on the same machine (``--save-baseline``),
+allowing ``--tolerance``. The fixed ``--budget-ms`` is only a coarse cap
+(the full app imports in about 700 ms here, most of it FastAPI and pydantic).
+
+Usage (from backend/):
+    python -m benchmarks.startup --save-baseline benchmarks/startup_baseline.json
+    python -m benchmarks.startup --baseline benchmarks/startup_baseline.json --tolerance 0.15
+    python -m benchmarks.startup --module app --budget-ms 1000
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ["jose", "passlib", "google.generativeai"]
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, int]]:
+    """Return total import time in ms and cumulative microseconds per module"""
+    cumulative = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        cum_us = int(parts[1].strip())
+        raw_name = parts[2]
+        name = raw_name.strip()
+        # Nesting is shown as two spaces per level after the separator's space
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        cumulative[name] = max(cumulative.get(name, 0), cum_us)
+        if depth == 0:
+            total_us += cum_us
+    return total_us / 1000.0, cumulative
+
+
+def measure(module: str) -> Tuple[float, Dict[str, int]]:
+    """Import ``module`` once in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def run(module: str, runs: int, budget_ms: float, top: int, baseline: Optional[str] = None,
+        tolerance: float = 0.10, save_baseline: Optional[str] = None) -> int:
+    """Run the benchmark and return the process exit code"""
+    from benchmarks import results as result_files
+
+    totals: List[float] = []
+    cumulative: Dict[str, int] = {}
+    for _ in range(runs):
+        total_ms, cumulative = measure(module)
+        totals.append(total_ms)
+
+    median_ms = statistics.median(totals)
+    print(f"import {module}: median {median_ms:.1f} ms over {runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, budget {budget_ms:.0f} ms)")
+
+    print(f"\nHeaviest imports (cumulative):")
+    for name, cum_us in sorted(cumulative.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {cum_us / 1000.0:8.1f} ms  {name}")
+
+    # Stored like a microbenchmark so results.compare() applies
+    results = {
+        "environment": result_files.environment(),
+        "micro": [{"name": f"startup:import {module}", "median": median_ms, "min": min(totals), "runs": runs}],
+    }
+    if save_baseline:
+        result_files.save(save_baseline, results)
+        print(f"\nBaseline written to {save_baseline}")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in cumulative]
+    if eager:
+        print(f"\nFAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > budget_ms:
+        print(f"\nFAIL: startup import time {median_ms:.1f} ms exceeds budget of {budget_ms:.0f} ms")
+        failed = True
+    if baseline:
+        rows = result_files.compare(results, result_files.load(baseline), tolerance)
+        print(f"\nComparison with {baseline} (tolerance {tolerance:.0%})")
+        result_files.print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            print(f"\nFAIL: startup import time regressed")
+            failed = True
+    if not failed:
+        print("\nOK: within startup budget")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold-start import time")
+    parser.add_argument("--module", default="app", help="module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to sample")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail if the median import time exceeds this (env STARTUP_BUDGET_MS)")
+    parser.add_argument("--baseline", help="compare the median with this results JSON")
+    parser.add_argument("--save-baseline", help="write the median as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown against the baseline (default 0.10)")
+    parser.add_argument("--top", type=int, default=15, help="number of heaviest imports to list")
+    args = parser.parse_args()
+    sys.exit(run(args.module, args.runs, args.budget_ms, args.top, args.baseline, args.tolerance,
+                 args.save_baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Pre-rendered disease answer bundles.
+
+Catalog answers are static, so the ``/chat`` response body for each catalog
+entry is rendered once, as the exact JSON bytes FastAPI would send, plus
+gzip and (when the optional ``brotli`` package is installed) brotli
+variants. All variants live in one blob with an offset index:
+
+    b"HTBNDL01" | index length (u32, little endian) | JSON index | bodies
+
+The index maps ``route/key/encoding`` to (offset from the first body, length).
+
+The blob is memory-mapped, so the bodies stay in the page cache shared by
+every worker, and each variant is a ``memoryview`` slice taken once at load
+time together with its response headers. A hit is a dict lookup and a send
+of that slice; nothing is encoded, compressed or copied per request. When
+the server offers the ASGI ``http.response.zerocopy`` extension the body is
+sent from the file with sendfile instead.
+
+Build the file ahead of time with ``python -m bundles --output PATH`` and
+point ``DISEASE_BUNDLES_PATH`` at it; a missing or stale file (catalog
+changed) is rebuilt at startup. Without a path the blob is built in memory.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.responses import Response
+
+from catalog import DISEASE_CATALOG, GENERAL_HEALTH_INFO, GENERAL_KEY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DISEASE_BUNDLES_PATH = os.getenv("DISEASE_BUNDLES_PATH")
+
+MAGIC = b"HTBNDL01"
+_HEADER = struct.Struct("<8sI")
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip", "identity")
+
+
+def catalog_entries() -> Dict[str, str]:
+    """Catalog key -> answer text, including the general answer"""
+    entries = dict(DISEASE_CATALOG)
+    entries[GENERAL_KEY] = GENERAL_HEALTH_INFO
+    return entries
+
+
+def catalog_digest() -> str:
+    """Changes whenever a catalog answer does, so stale blobs are rebuilt"""
+    digest = hashlib.sha256()
+    for key, text in sorted(catalog_entries().items()):
+        digest.update(key.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def render_json(content) -> bytes:
+    """Same bytes as ``fastapi.responses.JSONResponse``"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+# ============================================================================
+# Build
+# ============================================================================
+
+def build_blob() -> bytes:
+    """Render every catalog answer in every encoding into one blob"""
+    variants: List[Tuple[str, bytes]] = []
+    for key, text in catalog_entries().items():
+        body = render_json({"response": text})
+        variants.append((f"chat/{key}/identity", body))
+        variants.append((f"chat/{key}/gzip", gzip.compress(body, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            variants.append((f"chat/{key}/br", brotli.compress(body, quality=11)))
+
+    # Offsets are relative to the start of the bodies, right after the index
+    entries, position = {}, 0
+    for name, body in variants:
+        entries[name] = [position, len(body)]
+        position += len(body)
+    index = render_json({"digest": catalog_digest(), "entries": entries})
+    return b"".join([_HEADER.pack(MAGIC, len(index)), index] + [body for _, body in variants])
+
+
+def write_blob(path: str) -> str:
+    """Build the blob and atomically replace ``path`` with it"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, tmp_path = tempfile.mkstemp(dir=directory, prefix=".bundles-")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(build_blob())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+# ============================================================================
+# Serving
+# ============================================================================
+
+class Bundle(NamedTuple):
+    body: memoryview
+    offset: int
+    headers: List[Tuple[bytes, bytes]]
+
+
+class BundleResponse(Response):
+    """A pre-rendered body with pre-built headers"""
+
+    def __init__(self, bundle: Bundle, file=None):
+        self.status_code = 200
+        self.background = None
+        self.body = bundle.body
+        # Middleware (CORS) appends to the header list, so each response gets its own
+        self.raw_headers = list(bundle.headers)
+        self._offset = bundle.offset
+        self._file = file
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+        if self._file is not None and "http.response.zerocopy" in scope.get("extensions", {}):
+            await send({"type": "http.response.zerocopy", "file": self._file,
+                        "offset": self._offset, "count": len(self.body)})
+        else:
+            await send({"type": "http.response.body", "body": self.body})
+
+
+class BundleStore:
+    """Lookup of pre-rendered bodies by route, catalog key and Accept-Encoding"""
+
+    def __init__(self, buffer, file=None):
+        magic, index_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a disease bundle blob")
+        index = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + index_length]))
+        self.digest = index["digest"]
+        self.file = file
+        self._buffer = buffer
+        self._view = view = memoryview(buffer)
+        data_start = _HEADER.size + index_length
+        self._variants: Dict[Tuple[str, str], Dict[str, Bundle]] = {}
+        for name, (position, length) in index["entries"].items():
+            offset = data_start + position
+            route, key, encoding = name.split("/")
+            headers = [(b"content-type", b"application/json"),
+                       (b"content-length", str(length).encode()),
+                       (b"vary", b"Accept-Encoding")]
+            if encoding != "identity":
+                headers.append((b"content-encoding", encoding.encode()))
+            bundle = Bundle(view[offset:offset + length], offset, headers)
+            self._variants.setdefault((route, key), {})[encoding] = bundle
+        self._negotiated: Dict[Optional[str], str] = {}
+        self.hits = 0
+
+    @classmethod
+    def build(cls) -> "BundleStore":
+        return cls(build_blob())
+
+    @classmethod
+    def open(cls, path: str) -> "BundleStore":
+        """Memory-map a blob written by ``write_blob``"""
+        f = open(path, "rb")
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            f.close()
+            raise
+        return cls(buffer, file=f)
+
+    def __len__(self) -> int:
+        return sum(len(variants) for variants in self._variants.values())
+
+    def encodings(self) -> Tuple[str, ...]:
+        return tuple(encoding for encoding in ENCODINGS
+                     if any(encoding in variants for variants in self._variants.values()))
+
+    def _negotiate(self, accept_encoding: Optional[str]) -> str:
+        """Best encoding the client accepts (browsers send a handful of distinct headers)"""
+        encoding = self._negotiated.get(accept_encoding)
+        if encoding is not None:
+            return encoding
+        accepted = {}
+        for item in (accept_encoding or "").lower().split(","):
+            name, _, params = item.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip()] = quality
+        encoding = "identity"
+        for candidate in self.encodings():
+            if accepted.get(candidate, accepted.get("*", 0.0)) > 0.0:
+                encoding = candidate
+                break
+        if len(self._negotiated) < 256:
+            self._negotiated[accept_encoding] = encoding
+        return encoding
+
+    def response(self, route: str, key: str, accept_encoding: Optional[str] = None) -> Optional[BundleResponse]:
+        variants = self._variants.get((route, key))
+        if variants is None:
+            return None
+        self.hits += 1
+        return BundleResponse(variants[self._negotiate(accept_encoding)], self.file)
+
+    def close(self):
+        variants = [bundle for by_encoding in self._variants.values() for bundle in by_encoding.values()]
+        self._variants.clear()
+        if self.file is None:
+            return
+        try:
+            for bundle in variants:
+                bundle.body.release()
+            self._view.release()
+            self._buffer.close()
+        except (BufferError, ValueError):
+            # A response still holds a slice; the map is unmapped once it is collected
+            pass
+        self.file.close()
+        self.file = None
+
+    def stats(self) -> dict:
+        return {"variants": len(self), "encodings": list(self.encodings()), "hits": self.hits,
+                "memory_mapped": self.file is not None}
+
+
+def load_bundles(path: Optional[str] = DISEASE_BUNDLES_PATH) -> BundleStore:
+    """Open the blob at ``path`` (rebuilding it if missing or stale), or build one in memory"""
+    if not path:
+        return BundleStore.build()
+    if os.path.exists(path):
+        try:
+            store = BundleStore.open(path)
+            if store.digest == catalog_digest():
+                return store
+            store.close()
+            logger.info(f"Disease bundles at {path} are stale, rebuilding")
+        except (ValueError, OSError, struct.error) as e:
+            logger.warning(f"Disease bundles at {path} are unreadable, rebuilding: {str(e)}")
+    write_blob(path)
+    return BundleStore.open(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the disease answer bundles")
+    parser.add_argument("--output", default=DISEASE_BUNDLES_PATH or "disease_bundles.bin")
+    args = parser.parse_args()
+    write_blob(args.output)
+    store = BundleStore.open(args.output)
+    print(f"Wrote {len(store)} variants ({', '.join(store.encodings())}) "
+          f"to {args.output} ({os.path.getsize(args.output):,} bytes)")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
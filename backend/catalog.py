@@ -0,0 +1,200 @@
+"""
+Read-mostly reference data: the disease knowledge catalog and the test-case
+templates, plus the functions that answer from them.
+
+Everything here is built once at import time and never mutated, so it is safe
+to share between requests (and, under the prefork launcher, between workers).
+"""
+
+from typing import List
+
+from records import POOL, CompactTestCase
+from schemas import TestCase
+
+# ============================================================================
+# Disease Catalog
+# ============================================================================
+
+DISEASE_CATALOG = {
+    "diabetes": """**Diabetes Mellitus**
+
+**Brief Description:** Diabetes is a chronic condition affecting how the body processes blood sugar.
+
+**Common Symptoms:**
+- Frequent urination
+- Increased thirst and hunger
+- Extreme fatigue
+- Slow-healing wounds
+- Blurred vision
+
+**Treatment Options:**
+1. Lifestyle modifications (diet, exercise)
+2. Medications (Metformin, Insulin)
+3. Regular blood sugar monitoring
+4. Healthcare provider consultation
+
+**Prevention:** Maintain healthy weight, exercise regularly, eat balanced diet, manage stress.
+
+**When to Seek Help:** If experiencing persistent symptoms or blood sugar levels are consistently high.""",
+    
+    "hypertension": """**Hypertension (High Blood Pressure)**
+
+**Brief Description:** A condition where blood pressure remains abnormally high.
+
+**Common Symptoms:**
+- Often asymptomatic (silent killer)
+- Headaches
+- Dizziness
+- Chest pain
+- Shortness of breath
+
+**Treatment Options:**
+1. DASH diet and reduced salt
+2. Regular exercise
+3. Medications (ACE inhibitors, Beta-blockers)
+4. Stress management
+
+**Prevention:** Maintain healthy weight, limit alcohol, exercise regularly, manage stress.
+
+**When to Seek Help:** Blood pressure consistently above 130/80 mmHg or experiencing severe symptoms.""",
+    
+    "asthma": """**Asthma**
+
+**Brief Description:** A chronic respiratory disease causing inflammation and narrowing of airways.
+
+**Common Symptoms:**
+- Wheezing and coughing
+- Shortness of breath
+- Chest tightness
+- Difficulty during physical activity
+
+**Treatment Options:**
+1. Quick-relief inhalers (Albuterol)
+2. Long-term control medications
+3. Avoiding triggers
+4. Peak flow monitoring
+
+**Prevention:** Identify triggers, take medications as prescribed, maintain healthy lifestyle.
+
+**When to Seek Help:** Severe shortness of breath or blue lips/face."""
+}
+
+GENERAL_HEALTH_INFO = """**General Health Information**
+
+**About Your Query:** While specific information about your query is not available, here are general recommendations:
+
+**General Health Tips:**
+- Maintain regular exercise (150 mins/week)
+- Eat balanced, nutritious meals
+- Get 7-9 hours of sleep
+- Manage stress through relaxation
+- Stay hydrated
+- Have regular medical check-ups
+- Keep medications organized
+
+**When to Consult a Doctor:**
+- Persistent symptoms lasting >2 weeks
+- Severe pain or discomfort
+- Difficulty breathing or chest pain
+- Sudden vision or hearing changes
+- Signs of infection (fever, persistent cough)
+
+**Always consult qualified healthcare professionals for proper diagnosis and treatment."""
+
+# Catalog key of GENERAL_HEALTH_INFO (pre-rendered bundles are keyed by catalog key)
+GENERAL_KEY = "general"
+
+def match_disease(prompt: str) -> str:
+    """Catalog key answering ``prompt``, or GENERAL_KEY"""
+    prompt_lower = prompt.lower()
+    for disease in DISEASE_CATALOG:
+        if disease in prompt_lower:
+            return disease
+    return GENERAL_KEY
+
+def generate_disease_response(prompt: str) -> str:
+    """Generate mock disease information"""
+    return DISEASE_CATALOG.get(match_disease(prompt), GENERAL_HEALTH_INFO)
+# ============================================================================
+# Test Case Templates
+# ============================================================================
+
+# ``{system_type}`` is substituted per request; steps are shared as-is.
+TEST_CASE_TEMPLATES = (
+    {
+        "title": "Validate {system_type} System Access",
+        "description": "Verify that authorized users can access the {system_type} system with valid credentials.",
+        "test_steps": (
+            "Launch the application",
+            "Enter valid credentials",
+            "Click login button",
+            "Verify successful access",
+            "Check user dashboard displays correctly"
+        )
+    },
+    {
+        "title": "Test {system_type} Data Encryption",
+        "description": "Ensure all patient data transmitted over network is encrypted using industry standards.",
+        "test_steps": (
+            "Capture network traffic",
+            "Verify HTTPS/TLS usage",
+            "Check encryption protocols (TLS 1.2+)",
+            "Validate certificate validity",
+            "Confirm no unencrypted PII transmission"
+        )
+    },
+    {
+        "title": "{system_type} User Authentication Test",
+        "description": "Validate authentication mechanism prevents unauthorized access.",
+        "test_steps": (
+            "Attempt login with invalid credentials",
+            "Verify error message (generic)",
+            "Check account lockout after failed attempts",
+            "Test password reset functionality",
+            "Validate session timeout"
+        )
+    },
+    {
+        "title": "{system_type} Audit Log Verification",
+        "description": "Ensure all user actions are logged for compliance and security audit trails.",
+        "test_steps": (
+            "Perform user actions in system",
+            "Access audit logs",
+            "Verify all actions are recorded",
+            "Check timestamps are accurate",
+            "Validate user identification in logs"
+        )
+    },
+)
+
+def generate_compact_test_cases(
+    requirement: str,
+    system_type: str,
+    priority: str,
+    compliance: List[str]
+) -> List[CompactTestCase]:
+    """Generate mock test cases as compact records (steps and strings shared)"""
+    compliance = POOL.strings(compliance)
+    priority = POOL.string(priority)
+    return [
+        CompactTestCase(
+            POOL.string(template["title"].format(system_type=system_type)),
+            POOL.string(template["description"].format(system_type=system_type)),
+            priority,
+            compliance,
+            template["test_steps"]
+        )
+        for template in TEST_CASE_TEMPLATES
+    ]
+
+def generate_test_cases_logic(
+    requirement: str,
+    system_type: str,
+    priority: str,
+    compliance: List[str]
+) -> List[TestCase]:
+    """Generate mock test cases"""
+    return [
+        test_case.to_model()
+        for test_case in generate_compact_test_cases(requirement, system_type, priority, compliance)
+    ]
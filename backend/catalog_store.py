@@ -0,0 +1,520 @@
+"""
+Imported disease catalogs (ICD-10 scale) in a memory-mapped binary format.
+
+``python -m catalog_store import SOURCE --dir DIR`` stream-parses a CSV, JSON
+array or JSON Lines file one record at a time and writes a new catalog
+version to ``DIR``. The CSV delimiter is a tab for ``.tsv`` files and is
+otherwise detected from the header line (``--delimiter`` overrides); a
+source that yields no records is refused rather than published. Columns / keys: ``code``, ``name`` (or ``title``,
+``short_description``), ``description`` (or ``long_description``) and
+``synonyms`` (a list, or one string separated by ``;`` or ``|``).
+
+File layout (all little endian)::
+
+    header    magic, format version, counts, section offsets, version label
+    codes     sorted codes, 16 bytes each
+    records   fixed-width rows in code order: (offset, length) of the name,
+              description and synonyms in the string table
+    hashes    sorted 64-bit hashes of every normalized code, name and synonym
+    terms     record index of each hash
+    strings   UTF-8 string table
+
+The sorted keys are stored as their own contiguous columns so lookups
+bisect them in place.
+
+Workers open a version with ``mmap`` and ``numpy.frombuffer``; nothing is
+parsed or copied up front, so opening takes milliseconds whatever the size.
+Lookups bisect the record or term arrays and only decode the strings of the
+rows they return.
+
+A version becomes current when the ``CURRENT`` file in ``DIR`` is atomically
+replaced with its file name. ``CatalogHandle`` re-checks that pointer at most
+every ``DISEASE_CATALOG_CHECK_S`` and switches to the new version in place,
+so running workers pick up an import without a restart.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the catalog versions and the CURRENT pointer; unset disables imported catalogs
+DISEASE_CATALOG_DIR = os.getenv("DISEASE_CATALOG_DIR")
+DISEASE_CATALOG_CHECK_S = float(os.getenv("DISEASE_CATALOG_CHECK_S", "2"))
+DISEASE_CATALOG_KEEP_VERSIONS = int(os.getenv("DISEASE_CATALOG_KEEP_VERSIONS", "3"))
+
+MAGIC = b"HTCATLG1"
+FORMAT_VERSION = 1
+# magic, format version, records, terms, offsets of codes / records / hashes / terms / strings, strings length, label
+_HEADER = struct.Struct("<8sIIIQQQQQQ32s")
+CURRENT_FILE = "CURRENT"
+
+CODE = np.dtype("S16")
+RECORD = np.dtype([
+    ("name_offset", "<u8"), ("name_length", "<u4"),
+    ("description_offset", "<u8"), ("description_length", "<u4"),
+    ("synonyms_offset", "<u8"), ("synonyms_length", "<u4"),
+])
+HASH = np.dtype("<u8")
+# Sections start on cache-line boundaries; NumPy falls back to slow paths on unaligned arrays
+_ALIGNMENT = 64
+TERM = np.dtype("<u4")
+
+# Synonyms are stored as one string joined with the ASCII unit separator
+_SYNONYM_SEPARATOR = "\x1f"
+# Longest phrase (in words) matched against catalog terms
+MAX_TERM_WORDS = 6
+
+_WORD = re.compile(r"[a-z0-9]+(?:[.'-][a-z0-9]+)*")
+
+NAME_KEYS = ("name", "title", "short_description")
+DESCRIPTION_KEYS = ("description", "long_description", "definition")
+# Delimiters considered when detecting a CSV header
+CSV_DELIMITERS = ",\t;|"
+
+
+def normalize_term(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+# ============================================================================
+# Streaming sources
+# ============================================================================
+
+def _first(row: dict, keys: Tuple[str, ...]) -> str:
+    for key in keys:
+        value = row.get(key)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def _synonyms(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[;|]", value)
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def to_entry(row: dict) -> Optional[Tuple[str, str, str, List[str]]]:
+    """(code, name, description, synonyms) from a source row, or None if it has no code"""
+    row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    code = str(row.get("code") or "").strip().upper()
+    if not code:
+        return None
+    name = _first(row, NAME_KEYS)
+    description = _first(row, DESCRIPTION_KEYS)
+    return code, name or description, description, _synonyms(row.get("synonyms"))
+
+
+def sniff_delimiter(f, default: str = ",") -> str:
+    """Delimiter of the CSV header line at the start of ``f`` (which is rewound)"""
+    header = f.readline()
+    f.seek(0)
+    try:
+        return csv.Sniffer().sniff(header, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return default
+
+
+def iter_csv(f, delimiter: str = ",") -> Iterator[dict]:
+    yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def iter_json(f, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Objects of a top-level JSON array (or a JSON Lines stream), decoded one at a time"""
+    decoder = json.JSONDecoder()
+    buffer, position = "", 0
+    while True:
+        # Skip whitespace and array punctuation between objects, reading more as needed
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] in "[,]"):
+            position += 1
+        if position == len(buffer):
+            buffer, position = f.read(chunk_size), 0
+            if not buffer:
+                return
+            continue
+        while True:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                # The object continues past the buffered text
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+        yield item
+
+
+def iter_source(path: str, source_format: Optional[str] = None,
+                delimiter: Optional[str] = None) -> Iterator[Tuple[str, str, str, List[str]]]:
+    """Stream (code, name, description, synonyms) entries from a CSV or JSON file"""
+    if source_format is None:
+        source_format = "csv" if path.lower().endswith((".csv", ".tsv", ".txt")) else "json"
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if source_format == "csv":
+            if delimiter is None:
+                delimiter = "\t" if path.lower().endswith(".tsv") else sniff_delimiter(f)
+            rows = iter_csv(f, delimiter)
+        else:
+            rows = iter_json(f)
+        for row in rows:
+            entry = to_entry(row)
+            if entry is not None:
+                yield entry
+
+# ============================================================================
+# Writing
+# ============================================================================
+
+class _StringTable:
+    """Appends UTF-8 strings to a temporary file, reusing offsets of repeated strings"""
+
+    def __init__(self, f):
+        self._file = f
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self.size = 0
+
+    def add(self, text: str) -> Tuple[int, int]:
+        if not text:
+            return 0, 0
+        known = self._offsets.get(text)
+        if known is not None:
+            return known
+        data = text.encode("utf-8")
+        location = (self.size, len(data))
+        self._file.write(data)
+        self.size += len(data)
+        # Only short strings repeat in practice (names, synonyms); long descriptions are not kept
+        if len(data) <= 128:
+            self._offsets[text] = location
+        return location
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_catalog(entries: Iterator[Tuple[str, str, str, List[str]]], path: str, label: str) -> Tuple[int, int]:
+    """Write a catalog file from streamed entries; returns (records, terms).
+
+    Strings go straight to a temporary string table, so only the fixed-width
+    rows are held in memory. A code seen twice keeps its last entry.
+    """
+    rows: Dict[bytes, tuple] = {}
+    terms: Dict[bytes, set] = {}
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryFile(dir=directory) as strings_file:
+        strings = _StringTable(strings_file)
+        for code, name, description, synonyms in entries:
+            key = code.encode("ascii", "replace")
+            if len(key) > CODE.itemsize:
+                logger.warning(f"Skipping code longer than {CODE.itemsize} bytes: {code}")
+                continue
+            rows[key] = (*strings.add(name), *strings.add(description),
+                         *strings.add(_SYNONYM_SEPARATOR.join(synonyms)))
+            terms[key] = {term_hash(term) for term in map(normalize_term, [code, name, *synonyms]) if term}
+
+        ordered = sorted(rows)
+        codes = np.array(ordered, dtype=CODE)
+        records = np.array([rows[code] for code in ordered], dtype=RECORD)
+        index = {code: i for i, code in enumerate(ordered)}
+        term_rows = sorted((value, index[code]) for code, hashes in terms.items() for value in hashes)
+        hashes = np.array([value for value, _ in term_rows], dtype=HASH)
+        term_records = np.array([record for _, record in term_rows], dtype=TERM)
+
+        sections = [codes, records, hashes, term_records]
+        offsets = [_aligned(_HEADER.size)]
+        for section in sections:
+            offsets.append(_aligned(offsets[-1] + section.nbytes))
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(codes), len(hashes), *offsets, strings.size,
+                              label.encode()[:32])
+        with open(path, "wb") as out:
+            out.write(header)
+            for offset, section in zip(offsets, sections):
+                out.write(b"\0" * (offset - out.tell()))
+                out.write(section.tobytes())
+            out.write(b"\0" * (offsets[-1] - out.tell()))
+            strings_file.seek(0)
+            while True:
+                chunk = strings_file.read(1 << 20)
+                if not chunk:
+                    break
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    return len(codes), len(hashes)
+
+
+def import_catalog(source: str, directory: str, source_format: Optional[str] = None,
+                   keep: int = DISEASE_CATALOG_KEEP_VERSIONS, delimiter: Optional[str] = None) -> str:
+    """Import ``source`` as a new version in ``directory`` and make it current; returns the label.
+
+    Raises ValueError, leaving the current version in place, when ``source``
+    yields no records (usually the wrong format or delimiter).
+    """
+    os.makedirs(directory, exist_ok=True)
+    label = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    filename = f"catalog-{label}.bin"
+    tmp_path = os.path.join(directory, f".{filename}.tmp")
+    started = time.perf_counter()
+    try:
+        count, term_count = write_catalog(iter_source(source, source_format, delimiter), tmp_path, label)
+        if not count:
+            raise ValueError(f"No catalog records found in {source}; check its format and delimiter")
+        os.replace(tmp_path, os.path.join(directory, filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    set_current(directory, filename)
+    logger.info(f"Imported {count} codes ({term_count} terms) from {source} as {label} "
+                f"in {time.perf_counter() - started:.1f} s")
+    prune_versions(directory, keep)
+    return label
+
+
+def set_current(directory: str, filename: str):
+    """Atomically point ``CURRENT`` at ``filename``"""
+    tmp_path = os.path.join(directory, f".{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(filename)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, CURRENT_FILE))
+
+
+def prune_versions(directory: str, keep: int):
+    """Delete all but the newest ``keep`` versions (never the current one).
+
+    Workers still mapping a deleted file keep reading it until they switch.
+    """
+    current = read_current(directory)
+    versions = sorted(name for name in os.listdir(directory)
+                      if name.startswith("catalog-") and name.endswith(".bin"))
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != current:
+            os.unlink(os.path.join(directory, name))
+
+
+def read_current(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+# ============================================================================
+# Reading
+# ============================================================================
+
+class CatalogEntry:
+    """One decoded catalog row"""
+
+    __slots__ = ("code", "name", "description", "synonyms")
+
+    def __init__(self, code: str, name: str, description: str, synonyms: List[str]):
+        self.code = code
+        self.name = name
+        self.description = description
+        self.synonyms = synonyms
+
+    def render(self) -> str:
+        """Markdown answer in the style of the built-in catalog"""
+        parts = [f"**{self.name}** (ICD-10 {self.code})"]
+        if self.description and self.description != self.name:
+            parts.append(f"**Brief Description:** {self.description}")
+        if self.synonyms:
+            parts.append(f"**Also Known As:** {', '.join(self.synonyms)}")
+        parts.append("**When to Seek Help:** Consult a qualified healthcare professional "
+                     "for diagnosis and treatment.")
+        return "\n\n".join(parts)
+
+
+class CatalogStore:
+    """A memory-mapped catalog version"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, count, term_count, codes_offset, records_offset, hashes_offset, terms_offset,
+         strings_offset, strings_length, label) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a disease catalog")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has catalog format {version}, expected {FORMAT_VERSION}")
+        self.label = label.rstrip(b"\0").decode()
+        self.codes = np.frombuffer(self._map, dtype=CODE, count=count, offset=codes_offset)
+        self.records = np.frombuffer(self._map, dtype=RECORD, count=count, offset=records_offset)
+        self.hashes = np.frombuffer(self._map, dtype=HASH, count=term_count, offset=hashes_offset)
+        self.terms = np.frombuffer(self._map, dtype=TERM, count=term_count, offset=terms_offset)
+        self._strings_offset = strings_offset
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def entry(self, i: int) -> CatalogEntry:
+        name_offset, name_length, description_offset, description_length, synonyms_offset, synonyms_length = \
+            self.records[i].item()
+        synonyms = self._string(synonyms_offset, synonyms_length)
+        return CatalogEntry(
+            self.codes[i].decode(),
+            self._string(name_offset, name_length),
+            self._string(description_offset, description_length),
+            synonyms.split(_SYNONYM_SEPARATOR) if synonyms else [],
+        )
+
+    def by_code(self, code: str) -> Optional[CatalogEntry]:
+        key = code.strip().upper().encode("ascii", "replace")
+        i = int(np.searchsorted(self.codes, key))
+        if i < len(self.codes) and self.codes[i] == key:
+            return self.entry(i)
+        return None
+
+    def _records_for(self, hashes: np.ndarray) -> np.ndarray:
+        """Record index per hash, -1 when the hash is not a catalog term"""
+        if not len(self.hashes):
+            return np.full(len(hashes), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        found = self.hashes[positions] == hashes
+        return np.where(found, self.terms[positions].astype(np.int64), -1)
+
+    def lookup(self, term: str) -> Optional[CatalogEntry]:
+        """Entry whose code, name or synonym is ``term`` (normalized)"""
+        normalized = normalize_term(term)
+        if not normalized:
+            return None
+        record = self._records_for(np.array([term_hash(normalized)], dtype=np.uint64))[0]
+        return self.entry(int(record)) if record >= 0 else None
+
+    def match(self, text: str) -> Optional[CatalogEntry]:
+        """Entry for the longest catalog term (up to MAX_TERM_WORDS words) mentioned in ``text``"""
+        words = _WORD.findall(text.lower())
+        phrases = [" ".join(words[start:start + n])
+                   for n in range(min(MAX_TERM_WORDS, len(words)), 0, -1)
+                   for start in range(len(words) - n + 1)]
+        if not phrases:
+            return None
+        hashes = np.fromiter((term_hash(phrase) for phrase in phrases), dtype=np.uint64, count=len(phrases))
+        records = self._records_for(hashes)
+        hits = np.flatnonzero(records >= 0)
+        # Phrases are ordered longest first, so the first hit is the most specific term
+        return self.entry(int(records[hits[0]])) if len(hits) else None
+
+# ============================================================================
+# Hot swap
+# ============================================================================
+
+class CatalogHandle:
+    """The current catalog version of a directory, following ``CURRENT`` as it changes"""
+
+    def __init__(self, directory: str, check_interval_s: float = DISEASE_CATALOG_CHECK_S):
+        self.directory = directory
+        self.check_interval = check_interval_s
+        self._store: Optional[CatalogStore] = None
+        self._pointer: Optional[Tuple[int, int]] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    def _pointer_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.directory, CURRENT_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def current(self) -> Optional[CatalogStore]:
+        """The current version, reopened when ``CURRENT`` was replaced since the last check"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._store
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._store
+            self._checked_at = now
+            pointer = self._pointer_stat()
+            if pointer == self._pointer:
+                return self._store
+            filename = read_current(self.directory)
+            try:
+                store = CatalogStore(os.path.join(self.directory, filename)) if filename else None
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"Could not open disease catalog {filename}: {str(e)}")
+                return self._store
+            # The previous map is released once requests using it are done
+            self._store, self._pointer = store, pointer
+            if store is not None:
+                self.swaps += 1
+                logger.info(f"Disease catalog {store.label} loaded ({len(store)} codes)")
+            return self._store
+
+    def stats(self) -> dict:
+        store = self._store
+        return {
+            "version": store.label if store is not None else None,
+            "codes": len(store) if store is not None else 0,
+            "swaps": self.swaps,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import disease catalogs into the binary catalog format")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import a CSV / JSON / JSON Lines file as a new version")
+    importer.add_argument("source")
+    importer.add_argument("--dir", default=DISEASE_CATALOG_DIR, required=DISEASE_CATALOG_DIR is None)
+    importer.add_argument("--format", choices=("csv", "json"))
+    importer.add_argument("--keep", type=int, default=DISEASE_CATALOG_KEEP_VERSIONS)
+    importer.add_argument("--delimiter", help="CSV delimiter (default: tab for .tsv, else detected)")
+    info = commands.add_parser("info", help="show the current version")
+    info.add_argument("--dir", default=DISEASE_CATALOG_DIR, required=DISEASE_CATALOG_DIR is None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "import":
+        try:
+            label = import_catalog(args.source, args.dir, args.format, args.keep, args.delimiter)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Catalog version {label} is now current in {args.dir}")
+    else:
+        store = CatalogHandle(args.dir).current()
+        if store is None:
+            print(f"No catalog in {args.dir}")
+            return 1
+        print(f"{store.label}: {len(store):,} codes, {len(store.hashes):,} terms ({store.path})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
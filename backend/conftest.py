@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: point the app at a throwaway SQLite database so tests
+never touch the committed healthcare.db, and create the demo accounts.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("SEED_DEMO_USERS", "true")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test_healthcare.db"))
@@ -1,23 +1,69 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean
+from sqlalchemy import (
+    create_engine, event, DDL, Column, Integer, String, DateTime, Boolean, Text, Index, ForeignKey,
+    UniqueConstraint,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from querystats import QUERY_STATS_ENABLED, instrument
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./healthcare.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+# SQLite tuning: WAL lets readers run during writes; NORMAL sync is durable in WAL
+# mode except for the last transactions before a power loss
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() != "false"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+if SQLITE_SYNCHRONOUS not in SYNCHRONOUS_MODES:
+    raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_MODES)}")
+
+# Connection pool: DB_POOL_SIZE kept open plus up to DB_MAX_OVERFLOW temporary ones
+# (not used for in-memory SQLite, which has one connection per thread)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **({} if ":memory:" in DATABASE_URL else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}),
+)
+
+# Per-request query counts, slow-query log and N+1 detection (querystats.py)
+if QUERY_STATS_ENABLED:
+    instrument(engine)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_WAL and ":memory:" not in DATABASE_URL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+class Tenant(Base):
+    """An organization; users, projects and search history are scoped to one"""
+    __tablename__ = "tenants"
+
+    id = Column(Integer, primary_key=True)
+    slug = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
@@ -27,8 +73,121 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+class AuditEvent(Base):
+    """Append-only audit trail (written in batches by ``audit.AuditLog``)"""
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    action = Column(String, nullable=False, index=True)
+    username = Column(String, index=True)
+    outcome = Column(String, nullable=False)
+    client = Column(String)
+    detail = Column(Text)
+
+# Rows can be added but never changed or removed (SQLite; other databases
+# should enforce this with grants)
+for _statement in ("UPDATE", "DELETE"):
+    event.listen(
+        AuditEvent.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER audit_events_no_{_statement.lower()} BEFORE {_statement} ON audit_events "
+            "BEGIN SELECT RAISE(ABORT, 'audit_events is append-only'); END"
+        ).execute_if(dialect="sqlite"),
+    )
+
+class Project(Base):
+    """A tenant's test project"""
+    __tablename__ = "projects"
+    __table_args__ = (UniqueConstraint("tenant_id", "name", name="uq_projects_tenant_id_name"),)
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text)
+    created_by = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class SearchHistory(Base):
+    """Disease searches per user (written in batches by ``search_history.SearchHistory``)"""
+    __tablename__ = "search_history"
+    __table_args__ = (
+        Index("ix_search_history_tenant_id_username_created_at", "tenant_id", "username", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # 0 is the public tenant (tenancy.PUBLIC_TENANT_ID), so no foreign key
+    tenant_id = Column(Integer, nullable=False, default=0)
+    username = Column(String, nullable=False)
+    query = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class QueryCount(Base):
+    """How often each normalized disease query has been searched within a tenant"""
+    __tablename__ = "query_counts"
+
+    tenant_id = Column(Integer, primary_key=True, autoincrement=False)
+    query = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_searched_at = Column(DateTime, nullable=False, index=True)
+
+class RefreshToken(Base):
+    """Refresh tokens by SHA-256 hash; every rotation adds a row to the same session"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False, index=True)
+    session_id = Column(String(32), nullable=False, index=True)
+    username = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)
+    session_started_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    rotated_at = Column(DateTime)
+    revoked_at = Column(DateTime, index=True)
+
+# The latest migration in migrations/versions; the models above match its schema.
+# A database already stamped with it is left alone without importing alembic,
+# which would otherwise add a few hundred milliseconds to every startup.
+SCHEMA_REVISION = "0005"
+
+def _alembic(command_name: str):
+    """Run ``alembic <command_name> head`` in-process against the application engine"""
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file, so the migrations leave the application's logging alone
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations"))
+    getattr(command, command_name)(config, "head")
+
+
+def init_db():
+    """Create a new database, or migrate an existing one, to the current schema.
+
+    Called from the application startup hook instead of at import time so that
+    importing this module (workers, tests, scripts) never touches the database.
+    A new database is created from the models and stamped with the latest
+    migration. Existing databases are upgraded to it, including unversioned
+    ones from before migrations existed; the migrations skip tables those
+    already have.
+    """
+    from sqlalchemy import inspect, text
+
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" in tables:
+        with engine.connect() as connection:
+            revisions = {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+        if revisions == {SCHEMA_REVISION}:
+            return
+    if not tables - {"alembic_version"}:
+        Base.metadata.create_all(bind=engine)
+        _alembic("stamp")
+    elif "alembic_version" not in tables and set(Base.metadata.tables) <= tables:
+        # Created by create_all with the current models but never stamped
+        _alembic("stamp")
+    else:
+        _alembic("upgrade")
 
 # Dependency to get DB session
 def get_db():
@@ -36,4 +195,7 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+if __name__ == "__main__":
+    init_db()
@@ -0,0 +1,250 @@
+"""
+Near-duplicate test case removal with MinHash and LSH.
+
+Each case's title, description and steps are lower-cased into words and cut
+into ``DEDUP_SHINGLE_WORDS``-word shingles. Words and shingles are hashed
+with NumPy over the joined bytes of a whole batch of cases, and a MinHash signature of ``DEDUP_NUM_PERM``
+values per case estimates the Jaccard similarity of any two cases' shingle
+sets.
+
+Candidates are found with LSH banding instead of comparing every pair:
+signatures are cut into ``DEDUP_BANDS`` bands, and cases whose band values
+are all equal share a bucket. Buckets are numbered with ``np.unique`` over
+the band keys, and each case is checked against the earlier kept cases in
+its buckets; a case whose estimated similarity to one of them reaches
+``DEDUP_THRESHOLD`` is a duplicate of it. Most duplicates are settled by a
+vectorized comparison with the earliest case of their buckets, and only kept
+cases sharing enough buckets to reach the threshold are compared one by one:
+500k cases take about half a minute (``benchmarks/dedup.py``).
+
+``dedupe_cases`` keeps the first of each group of near-duplicates, in the
+original order. ``StreamDeduplicator`` does the same one case at a time, for
+streamed suites.
+"""
+
+import os
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity at or above which two cases are duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+# Bands x rows = DEDUP_NUM_PERM; pairs above about (1 / bands) ** (1 / rows) similarity become candidates
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "2"))
+# Cases hashed per batch; bounds the (shingles x permutations) working array
+DEDUP_BATCH_SIZE = int(os.getenv("DEDUP_BATCH_SIZE", "512"))
+
+# Bytes that form words: ASCII letters and digits (upper case is folded first) and all non-ASCII bytes
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[list(b"abcdefghijklmnopqrstuvwxyz0123456789")] = True
+_WORD_BYTES[128:] = True
+# Longer words are hashed on their first bytes and their length
+_MAX_WORD_BYTES = 24
+# Odd multiplier for polynomial hashing of words and shingles
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_SEED = 1
+
+C = TypeVar("C")
+
+
+def case_text(test_case) -> str:
+    """Title, description and steps of a TestCase or CompactTestCase"""
+    return " ".join([test_case.title, test_case.description, *(test_case.test_steps or ())])
+
+
+class MinHasher:
+    """MinHash signatures of word-shingled texts"""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle_words: int = DEDUP_SHINGLE_WORDS,
+                 batch_size: int = DEDUP_BATCH_SIZE, seed: int = _SEED):
+        self.num_perm = num_perm
+        self.shingle_words = max(1, shingle_words)
+        self.batch_size = batch_size
+        rng = np.random.default_rng(seed)
+        # Shingle hashes are already uniform, so x -> a * x + b (mod 2 ** 32) with odd a,
+        # a bijection, serves as each random permutation
+        self._a = (rng.integers(0, 2 ** 32, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)).astype(np.uint32)
+        self._b = rng.integers(0, 2 ** 32, size=(num_perm, 1), dtype=np.uint64).astype(np.uint32)
+
+    def words(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Hash of every word of every text, concatenated, and the word count of each text"""
+        encoded = [text.encode("utf-8") for text in texts]
+        data = np.frombuffer(b" ".join(encoded).lower(), dtype=np.uint8)
+        is_word = _WORD_BYTES[data]
+        edges = np.flatnonzero(np.diff(is_word.astype(np.int8), prepend=0, append=0))
+        starts, ends = edges[0::2], edges[1::2]
+        lengths = ends - starts
+
+        hashes = lengths.astype(np.uint64)
+        padded = np.concatenate([data, np.zeros(_MAX_WORD_BYTES, dtype=np.uint8)])
+        for k in range(min(_MAX_WORD_BYTES, int(lengths.max(initial=0)))):
+            inside = k < lengths
+            hashes = np.where(inside, hashes * _MULTIPLIER + padded[starts + k], hashes)
+
+        # Texts are joined with one separator byte each
+        text_ends = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)) + 1)
+        counts = np.bincount(np.searchsorted(text_ends, starts, side="right"), minlength=len(texts))
+        return hashes, counts
+
+    def shingles(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """32-bit hash of every shingle, concatenated, and the offset of each text's first one"""
+        words, counts = self.words(texts)
+        # An empty text gets one (empty) word so every text has a shingle
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            words = np.insert(words, np.cumsum(counts)[empty] - counts[empty], np.uint64(0))
+            counts[empty] = 1
+        starts = np.cumsum(counts) - counts
+        owner = np.repeat(np.arange(len(texts)), counts)
+        ends = (starts + counts)[owner]
+        positions = np.arange(len(words))
+
+        k = self.shingle_words
+        padded = np.concatenate([words, np.zeros(k, dtype=np.uint64)])
+        hashes = np.zeros(len(words), dtype=np.uint64)
+        for j in range(k):
+            hashes = hashes * _MULTIPLIER + np.where(positions + j < ends, padded[positions + j], 0)
+        # Full shingles, plus one shorter shingle for texts with fewer than k words
+        valid = (positions + k <= ends) | ((positions == starts[owner]) & (counts[owner] < k))
+        hashes = hashes[valid]
+        offsets = np.searchsorted(owner[valid], np.arange(len(texts)))
+        return (hashes ^ (hashes >> np.uint64(32))).astype(np.uint32), offsets
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 MinHash signatures"""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), self.batch_size):
+            shingles, offsets = self.shingles(texts[start:start + self.batch_size])
+            # One row per permutation, so each text's minimum is a contiguous reduction
+            permuted = self._a * shingles
+            permuted += self._b
+            result[start:start + len(offsets)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return result
+
+
+def band_keys(signatures: np.ndarray, bands: int = DEDUP_BANDS) -> np.ndarray:
+    """(bands, cases) uint64 key per band; equal keys share an LSH bucket"""
+    count, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"{num_perm} permutations cannot be split into {bands} bands")
+    rows = signatures.reshape(count, bands, num_perm // bands).astype(np.uint64)
+    keys = np.zeros((count, bands), dtype=np.uint64)
+    for row in range(rows.shape[2]):
+        keys = keys * _MULTIPLIER + rows[:, :, row]
+    return keys.T
+
+
+def find_duplicates(signatures: np.ndarray, threshold: float = DEDUP_THRESHOLD,
+                    bands: int = DEDUP_BANDS) -> np.ndarray:
+    """Index of the earlier case each case duplicates, or -1 for cases to keep.
+
+    As in ``StreamDeduplicator.add``, each case is compared with every earlier
+    kept case it shares a bucket with. Cases alone in all their buckets are
+    kept without a comparison.
+    """
+    count = len(signatures)
+    duplicate_of = np.full(count, -1, dtype=np.int64)
+    if count < 2:
+        return duplicate_of
+    # (cases, bands) bucket ids, numbered so that different bands never share
+    # one. Fast path: a case similar to the earliest case of one of its
+    # buckets duplicates it whenever that case was kept.
+    buckets = np.empty((count, bands), dtype=np.int64)
+    shared = np.zeros(count, dtype=bool)
+    earliest = np.full(count, count, dtype=np.int64)
+    positions = np.arange(count)
+    offset = 0
+    for band, keys in enumerate(band_keys(signatures, bands)):
+        unique, first, inverse, sizes = np.unique(keys, return_index=True, return_inverse=True,
+                                                  return_counts=True)
+        in_shared = sizes[inverse] > 1
+        shared |= in_shared
+        # Buckets of one case are never looked up again
+        buckets[:, band] = np.where(in_shared, inverse + offset, -1)
+        offset += len(unique)
+        candidate = first[inverse]
+        later = np.flatnonzero(candidate < positions)
+        similar = (signatures[later] == signatures[candidate[later]]).mean(axis=1) >= threshold
+        earliest[later[similar]] = np.minimum(earliest[later[similar]], candidate[later[similar]])
+
+    # A case within the threshold differs from another in at most this many
+    # signature values, so it shares at least ``bands - differing`` buckets
+    differing = int(signatures.shape[1] * (1 - threshold) + 1e-9)
+    min_shared = max(1, bands - differing)
+
+    kept_case = np.zeros(count, dtype=bool)
+    kept: Dict[int, array] = {}
+    for index in np.flatnonzero(shared).tolist():
+        first = int(earliest[index])
+        if first < count and kept_case[first]:
+            duplicate_of[index] = first
+            continue
+        case_buckets = [bucket for bucket in buckets[index].tolist() if bucket >= 0]
+        seen = [np.frombuffer(kept[bucket], dtype=np.int64) for bucket in case_buckets if bucket in kept]
+        if seen:
+            seen, shared_buckets = np.unique(np.concatenate(seen), return_counts=True)
+            seen = seen[shared_buckets >= min_shared]
+            similar = np.flatnonzero((signatures[seen] == signatures[index]).mean(axis=1) >= threshold)
+            if len(similar):
+                duplicate_of[index] = seen[similar[0]]
+                continue
+        kept_case[index] = True
+        for bucket in case_buckets:
+            kept.setdefault(bucket, array("q")).append(index)
+    return duplicate_of
+
+
+def dedupe_cases(test_cases: Sequence[C], threshold: Optional[float] = None,
+                 minhasher: Optional[MinHasher] = None) -> Tuple[List[C], int]:
+    """The cases with near-duplicates of earlier cases removed, and how many were removed.
+
+    ``threshold`` defaults to ``DEDUP_THRESHOLD``.
+    """
+    if len(test_cases) < 2:
+        return list(test_cases), 0
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    minhasher = minhasher if minhasher is not None else MinHasher()
+    signatures = minhasher.signatures([case_text(test_case) for test_case in test_cases])
+    keep = find_duplicates(signatures, threshold) < 0
+    kept = [test_case for test_case, kept in zip(test_cases, keep.tolist()) if kept]
+    return kept, len(test_cases) - len(kept)
+
+
+class StreamDeduplicator:
+    """Drops streamed cases that near-duplicate a case already let through"""
+
+    def __init__(self, threshold: Optional[float] = None, bands: int = DEDUP_BANDS,
+                 minhasher: Optional[MinHasher] = None):
+        self.threshold = DEDUP_THRESHOLD if threshold is None else threshold
+        self.bands = bands
+        self.minhasher = minhasher if minhasher is not None else MinHasher()
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self.removed = 0
+
+    def add(self, test_case) -> bool:
+        """Whether ``test_case`` is new (and is now remembered)"""
+        signature = self.minhasher.signatures([case_text(test_case)])
+        keys = band_keys(signature, self.bands)[:, 0].tolist()
+        for bucket, key in zip(self._buckets, keys):
+            for seen in bucket.get(key, ()):
+                if (self._signatures[seen] == signature[0]).mean() >= self.threshold:
+                    self.removed += 1
+                    return False
+        index = len(self._signatures)
+        self._signatures.append(signature[0])
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(index)
+        return True
+
+    def filter(self, test_cases: Iterable[C]) -> Iterable[C]:
+        return (test_case for test_case in test_cases if self.add(test_case))
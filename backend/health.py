@@ -0,0 +1,110 @@
+"""
+Liveness and readiness probes.
+
+``/livez`` only proves the event loop is serving requests and does no work.
+``/readyz`` checks the dependencies a request actually needs (database
+connectivity, LLM gateway, connection-pool headroom). Load balancers poll
+these several times per second per worker, so readiness results are cached
+for ``READINESS_CACHE_SECONDS`` and concurrent probes share a single check.
+"""
+
+import asyncio
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "2"))
+POOL_SATURATION_THRESHOLD = float(os.getenv("POOL_SATURATION_THRESHOLD", "0.9"))
+
+
+def check_database() -> Dict:
+    """Open a pooled connection and run a trivial query"""
+    from sqlalchemy import text
+    from database import engine
+
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {"ok": True}
+    except Exception as e:
+        # The probe is public; driver errors can name hosts and users
+        logger.error(f"Database readiness check failed: {str(e)}")
+        return {"ok": False, "error": "unavailable"}
+
+
+def check_pool() -> Dict:
+    """Report how many pooled connections are checked out"""
+    from sqlalchemy.pool import QueuePool
+    from database import DB_MAX_OVERFLOW, engine
+
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"ok": True, "pool": type(pool).__name__}
+
+    # A negative max_overflow means unbounded; saturation is then relative to the pool size
+    capacity = pool.size() + max(DB_MAX_OVERFLOW, 0)
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity else 0.0
+    return {
+        "ok": saturation < POOL_SATURATION_THRESHOLD,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(saturation, 3),
+    }
+
+
+def check_llm() -> Dict:
+    """Report LLM gateway status without calling the upstream API"""
+    import llm
+
+    return llm.status()
+
+
+class ReadinessProbe:
+    """Runs the readiness checks at most once per ``ttl`` seconds"""
+
+    def __init__(self, ttl: float = READINESS_CACHE_SECONDS):
+        self.ttl = ttl
+        self._result: Optional[Dict] = None
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def check(self) -> Dict:
+        """Return the cached readiness result, refreshing it if stale"""
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return self._result
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another probe may have refreshed the result while we waited
+            if self._result is not None and time.monotonic() < self._expires_at:
+                return self._result
+
+            checks = {
+                "database": await run_in_threadpool(check_database),
+                "pool": check_pool(),
+                "llm": check_llm(),
+            }
+            ready = all(result["ok"] for result in checks.values())
+            if not ready:
+                failed = [name for name, result in checks.items() if not result["ok"]]
+                logger.warning(f"Readiness check failed: {', '.join(failed)}")
+
+            self._result = {
+                "status": "ready" if ready else "not_ready",
+                "checks": checks,
+                "checked_at": datetime.now().isoformat(),
+            }
+            self._expires_at = time.monotonic() + self.ttl
+            return self._result
+
+    def invalidate(self):
+        """Force the next probe to re-run the checks"""
+        self._expires_at = 0.0
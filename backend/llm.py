@@ -0,0 +1,339 @@
+"""
+LLM gateway.
+
+``LLM_BACKEND`` selects the backend: ``gemini`` (default) or ``fake``, a
+deterministic local backend for tests, benchmarks and offline development.
+
+``google.generativeai`` drags in grpc and protobuf and takes a noticeable
+fraction of a second to import, so it is only imported the first time a model
+is actually needed. Workers that run without ``GEMINI_API_KEY`` never load it.
+
+Backends that accept several prompts per upstream call (``supports_batching``)
+are fed through a ``batching.MicroBatcher`` created by ``build_batcher()``;
+``LLM_BATCH_MAX_SIZE`` and ``LLM_BATCH_MAX_WAIT_MS`` set the batch window.
+
+Calls made with a guard (``build_guard()``, a ``resilience.ResilientCaller``)
+are hedged after the recent p95 latency, bounded by ``LLM_TIMEOUT_S`` and
+short-circuited by a circuit breaker. Streams get ``LLM_TIMEOUT_S`` between
+chunks and ``LLM_STREAM_TIMEOUT_S`` in total; callers catch
+``resilience.UpstreamUnavailable`` and answer from a fallback.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import logging
+from typing import AsyncIterator, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from starlette.requests import Request
+
+from batching import MicroBatcher
+from resilience import CircuitBreaker, ResilientCaller
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-pro")
+
+LLM_BATCHING_ENABLED = os.getenv("LLM_BATCHING_ENABLED", "true").lower() != "false"
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+LLM_BATCH_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "10"))
+LLM_BATCH_MAX_CONCURRENCY = int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", "4"))
+
+# Resilience: deadline, hedging and circuit breaker (LLM_RESILIENCE_ENABLED=false calls directly)
+LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() != "false"
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "20"))
+LLM_STREAM_TIMEOUT_S = float(os.getenv("LLM_STREAM_TIMEOUT_S", "300"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() != "false"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "2000"))
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+LLM_SLOW_CALL_MS = float(os.getenv("LLM_SLOW_CALL_MS", "10000"))
+LLM_BREAKER_FAILURE_RATIO = float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_OPEN_S = float(os.getenv("LLM_BREAKER_OPEN_S", "30"))
+
+_model = None
+_backend = None
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+class GeminiBackend:
+    """Google Gemini; one prompt per upstream call"""
+
+    name = "gemini"
+    supports_batching = False
+
+    def generate(self, prompt: str) -> str:
+        response = get_model().generate_content(prompt)
+        return response.text
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        return [self.generate(prompt) for prompt in prompts]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in get_model().generate_content(prompt, stream=True):
+            yield chunk.text
+
+
+def fake_response(prompt: str, cases: int = 5) -> str:
+    """Echo the prompt, or a fenced JSON array (with LLM-style trailing commas) for test-case prompts"""
+    if "JSON array of test case" not in prompt:
+        return f"[fake response] {prompt}"
+    items = [
+        {
+            "title": f"Fake test case {i + 1}",
+            "description": "Generated by the fake LLM backend.",
+            "steps": [f"Step {step + 1}" for step in range(3)],
+            "priority": "Medium",
+            "compliance": ["HIPAA"],
+        }
+        for i in range(cases)
+    ]
+    body = ",\n".join(json.dumps(item) for item in items)
+    return f"```json\n[\n{body},\n]\n```"
+
+
+class FakeBackend:
+    """Local stand-in that answers every batch in one simulated upstream call.
+
+    ``error_rate`` and ``stall_rate`` inject faults: that fraction of upstream
+    calls raises ``RuntimeError`` or takes an extra ``stall_ms``.
+    """
+
+    name = "fake"
+    supports_batching = True
+
+    def __init__(self, latency_ms: float = 50.0, per_item_ms: float = 0.0, responder=fake_response,
+                 chunk_size: int = 64, chunk_ms: float = 0.0, error_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall_ms: float = 30000.0, seed: Optional[int] = None):
+        self.latency = latency_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self.responder = responder
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_ms / 1000.0
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall_ms / 1000.0
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.prompts = 0
+        self.errors = 0
+        self.stalls = 0
+
+    def _upstream_call(self, delay: float):
+        """Count one upstream call and sleep for it, injecting faults"""
+        self.calls += 1
+        fault = self._random.random()
+        if fault < self.stall_rate:
+            self.stalls += 1
+            delay += self.stall
+        time.sleep(delay)
+        if self.stall_rate <= fault < self.stall_rate + self.error_rate:
+            self.errors += 1
+            raise RuntimeError("injected fake backend error")
+
+    def generate(self, prompt: str) -> str:
+        return self.generate_batch([prompt])[0]
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        self.prompts += len(prompts)
+        self._upstream_call(self.latency + self.per_item * len(prompts))
+        return [self.responder(prompt) for prompt in prompts]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the response in ``chunk_size`` pieces, ``chunk_ms`` apart"""
+        self.prompts += 1
+        self._upstream_call(self.latency)
+        text = self.responder(prompt)
+        for start in range(0, len(text), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay)
+            yield text[start:start + self.chunk_size]
+
+
+def get_backend():
+    """Return the configured backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        if LLM_BACKEND == "fake":
+            _backend = FakeBackend(
+                latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "50")),
+                error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+                stall_rate=float(os.getenv("LLM_FAKE_STALL_RATE", "0")),
+                stall_ms=float(os.getenv("LLM_FAKE_STALL_MS", "30000")),
+            )
+        elif LLM_BACKEND == "gemini":
+            _backend = GeminiBackend()
+        else:
+            raise RuntimeError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Replace the backend (tests and benchmarks)"""
+    global _backend
+    _backend = backend
+
+
+def is_configured() -> bool:
+    """Return True when an LLM backend can answer prompts"""
+    if _backend is not None and _backend.name != "gemini":
+        return True
+    if LLM_BACKEND == "fake":
+        return True
+    api_key = os.getenv("GEMINI_API_KEY")
+    return bool(api_key) and api_key != "your_gemini_api_key_here"
+
+
+def get_model():
+    """Return the shared Gemini model, importing and configuring the SDK on first use"""
+    global _model
+    if _model is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key or api_key == "your_gemini_api_key_here":
+            raise RuntimeError("GEMINI_API_KEY not configured. Please set your API key in the .env file.")
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        logger.info(f"Gemini model {GEMINI_MODEL_NAME} initialised")
+    return _model
+
+# ============================================================================
+# Calls
+# ============================================================================
+
+def generate_content(prompt: str) -> str:
+    """Send a single prompt to the backend and return the response text"""
+    return get_backend().generate(prompt)
+
+
+async def generate_batch(prompts: List[str]) -> List[str]:
+    """Answer several prompts: one upstream call if the backend batches, else concurrently"""
+    loop = asyncio.get_running_loop()
+    backend = get_backend()
+    if backend.supports_batching:
+        return await loop.run_in_executor(None, backend.generate_batch, prompts)
+    return list(await asyncio.gather(
+        *(loop.run_in_executor(None, generate_content, prompt) for prompt in prompts)
+    ))
+
+
+async def agenerate(prompt: str, batcher: Optional[MicroBatcher] = None,
+                    guard: Optional[ResilientCaller] = None) -> str:
+    """Answer one prompt, through ``batcher`` when there is one and guarded by ``guard``"""
+    loop = asyncio.get_running_loop()
+    if guard is None:
+        if batcher is not None:
+            return await batcher.submit(prompt)
+        return await loop.run_in_executor(None, generate_content, prompt)
+
+    attempts = 0
+
+    def attempt():
+        # The hedge skips the batcher so it is not queued behind the stalled batch
+        nonlocal attempts
+        attempts += 1
+        if batcher is not None and attempts == 1:
+            return batcher.submit(prompt)
+        return loop.run_in_executor(None, generate_content, prompt)
+
+    return await guard.call(attempt)
+
+
+async def astream(prompt: str) -> AsyncIterator[str]:
+    """Yield the response text chunk by chunk as the backend produces it.
+
+    Each chunk is fetched from a worker thread only when the consumer asks for
+    it, so a slow reader holds back the upstream read instead of buffering.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = get_backend().stream(prompt)
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        try:
+            await loop.run_in_executor(None, chunks.close)
+        except ValueError:
+            # Abandoned mid-read (deadline): the worker thread still holds the generator
+            pass
+
+
+def build_batcher() -> Optional[MicroBatcher]:
+    """A micro-batcher for the backend, or None if it cannot batch (or batching is off)"""
+    if not LLM_BATCHING_ENABLED or not is_configured() or not get_backend().supports_batching:
+        return None
+    return MicroBatcher(
+        generate_batch,
+        max_batch_size=LLM_BATCH_MAX_SIZE,
+        max_wait_ms=LLM_BATCH_MAX_WAIT_MS,
+        max_concurrent_batches=LLM_BATCH_MAX_CONCURRENCY,
+    )
+
+
+async def get_batcher(request: Request) -> Optional[MicroBatcher]:
+    """Route dependency: the app's batcher (created by the lifespan), or None"""
+    return getattr(request.app.state, "llm_batcher", None)
+
+
+def build_guard() -> Optional[ResilientCaller]:
+    """Hedging, deadline and circuit breaker for LLM calls, or None when disabled"""
+    if not LLM_RESILIENCE_ENABLED:
+        return None
+    return ResilientCaller(
+        CircuitBreaker(
+            failure_ratio=LLM_BREAKER_FAILURE_RATIO,
+            window=LLM_BREAKER_WINDOW,
+            min_calls=LLM_BREAKER_MIN_CALLS,
+            open_s=LLM_BREAKER_OPEN_S,
+        ),
+        timeout_s=LLM_TIMEOUT_S,
+        hedge=LLM_HEDGE_ENABLED,
+        hedge_quantile=LLM_HEDGE_QUANTILE,
+        hedge_delay_ms=LLM_HEDGE_DELAY_MS,
+        hedge_ratio=LLM_HEDGE_MAX_RATIO,
+        slow_call_ms=LLM_SLOW_CALL_MS,
+        stream_timeout_s=LLM_STREAM_TIMEOUT_S,
+    )
+
+
+async def get_guard(request: Request) -> Optional[ResilientCaller]:
+    """Route dependency: the app's LLM guard (created by the lifespan), or None"""
+    return getattr(request.app.state, "llm_guard", None)
+
+# ============================================================================
+# Status
+# ============================================================================
+
+def loaded_model() -> Optional[object]:
+    """Return the model if it has already been initialised, without importing the SDK"""
+    return _model
+
+
+def status() -> dict:
+    """Gateway status for readiness probes.
+
+    Running without an API key is a supported mode (static answers are served),
+    so it does not make the service unready.
+    """
+    return {
+        "ok": True,
+        "configured": is_configured(),
+        "backend": _backend.name if _backend is not None else LLM_BACKEND,
+        "model": GEMINI_MODEL_NAME,
+        "loaded": _model is not None,
+    }
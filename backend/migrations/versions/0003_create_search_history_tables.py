@@ -0,0 +1,44 @@
+"""create search_history and query_counts tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unversioned databases created by an older database.init_db already have it
+    if sa.inspect(op.get_bind()).has_table("search_history"):
+        return
+    op.create_table(
+        "search_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_search_history_username_created_at", "search_history", ["username", "created_at"])
+    op.create_table(
+        "query_counts",
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("last_searched_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("query"),
+    )
+    op.create_index("ix_query_counts_last_searched_at", "query_counts", ["last_searched_at"])
+
+
+def downgrade():
+    op.drop_index("ix_query_counts_last_searched_at", table_name="query_counts")
+    op.drop_table("query_counts")
+    op.drop_index("ix_search_history_username_created_at", table_name="search_history")
+    op.drop_table("search_history")
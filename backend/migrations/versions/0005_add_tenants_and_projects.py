@@ -0,0 +1,142 @@
+"""add tenants and projects, scope users and search history by tenant
+
+Existing users are moved into a "default" tenant. Search history and query
+counts recorded so far belong to the public tenant (id 0).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _columns(table):
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # Each step is skipped when the database already has it: older releases
+    # created some of these tables from the models at startup
+    if not _has_table("tenants"):
+        op.create_table(
+            "tenants",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("slug", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "ix_tenants_slug" not in _indexes("tenants"):
+        op.create_index("ix_tenants_slug", "tenants", ["slug"], unique=True)
+
+    if not _has_table("projects"):
+        op.create_table(
+            "projects",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("tenant_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("created_by", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("tenant_id", "name", name="uq_projects_tenant_id_name"),
+        )
+    project_indexes = _indexes("projects")
+    if "ix_projects_tenant_id" not in project_indexes:
+        op.create_index("ix_projects_tenant_id", "projects", ["tenant_id"])
+    if "ix_projects_created_at" not in project_indexes:
+        op.create_index("ix_projects_created_at", "projects", ["created_at"])
+
+    if "tenant_id" not in _columns("users"):
+        with op.batch_alter_table("users") as batch:
+            batch.add_column(sa.Column("tenant_id", sa.Integer(), nullable=True))
+            batch.create_foreign_key("fk_users_tenant_id_tenants", "tenants", ["tenant_id"], ["id"])
+            batch.create_index("ix_users_tenant_id", ["tenant_id"])
+        bind = op.get_bind()
+        if bind.execute(sa.text("SELECT COUNT(*) FROM users")).scalar():
+            if not bind.execute(sa.text("SELECT COUNT(*) FROM tenants WHERE slug = 'default'")).scalar():
+                bind.execute(sa.text(
+                    "INSERT INTO tenants (slug, name, created_at) VALUES ('default', 'Default', CURRENT_TIMESTAMP)"
+                ))
+            bind.execute(sa.text("UPDATE users SET tenant_id = (SELECT id FROM tenants WHERE slug = 'default')"))
+
+    if "tenant_id" not in _columns("search_history"):
+        if "ix_search_history_username_created_at" in _indexes("search_history"):
+            op.drop_index("ix_search_history_username_created_at", table_name="search_history")
+        op.add_column("search_history", sa.Column("tenant_id", sa.Integer(), nullable=False, server_default="0"))
+    if "ix_search_history_tenant_id_username_created_at" not in _indexes("search_history"):
+        op.create_index(
+            "ix_search_history_tenant_id_username_created_at", "search_history",
+            ["tenant_id", "username", "created_at"],
+        )
+
+    # The primary key becomes (tenant_id, query): rebuild the table
+    if "tenant_id" not in _columns("query_counts"):
+        if "ix_query_counts_last_searched_at" in _indexes("query_counts"):
+            op.drop_index("ix_query_counts_last_searched_at", table_name="query_counts")
+        op.rename_table("query_counts", "query_counts_old")
+        op.create_table(
+            "query_counts",
+            sa.Column("tenant_id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("query", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("last_searched_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("tenant_id", "query"),
+        )
+        op.execute(
+            "INSERT INTO query_counts (tenant_id, query, count, last_searched_at) "
+            "SELECT 0, query, count, last_searched_at FROM query_counts_old"
+        )
+        op.drop_table("query_counts_old")
+    if "ix_query_counts_last_searched_at" not in _indexes("query_counts"):
+        op.create_index("ix_query_counts_last_searched_at", "query_counts", ["last_searched_at"])
+
+
+def downgrade():
+    op.drop_index("ix_query_counts_last_searched_at", table_name="query_counts")
+    op.rename_table("query_counts", "query_counts_new")
+    op.create_table(
+        "query_counts",
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("last_searched_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("query"),
+    )
+    op.create_index("ix_query_counts_last_searched_at", "query_counts", ["last_searched_at"])
+    op.execute(
+        "INSERT INTO query_counts (query, count, last_searched_at) "
+        "SELECT query, SUM(count), MAX(last_searched_at) FROM query_counts_new GROUP BY query"
+    )
+    op.drop_table("query_counts_new")
+
+    op.drop_index("ix_search_history_tenant_id_username_created_at", table_name="search_history")
+    with op.batch_alter_table("search_history") as batch:
+        batch.drop_column("tenant_id")
+    op.create_index("ix_search_history_username_created_at", "search_history", ["username", "created_at"])
+
+    with op.batch_alter_table("users") as batch:
+        batch.drop_index("ix_users_tenant_id")
+        batch.drop_constraint("fk_users_tenant_id_tenants", type_="foreignkey")
+        batch.drop_column("tenant_id")
+
+    op.drop_index("ix_projects_created_at", table_name="projects")
+    op.drop_index("ix_projects_tenant_id", table_name="projects")
+    op.drop_table("projects")
+    op.drop_index("ix_tenants_slug", table_name="tenants")
+    op.drop_table("tenants")
@@ -1,15 +1,7 @@
-﻿from fastapi import FastAPI, Form
+﻿"""
+Minimal deployment: health and readiness endpoints only.
+"""
 
-app = FastAPI()
+from app import create_app
 
-@app.get('/')
-def read_root():
-    return {'message': 'Hello World'}
-
-@app.get('/health')
-def health_check():
-    return {'status': 'healthy'}
-
-@app.post('/auth/signup')
-def signup(email: str = Form(...), username: str = Form(...), password: str = Form(...)):
-    return {'message': 'Signup successful', 'email': email, 'username': username}
+app = create_app(routers=["health"])
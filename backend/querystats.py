@@ -0,0 +1,234 @@
+"""
+Per-request database query statistics.
+
+``instrument(engine)`` hooks the engine's cursor events. Every statement is
+attributed to the request that issued it through a context variable set by
+``QueryStatsMiddleware``; context variables follow the request into the
+threadpool, so sync handlers are covered too. Statements run outside a
+request (background writers, migrations) are not attributed.
+
+Per request the middleware records the number of statements and their total
+time, and flags a statement run ``QUERY_N_PLUS_ONE_THRESHOLD`` times or more
+as a probable N+1 (a lookup issued once per item instead of one batched
+query). Totals appear in ``/metrics`` under ``query_stats``; with
+``QUERY_DEBUG_HEADERS`` they are also sent as ``X-DB-*`` and
+``Server-Timing`` response headers.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged. Parameters can hold
+PHI, so the log shows only their types and sizes, and string literals in
+the SQL text are masked.
+"""
+
+import os
+import re
+import time
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() != "false"
+# Send per-request query counts and time as response headers (development only)
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Distinct statements tracked per request, and endpoints kept in the N+1 report
+MAX_STATEMENTS = 256
+MAX_REPORTED_ROUTES = 100
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_START_TIMES = "querystats_start_times"
+
+
+class RequestQueries:
+    """Statements issued while handling one request"""
+
+    __slots__ = ("count", "seconds", "slow", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slow = 0
+        self.statements: Counter = Counter()
+
+    def add(self, statement: str, seconds: float, slow: bool):
+        self.count += 1
+        self.seconds += seconds
+        self.slow += slow
+        if statement in self.statements or len(self.statements) < MAX_STATEMENTS:
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int = QUERY_N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Statements run at least ``threshold`` times (probable N+1)"""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+def redact_parameters(parameters) -> str:
+    """Types and sizes of bound parameters, never their values"""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {_describe(value)}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} rows of {redact_parameters(parameters[0])}"
+        return "(" + ", ".join(_describe(value) for value in parameters) + ")"
+    return _describe(parameters)
+
+
+def _describe(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_statement(statement: str) -> str:
+    """SQL text with string literals masked and whitespace collapsed"""
+    return " ".join(_STRING_LITERAL.sub("'?'", statement).split())
+
+# ============================================================================
+# Engine hooks
+# ============================================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_TIMES, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_START_TIMES].pop()
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    if slow:
+        logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {redact_statement(statement)} "
+                       f"params={redact_parameters(parameters)}")
+    queries = _current.get()
+    if queries is not None:
+        queries.add(statement, elapsed, slow)
+
+
+def _handle_error(exception_context):
+    # The failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_TIMES):
+        connection.info[_START_TIMES].pop()
+
+
+def instrument(engine):
+    """Attach the query hooks to ``engine`` (once)"""
+    from sqlalchemy import event
+
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    return engine
+
+# ============================================================================
+# Request attribution
+# ============================================================================
+
+class QueryStats:
+    """Query totals across requests, for /metrics"""
+
+    def __init__(self, threshold: int = QUERY_N_PLUS_ONE_THRESHOLD):
+        self.threshold = threshold
+        self.requests = 0
+        self.requests_with_queries = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.max_queries = 0
+        self.slow_queries = 0
+        self.n_plus_one_requests = 0
+        self.n_plus_one_routes: Counter = Counter()
+
+    def observe(self, route: str, queries: RequestQueries) -> Dict[str, int]:
+        """Add one finished request; returns its repeated statements"""
+        self.requests += 1
+        if not queries.count:
+            return {}
+        self.requests_with_queries += 1
+        self.queries += queries.count
+        self.seconds += queries.seconds
+        self.max_queries = max(self.max_queries, queries.count)
+        self.slow_queries += queries.slow
+        repeated = queries.repeated(self.threshold)
+        if repeated:
+            self.n_plus_one_requests += 1
+            if route in self.n_plus_one_routes or len(self.n_plus_one_routes) < MAX_REPORTED_ROUTES:
+                self.n_plus_one_routes[route] += 1
+        return repeated
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "requests_with_queries": self.requests_with_queries,
+            "queries": self.queries,
+            "query_time_ms": round(self.seconds * 1000, 1),
+            "avg_queries_per_request": round(self.queries / self.requests_with_queries, 2)
+            if self.requests_with_queries else 0.0,
+            "max_queries_per_request": self.max_queries,
+            "slow_queries": self.slow_queries,
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "n_plus_one_routes": dict(self.n_plus_one_routes.most_common(10)),
+        }
+
+
+def debug_headers(queries: RequestQueries, repeated: Dict[str, int]) -> List[tuple]:
+    duration = queries.seconds * 1000
+    headers = [(b"x-db-query-count", str(queries.count).encode()),
+               (b"x-db-query-time-ms", f"{duration:.1f}".encode()),
+               (b"server-timing", f'db;dur={duration:.1f};desc="{queries.count} queries"'.encode())]
+    if repeated:
+        headers.append((b"x-db-n-plus-one", str(max(repeated.values())).encode()))
+    return headers
+
+
+class QueryStatsMiddleware:
+    """Attributes queries to the current HTTP request and reports them when it ends"""
+
+    def __init__(self, app, headers: bool = QUERY_DEBUG_HEADERS):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats: Optional[QueryStats] = getattr(scope["app"].state, "query_stats", None)
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and queries.count:
+                repeated = queries.repeated(stats.threshold if stats is not None else QUERY_N_PLUS_ONE_THRESHOLD)
+                message["headers"] = list(message.get("headers", [])) + debug_headers(queries, repeated)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.headers else send)
+        finally:
+            _current.reset(token)
+            if stats is not None:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                repeated = stats.observe(f"{scope['method']} {route}", queries)
+                for statement, count in repeated.items():
+                    logger.warning(f"Probable N+1 in {scope['method']} {route}: statement ran {count} times: "
+                                   f"{redact_statement(statement)}")
+
+
+def build_query_stats() -> Optional[QueryStats]:
+    """The app's query totals, or None when QUERY_STATS_ENABLED is off"""
+    return QueryStats() if QUERY_STATS_ENABLED else None
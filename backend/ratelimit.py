@@ -0,0 +1,346 @@
+"""
+Admission control for expensive endpoints.
+
+Each protected route gets a ``RateLimiter`` dependency combining two checks:
+
+* a per-client token bucket (keyed by the verified user of the bearer token,
+  or the client IP for anonymous and invalid tokens) that answers 429 with
+  ``Retry-After`` once the client has used its burst, and
+* a per-worker concurrency cap that sheds load with a fast 503 instead of
+  queueing requests behind a saturated backend.
+
+Buckets live in compact ``array('d')`` slots in process memory by default. Set
+``RATE_LIMIT_BACKEND=sqlite`` to keep them in a local SQLite file instead so
+all uvicorn workers on the host share the same counters; those buckets are
+updated in the threadpool, and buckets idle long enough to be full again
+are deleted every ``RATE_LIMIT_PURGE_INTERVAL_S`` by ``BucketPurger``.
+"""
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+import logging
+from array import array
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from tenancy import request_claims
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "./ratelimit.db")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "65536"))
+RATE_LIMIT_PURGE_INTERVAL_S = float(os.getenv("RATE_LIMIT_PURGE_INTERVAL_S", "300"))
+
+
+class TokenBucketStore:
+    """In-process token buckets stored in two parallel float arrays.
+
+    A key maps to a slot index; ``tokens[slot]`` and ``updated[slot]`` hold the
+    bucket level and the time it was last refilled. When every slot is taken,
+    a clock hand looks for an idle (fully refilled) bucket to reuse. If it
+    finds none, new keys share the overflow bucket in slot 0 until one turns
+    idle, so clients rotating through keys cannot reset buckets still in use.
+    """
+
+    # acquire() only touches memory, so it runs on the event loop
+    blocking = False
+
+    OVERFLOW_SLOT = 0
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._slots: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = [None]
+        self._tokens = array("d", [burst])
+        self._updated = array("d", [0.0])
+        self._hand = 1
+        self._lock = threading.Lock()
+
+    def _slot_for(self, key: str, now: float) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+
+        if len(self._keys) <= self.max_keys:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._tokens.append(self.burst)
+            self._updated.append(now)
+        else:
+            slot = self._evict(now)
+            if slot is None:
+                return self.OVERFLOW_SLOT
+            del self._slots[self._keys[slot]]
+            self._keys[slot] = key
+            self._tokens[slot] = self.burst
+            self._updated[slot] = now
+        self._slots[key] = slot
+        return slot
+
+    def _evict(self, now: float) -> Optional[int]:
+        """A fully refilled slot to reuse, or None if the probed slots are all in use"""
+        refill_time = self.burst / self.rate if self.rate else float("inf")
+        for _ in range(min(self.max_keys, 64)):
+            slot = self._hand
+            self._hand = self._hand % self.max_keys + 1
+            if now - self._updated[slot] >= refill_time:
+                return slot
+        return None
+
+    def acquire(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """Take ``cost`` tokens for ``key``.
+
+        Returns 0.0 when the request is admitted, otherwise the number of
+        seconds until enough tokens will be available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            slot = self._slot_for(key, now)
+            tokens = min(self.burst, self._tokens[slot] + (now - self._updated[slot]) * self.rate)
+            self._updated[slot] = now
+            if tokens >= cost:
+                self._tokens[slot] = tokens - cost
+                return 0.0
+            self._tokens[slot] = tokens
+            return (cost - tokens) / self.rate if self.rate else float("inf")
+
+    def __len__(self):
+        return len(self._slots)
+
+
+class SQLiteTokenBucketStore:
+    """Token buckets in a local SQLite file shared by every worker on the host.
+
+    Each acquire is a single ``BEGIN IMMEDIATE`` read-modify-write, so updates
+    from concurrent workers are serialised by SQLite's write lock. If the lock
+    cannot be taken within ``busy_timeout`` the request is admitted rather
+    than failing because of the limiter itself.
+    """
+
+    # acquire() waits on SQLite (up to busy_timeout), so it runs in the threadpool
+    blocking = True
+
+    def __init__(self, name: str, rate: float, burst: float,
+                 path: str = RATE_LIMIT_SQLITE_PATH, busy_timeout: float = 0.05):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "name TEXT NOT NULL, key TEXT NOT NULL, tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "PRIMARY KEY (name, key)) WITHOUT ROWID"
+        )
+
+    def acquire(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """Same contract as ``TokenBucketStore.acquire``, using wall-clock time"""
+        now = time.time() if now is None else now
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Rate limiter store busy, admitting request: {e}")
+                return 0.0
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE name = ? AND key = ?",
+                    (self.name, key),
+                ).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                admitted = tokens >= cost
+                if admitted:
+                    tokens -= cost
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (name, key, tokens, updated) VALUES (?, ?, ?, ?)",
+                    (self.name, key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if admitted:
+            return 0.0
+        return (cost - tokens) / self.rate if self.rate else float("inf")
+
+    def purge_idle(self, now: Optional[float] = None) -> int:
+        """Delete buckets that have been idle long enough to be full again"""
+        now = time.time() if now is None else now
+        refill_time = self.burst / self.rate if self.rate else float("inf")
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM rate_limit_buckets WHERE name = ? AND updated < ?",
+                (self.name, now - refill_time),
+            )
+        return cursor.rowcount
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on in-flight requests for one route in this worker"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller by the verified user of its bearer token, else its IP address.
+
+    Unverified tokens fall back to the IP so a client cannot get a fresh
+    bucket by sending a different made-up token on every request.
+    """
+    claims = request_claims(request)
+    if claims is not None and claims.get("sub"):
+        return "user:" + claims["sub"]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class RateLimiter:
+    """FastAPI dependency enforcing a token bucket and a concurrency cap for one route"""
+
+    def __init__(self, name: str, rate: float, burst: float, max_concurrency: int):
+        self.name = name
+        self.rate = float(os.getenv(f"RATE_LIMIT_{name.upper()}_RATE", rate))
+        self.burst = float(os.getenv(f"RATE_LIMIT_{name.upper()}_BURST", burst))
+        self.concurrency = ConcurrencyLimiter(int(os.getenv(f"RATE_LIMIT_{name.upper()}_CONCURRENCY", max_concurrency)))
+        if RATE_LIMIT_BACKEND == "sqlite":
+            self.buckets = SQLiteTokenBucketStore(name, self.rate, self.burst)
+        else:
+            self.buckets = TokenBucketStore(self.rate, self.burst)
+
+    async def admit(self, request: Request):
+        """Reserve a concurrency slot and a token, or raise a 503/429 HTTPException.
+
+        Every successful call must be paired with ``release()``.
+        """
+        if not self.concurrency.try_acquire():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        key = client_key(request)
+        try:
+            if self.buckets.blocking:
+                retry_after = await run_in_threadpool(self.buckets.acquire, key)
+            else:
+                retry_after = self.buckets.acquire(key)
+        except BaseException:
+            self.concurrency.release()
+            raise
+        if retry_after > 0:
+            self.concurrency.release()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def release(self):
+        self.concurrency.release()
+
+
+def build_rate_limiters() -> Dict[str, RateLimiter]:
+    """Create the limiters for every protected route.
+
+    Called from the application lifespan so each worker opens its own SQLite
+    connection after it has started (never inherited across a fork).
+    """
+    return {
+        "disease_chat": RateLimiter("disease_chat", rate=0.5, burst=10, max_concurrency=32),
+        "testcase_generate": RateLimiter("testcase_generate", rate=0.2, burst=5, max_concurrency=8),
+        "search_history": RateLimiter("search_history", rate=1, burst=30, max_concurrency=64),
+        # Checked with within_rate_limit(): anonymous searches past it are not counted
+        "anonymous_search": RateLimiter("anonymous_search", rate=0.1, burst=10, max_concurrency=64),
+    }
+
+
+def rate_limit(name: str):
+    """Route dependency that applies the named limiter from ``app.state.rate_limiters``"""
+
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+
+        limiter = request.app.state.rate_limiters[name]
+        await limiter.admit(request)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
+
+
+def within_rate_limit(request: Request, name: str) -> bool:
+    """Take a token from the named limiter's bucket, without failing the request.
+
+    For optional work that is skipped rather than refused once the client is
+    over its budget. Call it off the event loop: the store may block.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return True
+    return request.app.state.rate_limiters[name].buckets.acquire(client_key(request)) == 0.0
+
+
+class BucketPurger:
+    """Deletes idle buckets from the limiters' shared SQLite stores in the background"""
+
+    def __init__(self, limiters: Dict[str, RateLimiter], interval: float = RATE_LIMIT_PURGE_INTERVAL_S):
+        self.stores = [limiter.buckets for limiter in limiters.values()
+                       if isinstance(limiter.buckets, SQLiteTokenBucketStore)]
+        self.interval = interval
+        self.purged = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def purge(self) -> int:
+        deleted = sum(store.purge_idle() for store in self.stores)
+        self.purged += deleted
+        return deleted
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await loop.run_in_executor(None, self.purge)
+            except Exception as e:
+                logger.error(f"Rate limit bucket purge failed: {str(e)}")
+
+    async def start(self):
+        if self.stores:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
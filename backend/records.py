@@ -0,0 +1,115 @@
+"""
+Compact in-memory records.
+
+Large generated suites repeat the same few strings over and over ("HIPAA",
+"Enter valid credentials", the template titles). ``CompactTestCase`` keeps a
+case in a ``__slots__`` object whose strings, compliance lists and step lists
+are shared through a ``StringPool``, so a suite of 100k cases holds each
+distinct string and each distinct step list once. Records are converted to the
+Pydantic ``TestCase`` only at the response boundary (``to_model()``), or
+straight to plain dicts for JSON (``to_dict()``).
+
+The pool is a bounded dict rather than ``sys.intern``: the strings come from
+requests and LLM output, and interned strings can outlive every reference
+to them (they are immortal on Python 3.12+).
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from schemas import TestCase
+
+
+class StringPool:
+    """Shares equal strings and tuples of strings through bounded dicts"""
+
+    __slots__ = ("_strings", "_tuples", "max_strings", "max_tuples")
+
+    def __init__(self, max_strings: int = 100_000, max_tuples: int = 100_000):
+        self._strings: Dict[str, str] = {}
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self.max_strings = max_strings
+        self.max_tuples = max_tuples
+
+    def string(self, value: str) -> str:
+        shared = self._strings.get(value)
+        if shared is None:
+            # A plain reset bounds memory when the values are mostly unique
+            if len(self._strings) >= self.max_strings:
+                self._strings.clear()
+            shared = self._strings[value] = value
+        return shared
+
+    def strings(self, values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+        """A shared tuple of shared strings (None stays None)"""
+        if values is None:
+            return None
+        key = tuple(self.string(value) for value in values)
+        shared = self._tuples.get(key)
+        if shared is None:
+            if len(self._tuples) >= self.max_tuples:
+                self._tuples.clear()
+            shared = self._tuples[key] = key
+        return shared
+
+    def __len__(self):
+        """Number of distinct tuples held"""
+        return len(self._tuples)
+
+
+# Process-wide pool used by the generators
+POOL = StringPool()
+
+
+class CompactTestCase:
+    """Slotted, pooled form of ``schemas.TestCase``"""
+
+    __slots__ = ("title", "description", "priority", "compliance", "test_steps")
+
+    def __init__(self, title: str, description: str, priority: str, compliance: Tuple[str, ...],
+                 test_steps: Optional[Tuple[str, ...]] = None):
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.compliance = compliance
+        self.test_steps = test_steps
+
+    @classmethod
+    def create(cls, title: str, description: str, priority: str, compliance: Iterable[str],
+               test_steps: Optional[Iterable[str]] = None, pool: StringPool = POOL) -> "CompactTestCase":
+        """Build a record, sharing every string through ``pool``"""
+        return cls(
+            pool.string(title),
+            pool.string(description),
+            pool.string(priority),
+            pool.strings(compliance),
+            pool.strings(test_steps),
+        )
+
+    @classmethod
+    def from_model(cls, test_case: TestCase, pool: StringPool = POOL) -> "CompactTestCase":
+        return cls.create(
+            test_case.title, test_case.description, test_case.priority,
+            test_case.compliance, test_case.test_steps, pool,
+        )
+
+    def to_dict(self) -> dict:
+        """Same shape as ``TestCase.model_dump()``"""
+        return {
+            "title": self.title,
+            "description": self.description,
+            "priority": self.priority,
+            "compliance": list(self.compliance),
+            "test_steps": list(self.test_steps) if self.test_steps is not None else None,
+        }
+
+    def to_model(self) -> TestCase:
+        """Convert to the response model (validation is skipped; fields are already valid)"""
+        return TestCase.model_construct(**self.to_dict())
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactTestCase):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"CompactTestCase(title={self.title!r}, priority={self.priority!r})"
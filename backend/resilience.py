@@ -0,0 +1,296 @@
+"""
+Tail-latency controls for upstream calls.
+
+``ResilientCaller.call(attempt)`` runs ``attempt()`` (a coroutine factory) with:
+
+* a hedge: if the first attempt has not answered after the recent p95
+  latency, a second one is started and whichever succeeds first wins.
+  Hedges are limited to ``hedge_ratio`` of calls so a slow upstream is not
+  sent twice the load;
+* a deadline (``timeout_s``), after which the caller gets ``UpstreamTimeout``
+  instead of waiting on a stalled connection;
+* a ``CircuitBreaker`` that opens when too many recent calls failed or were
+  slower than ``slow_call_ms``. While it is open calls fail at once with
+  ``CircuitOpenError``; after ``open_s`` one probe call is let through and
+  its outcome closes or re-opens the breaker.
+
+``ResilientCaller.stream(open_stream)`` applies the breaker to a streamed
+response, with ``timeout_s`` as an idle timeout between items and
+``stream_timeout_s`` as a cap on the whole stream (streams are not hedged:
+a second stream would duplicate the output).
+
+Callers catch ``UpstreamUnavailable`` and serve a fallback.
+"""
+
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream could not answer; serve a fallback"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The breaker is open and the call was not attempted"""
+
+
+class UpstreamTimeout(UpstreamUnavailable):
+    """No attempt answered before the deadline"""
+
+
+class UpstreamError(UpstreamUnavailable):
+    """Every attempt failed"""
+
+
+class LatencyTracker:
+    """Latencies (seconds) of the last ``window`` successful calls"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency: float):
+        self._samples.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over the outcomes of the last ``window`` calls"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_ratio: float = 0.5, window: int = 20, min_calls: int = 10,
+                 open_s: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_s = open_s
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_s:
+            return self.HALF_OPEN
+        return self._state
+
+    def available(self) -> bool:
+        """Whether a call would be let through, without claiming the half-open probe"""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probing)
+
+    def allow(self) -> bool:
+        """Claim permission for one call"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return True
+        return False
+
+    def record(self, success: bool):
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+            if success:
+                logger.info("Circuit breaker closed")
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (self._state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                and failures >= self.failure_ratio * len(self._outcomes)):
+            logger.warning(f"Circuit breaker opened: {failures} of the last {len(self._outcomes)} calls failed")
+            self._open()
+
+    def release(self):
+        """Give back a claimed probe whose call was abandoned (e.g. the client went away)"""
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+
+class ResilientCaller:
+    """Hedging, deadline and circuit breaker around an async upstream call"""
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None, timeout_s: float = 20.0,
+                 hedge: bool = True, hedge_quantile: float = 0.95, hedge_delay_ms: float = 1000.0,
+                 min_hedge_delay_ms: float = 50.0, hedge_ratio: float = 0.1, min_samples: int = 20,
+                 slow_call_ms: float = 10000.0, stream_timeout_s: float = 300.0):
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.timeout = timeout_s
+        self.stream_timeout = stream_timeout_s
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = hedge_delay_ms / 1000.0
+        self.min_hedge_delay = min_hedge_delay_ms / 1000.0
+        self.hedge_ratio = hedge_ratio
+        self.min_samples = min_samples
+        self.slow_call = slow_call_ms / 1000.0
+        self.latencies = LatencyTracker()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def hedge_delay(self) -> float:
+        """How long the first attempt gets before a hedge is sent"""
+        if len(self.latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, self.latencies.quantile(self.hedge_quantile))
+
+    def available(self) -> bool:
+        return self.breaker.available()
+
+    async def call(self, attempt: Callable[[], Awaitable[R]]) -> R:
+        """Run ``attempt()``, hedged once; raises ``UpstreamUnavailable`` subclasses"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("upstream circuit breaker is open")
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.timeout
+        tasks: List[asyncio.Future] = [asyncio.ensure_future(attempt())]
+        starts = {tasks[0]: started}
+        hedged = not self.hedge
+        errors: List[BaseException] = []
+        recorded = False
+        try:
+            while tasks:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                wait = deadline - now
+                if not hedged:
+                    wait = min(wait, max(0.0, started + self.hedge_delay() - now))
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    latency = loop.time() - starts[task]
+                    self.latencies.add(latency)
+                    if task is not next(iter(starts)):
+                        self.hedge_wins += 1
+                    success = latency <= self.slow_call
+                    if not success:
+                        logger.warning(f"Slow upstream call: {latency * 1000:.0f} ms")
+                    self.breaker.record(success)
+                    recorded = True
+                    return task.result()
+                if not done and not hedged and tasks and self.hedges < self.hedge_ratio * self.calls:
+                    hedged = True
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(attempt())
+                    starts[hedge] = loop.time()
+                    tasks.append(hedge)
+                elif not done:
+                    hedged = True
+            self.failures += 1
+            self.breaker.record(False)
+            recorded = True
+            if errors and not tasks:
+                raise UpstreamError(f"upstream call failed: {errors[-1]}") from errors[-1]
+            self.timeouts += 1
+            raise UpstreamTimeout(f"no upstream answer within {self.timeout:.1f} s")
+        finally:
+            if not recorded:
+                self.breaker.release()
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[R]]) -> AsyncIterator[R]:
+        """Yield the items of ``open_stream()``; raises ``UpstreamUnavailable`` subclasses.
+
+        Each item must arrive within ``timeout_s`` of the previous one and the
+        whole stream within ``stream_timeout_s``. A consumer that stops early
+        counts as a success once an item has arrived.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("upstream circuit breaker is open")
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.stream_timeout
+        items = open_stream()
+        received = recorded = False
+        try:
+            while True:
+                try:
+                    wait = min(self.timeout, max(0.0, deadline - loop.time()))
+                    item = await asyncio.wait_for(items.__anext__(), wait)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.failures += 1
+                    self.timeouts += 1
+                    self.breaker.record(False)
+                    recorded = True
+                    if loop.time() >= deadline:
+                        raise UpstreamTimeout(f"upstream stream did not finish within {self.stream_timeout:.1f} s")
+                    raise UpstreamTimeout(f"upstream stream sent nothing for {self.timeout:.1f} s")
+                except Exception as e:
+                    self.failures += 1
+                    self.breaker.record(False)
+                    recorded = True
+                    raise UpstreamError(f"upstream stream failed: {e}") from e
+                received = True
+                yield item
+            self.breaker.record(True)
+            recorded = True
+        finally:
+            if not recorded:
+                if received:
+                    self.breaker.record(True)
+                else:
+                    self.breaker.release()
+            await items.aclose()
+
+    def stats(self) -> dict:
+        p95 = self.latencies.quantile(0.95)
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.opened,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+        }
@@ -0,0 +1,16 @@
+"""
+API routers mounted by ``app.create_app``.
+
+Each module exposes a ``router`` (an ``APIRouter``) and may define
+``startup(app)`` / ``shutdown(app)`` coroutines that the application lifespan
+runs when the router is enabled. Modules are only imported when enabled, so a
+deployment that leaves out ``auth`` never loads SQLAlchemy or the crypto
+libraries.
+
+    health        /, /health, /api/health, /livez, /readyz, /metrics
+    auth          /auth/*, /api/auth/*
+    projects      /projects/*
+    disease       /chat, /api/disease/*
+    testcase      /testcases/*, /api/testcase/*
+    integrations  /integrations/*
+"""
@@ -0,0 +1,300 @@
+"""
+Authentication endpoints backed by the users table and JWT access tokens.
+
+``/auth/*`` is the contract used by ``src/services/api.js`` (login returns a
+bearer token and a refresh token, see ``sessions.py``). ``/api/auth/*`` keeps
+the user-profile responses of the original ``app.py`` service on top of the
+same user store.
+"""
+
+import os
+import re
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+
+from audit import audited, get_auditor
+from auth import decode_token, get_password_hash, verify_password, verify_token
+from schemas import (
+    AccountResponse, LoginRequest, LogoutRequest, RefreshRequest, SignupRequest, Token, UserResponse,
+)
+from sessions import SessionStore
+
+logger = logging.getLogger(__name__)
+
+# Demo accounts have well-known passwords, so they are only created when a
+# development or test environment opts in
+SEED_DEMO_USERS = os.getenv("SEED_DEMO_USERS", "false").lower() == "true"
+
+# Demo accounts previously held in app.py's in-memory USERS_DB
+DEMO_USERS = {
+    "testuser": {
+        "password": "password123",
+        "email": "test@example.com",
+        "full_name": "Test User"
+    },
+    "demo": {
+        "password": "demo123",
+        "email": "demo@healthcare.ai",
+        "full_name": "Demo User"
+    }
+}
+
+router = APIRouter(tags=["Authentication"])
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# ============================================================================
+# Helpers & Dependencies
+# ============================================================================
+
+# SQLAlchemy accounts for a large share of import time, so ``database`` is
+# imported on first use rather than when the router is mounted.
+
+def get_db():
+    """Yield a database session"""
+    from database import get_db as database_get_db
+    yield from database_get_db()
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def seed_demo_users():
+    """Create the demo accounts (in the "demo" tenant) if they do not exist yet"""
+    from database import SessionLocal, Tenant, User
+
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.slug == "demo").first()
+        if tenant is None:
+            tenant = Tenant(slug="demo", name="Demo")
+            db.add(tenant)
+            db.flush()
+        existing = {
+            username for (username,) in
+            db.query(User.username).filter(User.username.in_(list(DEMO_USERS)))
+        }
+        for username, info in DEMO_USERS.items():
+            if username in existing:
+                continue
+            db.add(User(
+                username=username,
+                tenant_id=tenant.id,
+                email=info["email"],
+                full_name=info["full_name"],
+                hashed_password=get_password_hash(info["password"])
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def authenticate_user(db, username: str, password: str):
+    """Return the active user for these credentials or raise 401"""
+    from database import User
+
+    user = db.query(User).filter(User.username == username).first()
+    if not user or not verify_password(password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+
+def create_user(db, request: SignupRequest):
+    """Insert a new user in a new tenant (their organization, or a personal one).
+
+    Raises 400 if the username, email or organization is taken.
+    """
+    from database import Tenant, User
+
+    taken = db.query(User.id).filter(
+        (User.username == request.username) | (User.email == request.email)
+    ).first()
+    if taken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
+    if request.organization:
+        slug, name = slugify(request.organization), request.organization
+    else:
+        slug, name = f"user-{slugify(request.username)}", request.full_name or request.username
+    if not slug or db.query(Tenant.id).filter(Tenant.slug == slug).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Organization already registered"
+        )
+    tenant = Tenant(slug=slug, name=name)
+    db.add(tenant)
+    db.flush()
+    user = User(
+        username=request.username,
+        tenant_id=tenant.id,
+        email=request.email,
+        full_name=request.full_name,
+        hashed_password=get_password_hash(request.password)
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def get_current_user(
+    bearer: Optional[str] = Depends(oauth2_scheme),
+    token: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """Resolve the active user from a bearer token (or legacy ``?token=``)"""
+    from database import User
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    username = verify_token(bearer or token or "")
+    if username is None:
+        raise credentials_exception
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
+
+def get_sessions(request: Request) -> SessionStore:
+    """The app's refresh-token session store"""
+    return request.app.state.sessions
+
+
+def to_user_response(user) -> UserResponse:
+    response = UserResponse(
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name
+    )
+    if user.created_at:
+        response.created_at = user.created_at.date().isoformat()
+    return response
+
+# ============================================================================
+# Token endpoints (api.js)
+# ============================================================================
+
+@router.post("/auth/signup", response_model=AccountResponse)
+def signup(request: SignupRequest, db=Depends(get_db), audit=Depends(get_auditor)):
+    """Create a new user account"""
+    logger.info(f"Signup attempt for user: {request.username}")
+    with audited(audit, "signup", request.username):
+        return create_user(db, request)
+
+
+@router.post("/auth/login", response_model=Token)
+def login(request: LoginRequest, db=Depends(get_db), sessions: SessionStore = Depends(get_sessions),
+          audit=Depends(get_auditor)):
+    """Authenticate user and return access and refresh tokens"""
+    with audited(audit, "login", request.username):
+        user = authenticate_user(db, request.username, request.password)
+    logger.info(f"User {user.username} logged in successfully")
+    access_token, refresh_token = sessions.issue(user.username, user.tenant_id)
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/auth/refresh", response_model=Token)
+def refresh(request: RefreshRequest, sessions: SessionStore = Depends(get_sessions),
+            audit=Depends(get_auditor)):
+    """Exchange a refresh token for a new access token and a new refresh token"""
+    rotated = sessions.rotate(request.refresh_token)
+    if rotated is None:
+        audit("token.refresh", outcome="failure")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    username, access_token, refresh_token = rotated
+    audit("token.refresh", username)
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/auth/logout")
+def logout_session(request: LogoutRequest, bearer: Optional[str] = Depends(oauth2_scheme),
+                   sessions: SessionStore = Depends(get_sessions), audit=Depends(get_auditor)):
+    """End the session of the bearer token (or refresh token); its access tokens stop working at once"""
+    payload = decode_token(bearer) if bearer else None
+    session_id = payload.get("sid") if payload else None
+    if not sessions.revoke(session_id, request.refresh_token):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No session to log out")
+    audit("logout", payload["sub"] if payload else None)
+    return {"message": "Logged out successfully"}
+
+
+@router.get("/auth/me", response_model=AccountResponse)
+def read_users_me(current_user=Depends(get_current_user)):
+    """Get current user information"""
+    return current_user
+
+# ============================================================================
+# Profile endpoints (/api/auth)
+# ============================================================================
+
+@router.post("/api/auth/login", response_model=UserResponse)
+def api_login(request: LoginRequest, db=Depends(get_db), audit=Depends(get_auditor)):
+    """User login endpoint"""
+    logger.info(f"Login attempt for user: {request.username}")
+    with audited(audit, "login", request.username):
+        user = authenticate_user(db, request.username, request.password)
+    logger.info(f"User {request.username} logged in successfully")
+    return to_user_response(user)
+
+
+@router.post("/api/auth/signup", response_model=UserResponse)
+def api_signup(request: SignupRequest, db=Depends(get_db), audit=Depends(get_auditor)):
+    """User signup endpoint"""
+    logger.info(f"Signup attempt for user: {request.username}")
+    with audited(audit, "signup", request.username):
+        user = create_user(db, request)
+    logger.info(f"User {request.username} signed up successfully")
+    return to_user_response(user)
+
+
+@router.get("/api/auth/user", response_model=UserResponse)
+def get_user(current_user=Depends(get_current_user)):
+    """Get current user"""
+    return to_user_response(current_user)
+
+
+@router.post("/api/auth/logout")
+async def logout():
+    """User logout endpoint"""
+    logger.info("User logged out")
+    return {"message": "Logged out successfully"}
+
+# ============================================================================
+# Lifespan hooks
+# ============================================================================
+
+async def startup(app):
+    """Create the demo accounts if enabled, then start session maintenance"""
+    # The lifespan has already created or migrated the schema (database.init_db)
+    if SEED_DEMO_USERS and app.state.db_initialized:
+        await run_in_threadpool(seed_demo_users)
+    app.state.sessions = SessionStore()
+    await app.state.sessions.start()
+
+
+async def shutdown(app):
+    """Stop session maintenance"""
+    await app.state.sessions.stop()
@@ -0,0 +1,313 @@
+"""
+Disease information endpoints
+
+Gemini answers are kept in a semantic cache (``semantic_cache.py``) so that
+paraphrased questions are answered without another upstream call. Static
+catalog answers are cheap and are never cached. When the LLM call fails,
+times out or its circuit breaker is open, the answer comes from the closest
+cached answer (``SEMANTIC_CACHE_FALLBACK_THRESHOLD``) or the static catalog.
+Without an LLM, ``/chat`` serves the catalog answer as pre-rendered,
+pre-compressed bytes (``bundles.py``). Questions the built-in catalog has
+no entry for are matched against the imported ICD-10 catalog
+(``catalog_store.py``) when ``DISEASE_CATALOG_DIR`` is set. Each tenant gets its own
+cache partition, capped at ``TENANT_CACHE_SHARE`` of
+``SEMANTIC_CACHE_MAX_ENTRIES``, and all open partitions together stay
+within ``SEMANTIC_CACHE_MAX_ENTRIES``.
+
+Searches made from the disease lookup are kept server-side
+(``search_history.py``) and power prefix autocomplete and popular searches,
+both scoped to the caller's tenant.
+"""
+
+import os
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from starlette.concurrency import run_in_threadpool
+
+import llm
+from audit import get_auditor
+from auth import username_from_authorization
+from catalog import GENERAL_KEY, generate_disease_response, match_disease
+from ratelimit import rate_limit, within_rate_limit
+from resilience import UpstreamUnavailable
+from schemas import (
+    AutocompleteResponse, ChatRequest, ChatResponse, LegacyChatRequest, SearchHistoryItem,
+    SearchHistoryResponse, SearchRecorded, SearchRequest, Suggestion,
+)
+from search_history import AUTOCOMPLETE_TOP_K, SEARCH_HISTORY_ENABLED, SearchHistory, normalize_query
+from tenancy import PUBLIC_TENANT_ID, TENANT_CACHE_SHARE, TenantPartitions, get_tenant_id
+
+logger = logging.getLogger(__name__)
+
+# Pre-rendered catalog answers for /chat (bundles.py); read here so startup can skip importing it
+DISEASE_BUNDLES_ENABLED = os.getenv("DISEASE_BUNDLES_ENABLED", "true").lower() != "false"
+# Imported catalog versions (catalog_store.py); read here so startup can skip importing NumPy
+DISEASE_CATALOG_DIR = os.getenv("DISEASE_CATALOG_DIR")
+# Longer prompts are matched against the imported catalog in the threadpool:
+# every phrase of up to MAX_TERM_WORDS words is hashed and looked up
+DISEASE_CATALOG_INLINE_CHARS = int(os.getenv("DISEASE_CATALOG_INLINE_CHARS", "200"))
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() != "false"
+# Directory for the memory-mapped cache files; unset keeps the cache in memory
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+# A looser match is served when the LLM is unavailable, before falling back to the catalog
+SEMANTIC_CACHE_FALLBACK_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_FALLBACK_THRESHOLD", "0.7"))
+# Entries across all open tenant partitions; each partition holds up to TENANT_CACHE_SHARE of it
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000000"))
+
+router = APIRouter(tags=["Disease"])
+
+
+async def match_catalog(prompt: str, catalog=None):
+    """Imported catalog entry for the prompt, or None"""
+    if catalog is None:
+        return None
+    if len(prompt) <= DISEASE_CATALOG_INLINE_CHARS:
+        return catalog.match(prompt)
+    return await run_in_threadpool(catalog.match, prompt)
+
+
+async def catalog_response(prompt: str, catalog=None) -> str:
+    """Built-in catalog answer, else the imported catalog's, else the general answer"""
+    if match_disease(prompt) == GENERAL_KEY:
+        entry = await match_catalog(prompt, catalog)
+        if entry is not None:
+            return entry.render()
+    return generate_disease_response(prompt)
+
+
+async def answer_prompt(prompt: str, cache=None, batcher=None, guard=None, catalog=None) -> str:
+    """Answer from the LLM when configured, otherwise (or when it is unavailable) from the catalogs.
+
+    Semantic cache lookups and inserts are NumPy scans (and occasionally an
+    index rebuild), so they run in the threadpool rather than on the event loop.
+    """
+    if llm.is_configured():
+        if cache is not None:
+            cached = await run_in_threadpool(cache.get, prompt)
+            if cached is not None:
+                return cached
+        try:
+            answer = await llm.agenerate(prompt, batcher, guard)
+        except UpstreamUnavailable as e:
+            logger.warning(f"LLM unavailable, serving a fallback answer: {str(e)}")
+            guard.fallbacks += 1
+            fallback = (await run_in_threadpool(cache.get, prompt, SEMANTIC_CACHE_FALLBACK_THRESHOLD)
+                        if cache is not None else None)
+            return fallback if fallback is not None else await catalog_response(prompt, catalog)
+        if cache is not None:
+            await run_in_threadpool(cache.put, prompt, answer)
+        return answer
+    return await catalog_response(prompt, catalog)
+
+
+async def get_semantic_cache(request: Request, tenant_id: int = Depends(get_tenant_id)):
+    """The caller's tenant partition of the semantic cache, or None when disabled"""
+    caches = getattr(request.app.state, "semantic_caches", None)
+    if caches is None:
+        return None
+    if caches.peek(tenant_id) is not None:
+        return caches.get(tenant_id)
+    # Opening a partition reads its files
+    return await run_in_threadpool(caches.get, tenant_id)
+
+
+async def get_disease_catalog(request: Request):
+    """Current version of the imported catalog, or None when there is none"""
+    handle = getattr(request.app.state, "disease_catalog", None)
+    return handle.current() if handle is not None else None
+
+
+@router.post("/api/disease/chat", response_model=ChatResponse,
+             dependencies=[Depends(rate_limit("disease_chat"))])
+async def chat_with_gemini(request: ChatRequest, cache=Depends(get_semantic_cache),
+                           batcher=Depends(llm.get_batcher), guard=Depends(llm.get_guard),
+                           catalog=Depends(get_disease_catalog), audit=Depends(get_auditor)):
+    """Chat with AI for disease information"""
+    logger.info("Disease chat request received")
+
+    try:
+        response_text = await answer_prompt(request.prompt, cache, batcher, guard, catalog)
+        audit("disease.chat", prompt_chars=len(request.prompt))
+
+        logger.info("Disease chat response generated")
+        return ChatResponse(
+            response=response_text,
+            model="healthcare-ai-gemini"
+        )
+    except Exception as e:
+        logger.error(f"Error in disease chat: {str(e)}")
+        audit("disease.chat", outcome="failure", prompt_chars=len(request.prompt))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error processing request"
+        )
+
+
+@router.post("/chat", dependencies=[Depends(rate_limit("disease_chat"))])
+async def chat(request: LegacyChatRequest, http_request: Request, cache=Depends(get_semantic_cache),
+               batcher=Depends(llm.get_batcher), guard=Depends(llm.get_guard),
+               catalog=Depends(get_disease_catalog), audit=Depends(get_auditor)):
+    """Chat endpoint used by the frontend (api.chatWithGemini)"""
+    bundles = getattr(http_request.app.state, "disease_bundles", None)
+    if bundles is not None and not llm.is_configured():
+        key = match_disease(request.message)
+        # Imported catalog answers are not pre-rendered
+        entry = await match_catalog(request.message, catalog) if key == GENERAL_KEY else None
+        audit("disease.chat", prompt_chars=len(request.message))
+        if entry is not None:
+            return {"response": entry.render()}
+        return bundles.response("chat", key, http_request.headers.get("accept-encoding"))
+    try:
+        response_text = await answer_prompt(request.message, cache, batcher, guard, catalog)
+        audit("disease.chat", prompt_chars=len(request.message))
+        return {"response": response_text}
+    except Exception as e:
+        logger.error(f"Error in chat: {str(e)}")
+        audit("disease.chat", outcome="failure", prompt_chars=len(request.message))
+        return {"error": str(e)}
+
+# ============================================================================
+# Search history & autocomplete
+# ============================================================================
+
+def get_search_history(request: Request) -> SearchHistory:
+    """The app's search history store, or 503 when disabled"""
+    history = getattr(request.app.state, "search_history", None)
+    if history is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Search history is disabled")
+    return history
+
+
+def get_username(request: Request) -> str:
+    """Username from the bearer token, or 401"""
+    username = username_from_authorization(request.headers.get("authorization"))
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
+
+@router.post("/api/disease/history", response_model=SearchRecorded,
+             dependencies=[Depends(rate_limit("search_history"))])
+def record_search(request: SearchRequest, http_request: Request,
+                  tenant_id: int = Depends(get_tenant_id),
+                  history: SearchHistory = Depends(get_search_history)):
+    """Count a search in the caller's tenant and add it to a signed-in user's history.
+
+    Anonymous searches count in the public tenant while the client is within
+    the ``anonymous_search`` rate limit; past it they are only normalized, so
+    popularity cannot be inflated without an account.
+    """
+    username = username_from_authorization(http_request.headers.get("authorization"))
+    if username is None and not within_rate_limit(http_request, "anonymous_search"):
+        normalized = normalize_query(request.query) or None
+    else:
+        normalized = history.record(request.query, username, tenant_id)
+    if normalized is None:
+        raise HTTPException(status_code=422, detail="Empty search query")
+    return SearchRecorded(query=normalized)
+
+
+@router.get("/api/disease/history", response_model=SearchHistoryResponse)
+def read_search_history(limit: int = Query(10, ge=1, le=100), username: str = Depends(get_username),
+                        tenant_id: int = Depends(get_tenant_id),
+                        history: SearchHistory = Depends(get_search_history)):
+    """The signed-in user's latest distinct searches"""
+    return SearchHistoryResponse(searches=[
+        SearchHistoryItem(query=query, searched_at=searched_at)
+        for query, searched_at in history.recent(username, limit, tenant_id)
+    ])
+
+
+@router.delete("/api/disease/history")
+def clear_search_history(username: str = Depends(get_username),
+                         tenant_id: int = Depends(get_tenant_id),
+                         history: SearchHistory = Depends(get_search_history)):
+    """Forget the signed-in user's searches (popularity counts are kept)"""
+    return {"deleted": history.clear(username, tenant_id)}
+
+
+@router.get("/api/disease/autocomplete", response_model=AutocompleteResponse)
+def autocomplete(prefix: str = Query("", max_length=100),
+                 limit: int = Query(AUTOCOMPLETE_TOP_K, ge=1, le=AUTOCOMPLETE_TOP_K),
+                 tenant_id: int = Depends(get_tenant_id),
+                 history: SearchHistory = Depends(get_search_history)):
+    """Most searched queries in the tenant starting with ``prefix``; an empty prefix lists popular searches"""
+    # Sync so a tenant's first lookup, which loads its index, runs in the threadpool
+    return AutocompleteResponse(prefix=prefix, suggestions=[
+        Suggestion(query=query, count=count)
+        for query, count in history.complete(prefix, limit, tenant_id)
+    ])
+
+# ============================================================================
+# Lifespan hooks
+# ============================================================================
+
+def open_semantic_cache(tenant_id: int = PUBLIC_TENANT_ID, directory: Optional[str] = SEMANTIC_CACHE_DIR,
+                        shared_room=None):
+    """Create (or reopen) a tenant's semantic cache; NumPy is only imported here"""
+    from semantic_cache import SemanticCache
+
+    path = directory
+    if directory and tenant_id != PUBLIC_TENANT_ID:
+        path = os.path.join(directory, "tenants", str(tenant_id))
+    return SemanticCache(path=path, threshold=SEMANTIC_CACHE_THRESHOLD,
+                         max_entries=int(SEMANTIC_CACHE_MAX_ENTRIES * TENANT_CACHE_SHARE),
+                         shared_room=shared_room)
+
+
+def open_semantic_caches(directory: Optional[str] = SEMANTIC_CACHE_DIR) -> TenantPartitions:
+    """Tenant partitions sharing one SEMANTIC_CACHE_MAX_ENTRIES budget"""
+    def room() -> int:
+        return SEMANTIC_CACHE_MAX_ENTRIES - sum(len(cache) for _, cache in caches.items())
+
+    # Evicted partitions are closed, releasing their files and write lock for the next open
+    caches = TenantPartitions(lambda tenant_id: open_semantic_cache(tenant_id, directory, shared_room=room),
+                              evict=lambda cache: cache.close())
+    return caches
+
+
+async def startup(app):
+    """Open the public semantic cache (or the catalog bundles), the imported catalog and the search index"""
+    app.state.semantic_caches = None
+    if SEMANTIC_CACHE_ENABLED and llm.is_configured():
+        caches = open_semantic_caches()
+        await run_in_threadpool(caches.get, PUBLIC_TENANT_ID)
+        app.state.semantic_caches = caches
+    app.state.disease_bundles = None
+    if DISEASE_BUNDLES_ENABLED and not llm.is_configured():
+        from bundles import load_bundles
+
+        app.state.disease_bundles = await run_in_threadpool(load_bundles)
+    app.state.disease_catalog = None
+    if DISEASE_CATALOG_DIR:
+        from catalog_store import CatalogHandle
+
+        app.state.disease_catalog = CatalogHandle(DISEASE_CATALOG_DIR)
+        await run_in_threadpool(app.state.disease_catalog.current)
+    app.state.search_history = None
+    if SEARCH_HISTORY_ENABLED:
+        app.state.search_history = SearchHistory()
+        await app.state.search_history.start()
+
+
+async def shutdown(app):
+    """Persist the semantic caches, unmap the bundles and write pending searches"""
+    bundles = getattr(app.state, "disease_bundles", None)
+    if bundles is not None:
+        bundles.close()
+    caches = getattr(app.state, "semantic_caches", None)
+    if caches is not None:
+        for cache in caches.clear():
+            await run_in_threadpool(cache.close)
+    history = getattr(app.state, "search_history", None)
+    if history is not None:
+        await history.stop()
@@ -0,0 +1,67 @@
+"""
+Health & status endpoints
+
+``/metrics`` reports the per-worker counters of the shared components (LLM
+guard and batcher, audit log, search history, suite cache, disease bundles)
+as JSON.
+"""
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from schemas import HealthResponse
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "message": "Healthcare AI Assistant API",
+        "status": "running",
+        "docs": "/docs",
+        "version": "1.0.0"
+    }
+
+
+@router.get("/health", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint"""
+    return HealthResponse()
+
+
+@router.get("/api/health", response_model=HealthResponse)
+async def api_health_check():
+    """API health check endpoint"""
+    return HealthResponse(service="Healthcare AI API")
+
+
+@router.get("/livez", response_class=PlainTextResponse)
+async def livez():
+    """Liveness probe: no dependency checks and no logging"""
+    return "ok"
+
+
+@router.get("/readyz")
+async def readyz(request: Request):
+    """Readiness probe: cached database, connection pool and LLM gateway checks"""
+    result = await request.app.state.readiness_probe.check()
+    status_code = status.HTTP_200_OK if result["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(result, status_code=status_code)
+
+
+# app.state attributes whose ``stats()`` appear in /metrics
+METRIC_SOURCES = ("llm_guard", "llm_batcher", "audit_log", "search_history", "suite_cache", "disease_bundles",
+                  "disease_catalog", "query_stats")
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    """Counters of this worker's shared components (hedges, breaker state, batches, ...)"""
+    result = {}
+    for name in METRIC_SOURCES:
+        source = getattr(request.app.state, name, None)
+        if source is not None:
+            result[name] = source.stats()
+    return result
@@ -0,0 +1,89 @@
+"""
+Export generated test cases in the payload format of external QA tools.
+
+The endpoints only build the payloads; pushing them to a Jira, TestRail or
+Azure DevOps instance is left to the caller, which holds the credentials.
+With ``dedupe`` set, near-duplicate cases are dropped first (``dedup.py``).
+"""
+
+from typing import Callable, List
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from schemas import ExportRequest, ExportResponse, TestCase
+
+router = APIRouter(prefix="/integrations", tags=["Integrations"])
+
+TESTRAIL_PRIORITY_IDS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+
+def _steps_text(test_case: TestCase) -> str:
+    return "\n".join(f"{number}. {step}" for number, step in enumerate(test_case.test_steps or [], 1))
+
+
+def to_jira_issue(test_case: TestCase, request: ExportRequest) -> dict:
+    """Jira issue creation payload"""
+    fields = {
+        "summary": test_case.title,
+        "description": f"{test_case.description}\n\n{_steps_text(test_case)}".strip(),
+        "issuetype": {"name": "Test"},
+        "priority": {"name": test_case.priority.capitalize()},
+        "labels": list(test_case.compliance),
+    }
+    if request.project:
+        fields["project"] = {"key": request.project}
+    return {"fields": fields}
+
+
+def to_testrail_case(test_case: TestCase, request: ExportRequest) -> dict:
+    """TestRail add_case payload"""
+    return {
+        "title": test_case.title,
+        "priority_id": TESTRAIL_PRIORITY_IDS.get(test_case.priority, 2),
+        "refs": ", ".join(test_case.compliance),
+        "custom_preconds": test_case.description,
+        "custom_steps_separated": [{"content": step, "expected": ""} for step in test_case.test_steps or []],
+    }
+
+
+def to_azure_work_item(test_case: TestCase, request: ExportRequest) -> List[dict]:
+    """Azure DevOps JSON Patch document for a Test Case work item"""
+    return [
+        {"op": "add", "path": "/fields/System.Title", "value": test_case.title},
+        {"op": "add", "path": "/fields/System.Description", "value": test_case.description},
+        {"op": "add", "path": "/fields/Microsoft.VSTS.Common.Priority",
+         "value": TESTRAIL_PRIORITY_IDS.get(test_case.priority, 2)},
+        {"op": "add", "path": "/fields/System.Tags", "value": "; ".join(test_case.compliance)},
+        {"op": "add", "path": "/fields/Microsoft.VSTS.TCM.Steps", "value": _steps_text(test_case)},
+    ]
+
+
+async def _export(target: str, formatter: Callable[[TestCase, ExportRequest], object],
+                  request: ExportRequest) -> ExportResponse:
+    test_cases, removed = request.testCases, 0
+    if request.dedupe:
+        from dedup import dedupe_cases
+
+        # Large suites take a while to hash; keep the event loop free
+        test_cases, removed = await run_in_threadpool(dedupe_cases, test_cases, request.dedupeThreshold)
+    items = [formatter(test_case, request) for test_case in test_cases]
+    return ExportResponse(target=target, count=len(items), items=items, duplicates_removed=removed)
+
+
+@router.post("/jira/export", response_model=ExportResponse)
+async def export_to_jira(request: ExportRequest):
+    """Format test cases as Jira issues"""
+    return await _export("jira", to_jira_issue, request)
+
+
+@router.post("/testrail/export", response_model=ExportResponse)
+async def export_to_testrail(request: ExportRequest):
+    """Format test cases as TestRail cases"""
+    return await _export("testrail", to_testrail_case, request)
+
+
+@router.post("/azuredevops/export", response_model=ExportResponse)
+async def export_to_azure_devops(request: ExportRequest):
+    """Format test cases as Azure DevOps work items"""
+    return await _export("azuredevops", to_azure_work_item, request)
@@ -0,0 +1,78 @@
+"""
+Project endpoints (api.getProjects / api.createProject)
+
+Projects belong to the caller's tenant (the ``tid`` claim of the access
+token). Every query filters on ``tenant_id`` and is served by the
+``projects.tenant_id`` index; a project of another tenant is reported as not
+found.
+"""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from audit import get_auditor
+from schemas import ProjectCreate, ProjectResponse
+from tenancy import request_claims, require_tenant
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/projects", tags=["Projects"])
+
+# ============================================================================
+# Dependencies
+# ============================================================================
+
+def get_db():
+    """Yield a database session (``database`` is imported on first use)"""
+    from database import get_db as database_get_db
+    yield from database_get_db()
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+@router.get("", response_model=List[ProjectResponse])
+def list_projects(limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0),
+                  tenant_id: int = Depends(require_tenant), db=Depends(get_db)):
+    """The tenant's projects, newest first"""
+    from database import Project
+
+    return (
+        db.query(Project).filter(Project.tenant_id == tenant_id)
+        .order_by(Project.created_at.desc(), Project.id.desc())
+        .offset(offset).limit(limit).all()
+    )
+
+
+@router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
+def create_project(request: ProjectCreate, http_request: Request, tenant_id: int = Depends(require_tenant),
+                   db=Depends(get_db), audit=Depends(get_auditor)):
+    """Create a project in the caller's tenant; names are unique per tenant"""
+    from sqlalchemy.exc import IntegrityError
+    from database import Project
+
+    username = request_claims(http_request)["sub"]
+    project = Project(tenant_id=tenant_id, name=request.name, description=request.description,
+                      created_by=username)
+    db.add(project)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Project name already in use")
+    db.refresh(project)
+    audit("project.create", username, project_id=project.id)
+    return project
+
+
+@router.get("/{project_id}", response_model=ProjectResponse)
+def read_project(project_id: int, tenant_id: int = Depends(require_tenant), db=Depends(get_db)):
+    """One of the tenant's projects"""
+    from database import Project
+
+    project = db.query(Project).filter(Project.id == project_id, Project.tenant_id == tenant_id).first()
+    if project is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return project
@@ -0,0 +1,260 @@
+"""
+Test case generation endpoints
+
+With an LLM configured the cases come from the model, parsed item by item by
+``testcase_parser``; the static templates are used otherwise, when the
+model's output contains no usable case, or when the model is unavailable
+(failed, past ``LLM_TIMEOUT_S`` or circuit breaker open).
+
+``/api/testcase/generate/stream`` returns the cases as NDJSON, one
+``TestCase`` per line, each written as soon as the parser completes it. The
+last line is ``{"done": true, "count": n}``, or ``{"error": ...}`` when
+generation failed part-way; a stream without either was cut off.
+
+Cases are handled as ``records.CompactTestCase`` and only converted to
+Pydantic models (or plain dicts) when the response is built.
+
+With ``dedupe`` set, near-duplicate cases are dropped (``dedup.py``); the
+stream skips a case that near-duplicates one already sent.
+
+Suites generated by the LLM are cached per tenant (``tenancy.TenantLRU``,
+weighted by case count), so repeating a request skips the model call and no
+tenant can hold more than ``TENANT_CACHE_SHARE`` of ``SUITE_CACHE_MAX_CASES``.
+"""
+
+import os
+import json
+import logging
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+import llm
+from audit import get_auditor
+from catalog import generate_compact_test_cases
+from ratelimit import rate_limit
+from records import CompactTestCase
+from resilience import UpstreamUnavailable
+from schemas import LegacyTestCaseRequest, TestCaseRequest, TestCaseResponse
+from tenancy import PUBLIC_TENANT_ID, TenantLRU, get_tenant_id
+from testcase_parser import TestCaseStreamParser, build_test_case_prompt, parse_test_cases
+
+logger = logging.getLogger(__name__)
+
+# Test cases cached across all tenants; 0 disables the suite cache
+SUITE_CACHE_MAX_CASES = int(os.getenv("SUITE_CACHE_MAX_CASES", "100000"))
+
+router = APIRouter(tags=["Test Cases"])
+
+
+class SuiteCache:
+    """A tenant's view of the app's generated-suite cache"""
+
+    def __init__(self, cache: TenantLRU, tenant_id: int = PUBLIC_TENANT_ID):
+        self.cache = cache
+        self.tenant_id = tenant_id
+
+    @staticmethod
+    def key(requirement: str, system_type: str, priority: str, compliance: List[str]) -> tuple:
+        return requirement, system_type, priority, tuple(compliance)
+
+    def get(self, key: tuple) -> Optional[List[CompactTestCase]]:
+        return self.cache.get(self.tenant_id, key)
+
+    def put(self, key: tuple, test_cases: List[CompactTestCase]):
+        self.cache.put(self.tenant_id, key, test_cases, weight=len(test_cases))
+
+
+async def get_suite_cache(request: Request, tenant_id: int = Depends(get_tenant_id)) -> Optional[SuiteCache]:
+    """The caller's tenant view of the suite cache, or None when disabled"""
+    cache = getattr(request.app.state, "suite_cache", None)
+    return SuiteCache(cache, tenant_id) if cache is not None else None
+
+
+async def generate_cases(requirement: str, system_type: str, priority: str, compliance: List[str],
+                         batcher=None, cache: Optional[SuiteCache] = None,
+                         guard=None) -> List[CompactTestCase]:
+    """Test cases from the LLM when configured, otherwise from the templates"""
+    if llm.is_configured():
+        key = SuiteCache.key(requirement, system_type, priority, compliance)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            return list(cached)
+        prompt = build_test_case_prompt(requirement, system_type, priority, compliance)
+        try:
+            output = await llm.agenerate(prompt, batcher, guard)
+        except UpstreamUnavailable as e:
+            logger.warning(f"LLM unavailable, using templates: {str(e)}")
+            guard.fallbacks += 1
+            return generate_compact_test_cases(requirement, system_type, priority, compliance)
+        test_cases, errors = parse_test_cases(output, {"priority": priority, "compliance": compliance})
+        if test_cases:
+            compact = [CompactTestCase.from_model(test_case) for test_case in test_cases]
+            if cache is not None:
+                cache.put(key, compact)
+            return list(compact)
+        logger.warning(f"LLM output had no usable test cases ({len(errors)} errors); using templates")
+    return generate_compact_test_cases(requirement, system_type, priority, compliance)
+
+
+async def stream_cases(requirement: str, system_type: str, priority: str, compliance: List[str],
+                       cache: Optional[SuiteCache] = None, guard=None) -> AsyncIterator[CompactTestCase]:
+    """Yield test cases one at a time as the LLM output is parsed.
+
+    The stream runs under ``guard``'s deadline and circuit breaker (it is not
+    hedged). If the model fails before the first case is yielded, the
+    templates are streamed instead; after that the error ends the stream.
+    """
+    if llm.is_configured():
+        key = SuiteCache.key(requirement, system_type, priority, compliance)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            for test_case in cached:
+                yield test_case
+            return
+        prompt = build_test_case_prompt(requirement, system_type, priority, compliance)
+        parser = TestCaseStreamParser({"priority": priority, "compliance": compliance})
+        chunks = guard.stream(lambda: llm.astream(prompt)) if guard is not None else llm.astream(prompt)
+        streamed = []
+        failed = False
+        try:
+            async for chunk in chunks:
+                for test_case in parser.feed(chunk):
+                    compact = CompactTestCase.from_model(test_case)
+                    streamed.append(compact)
+                    yield compact
+                if parser.done:
+                    break
+        except Exception as e:
+            if streamed:
+                raise
+            logger.warning(f"LLM stream unavailable, using templates: {str(e)}")
+            if guard is not None:
+                guard.fallbacks += 1
+            failed = True
+        finally:
+            await chunks.aclose()
+        if not failed:
+            parser.close()
+            if parser.count:
+                # Only a suite streamed to the end is cached
+                if cache is not None:
+                    cache.put(key, streamed)
+                return
+            logger.warning(f"LLM output had no usable test cases ({len(parser.errors)} errors); using templates")
+    for test_case in generate_compact_test_cases(requirement, system_type, priority, compliance):
+        yield test_case
+
+
+@router.post("/api/testcase/generate", response_model=TestCaseResponse,
+             dependencies=[Depends(rate_limit("testcase_generate"))])
+async def generate_test_cases(request: TestCaseRequest, batcher=Depends(llm.get_batcher),
+                              cache=Depends(get_suite_cache), guard=Depends(llm.get_guard),
+                              audit=Depends(get_auditor)):
+    """Generate test cases for healthcare requirements"""
+    logger.info(f"Test case generation request: {request.system_type}")
+
+    try:
+        test_cases = await generate_cases(
+            request.requirement,
+            request.system_type,
+            request.priority,
+            request.compliance,
+            batcher,
+            cache,
+            guard
+        )
+        removed = 0
+        if request.dedupe:
+            from dedup import dedupe_cases
+
+            test_cases, removed = await run_in_threadpool(dedupe_cases, test_cases, request.dedupe_threshold)
+
+        logger.info(f"Generated {len(test_cases)} test cases ({removed} near-duplicates removed)")
+        audit("testcase.generate", system_type=request.system_type, count=len(test_cases))
+        return TestCaseResponse(
+            test_cases=[test_case.to_model() for test_case in test_cases],
+            requirement=request.requirement,
+            duplicates_removed=removed
+        )
+    except Exception as e:
+        logger.error(f"Error generating test cases: {str(e)}")
+        audit("testcase.generate", outcome="failure", system_type=request.system_type)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error generating test cases"
+        )
+
+
+@router.post("/api/testcase/generate/stream", response_class=StreamingResponse,
+             dependencies=[Depends(rate_limit("testcase_generate"))])
+async def generate_test_cases_stream(request: TestCaseRequest, cache=Depends(get_suite_cache),
+                                     guard=Depends(llm.get_guard), audit=Depends(get_auditor)):
+    """Stream generated test cases as NDJSON (one TestCase per line, then a done or error line)"""
+    logger.info(f"Streaming test case generation request: {request.system_type}")
+
+    deduplicator = None
+    if request.dedupe:
+        from dedup import StreamDeduplicator
+
+        deduplicator = StreamDeduplicator(request.dedupe_threshold)
+
+    async def ndjson():
+        count = 0
+        try:
+            async for test_case in stream_cases(
+                request.requirement,
+                request.system_type,
+                request.priority,
+                request.compliance,
+                cache,
+                guard
+            ):
+                if deduplicator is not None and not deduplicator.add(test_case):
+                    continue
+                count += 1
+                yield test_case.to_model().model_dump_json() + "\n"
+        except Exception as e:
+            # The status line has already been sent; report the failure in the last line
+            logger.error(f"Error streaming test cases after {count}: {str(e)}")
+            audit("testcase.generate", outcome="failure", system_type=request.system_type, count=count)
+            yield json.dumps({"error": "Error generating test cases", "count": count}) + "\n"
+            return
+        logger.info(f"Streamed {count} test cases")
+        audit("testcase.generate", system_type=request.system_type, count=count)
+        yield json.dumps({"done": True, "count": count}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/testcases/generate", dependencies=[Depends(rate_limit("testcase_generate"))])
+async def generate_test_cases_legacy(request: LegacyTestCaseRequest, batcher=Depends(llm.get_batcher),
+                                     cache=Depends(get_suite_cache), guard=Depends(llm.get_guard),
+                                     audit=Depends(get_auditor)):
+    """Test case generation used by the frontend (api.generateTestCases)"""
+    test_cases = await generate_cases(
+        request.requirement,
+        request.systemType,
+        request.priority,
+        request.compliance,
+        batcher,
+        cache,
+        guard
+    )
+    removed = 0
+    if request.dedupe:
+        from dedup import dedupe_cases
+
+        test_cases, removed = await run_in_threadpool(dedupe_cases, test_cases, request.dedupeThreshold)
+    audit("testcase.generate", system_type=request.systemType, count=len(test_cases))
+    return {"testCases": [test_case.to_dict() for test_case in test_cases], "duplicatesRemoved": removed}
+
+# ============================================================================
+# Lifespan hooks
+# ============================================================================
+
+async def startup(app):
+    """Create the generated-suite cache"""
+    app.state.suite_cache = TenantLRU(SUITE_CACHE_MAX_CASES) if SUITE_CACHE_MAX_CASES > 0 else None
@@ -0,0 +1,191 @@
+"""
+Request and response models shared by all routers.
+
+The ``/api/...`` routes use the models from the original ``app.py`` service.
+The ``Legacy*`` models describe the payloads of the older ``/auth``, ``/chat``
+and ``/testcases`` routes that ``src/services/api.js`` still calls.
+"""
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Any, List, Optional
+from datetime import datetime
+
+# ============================================================================
+# Health
+# ============================================================================
+
+class HealthResponse(BaseModel):
+    """Health check response model"""
+    status: str = "healthy"
+    timestamp: datetime = Field(default_factory=datetime.now)
+    service: str = "Healthcare AI Backend"
+
+# ============================================================================
+# Authentication
+# ============================================================================
+
+class LoginRequest(BaseModel):
+    """Login request model"""
+    username: str = Field(..., min_length=3, max_length=50)
+    password: str = Field(..., min_length=6, max_length=100)
+
+class SignupRequest(BaseModel):
+    """Signup request model"""
+    username: str = Field(..., min_length=3, max_length=50)
+    email: EmailStr
+    password: str = Field(..., min_length=6, max_length=100)
+    full_name: Optional[str] = Field(None, max_length=100)
+    organization: Optional[str] = Field(None, max_length=100)
+
+class UserResponse(BaseModel):
+    """User response model"""
+    username: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    created_at: str = "2024-01-01"
+
+class AccountResponse(BaseModel):
+    """User account as returned by the legacy /auth routes"""
+    id: int
+    email: str
+    username: str
+    full_name: Optional[str] = None
+    is_active: bool
+    tenant_id: Optional[int] = None
+
+class Token(BaseModel):
+    """Bearer token response"""
+    access_token: str
+    token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Refresh token to exchange for a new token pair"""
+    refresh_token: str = Field(..., min_length=1, max_length=200)
+
+class LogoutRequest(BaseModel):
+    """Logout request; the refresh token identifies the session when no bearer token is sent"""
+    refresh_token: Optional[str] = Field(None, max_length=200)
+
+# ============================================================================
+# Projects
+# ============================================================================
+
+class ProjectCreate(BaseModel):
+    """New project in the caller's tenant"""
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=2000)
+
+class ProjectResponse(BaseModel):
+    """Project as returned by /projects"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+# ============================================================================
+# Disease
+# ============================================================================
+
+class ChatRequest(BaseModel):
+    """Chat/Gemini request model"""
+    prompt: str = Field(..., min_length=5, max_length=2000)
+
+class ChatResponse(BaseModel):
+    """Chat/Gemini response model"""
+    response: str
+    timestamp: datetime = Field(default_factory=datetime.now)
+    model: str = "healthcare-ai"
+
+class LegacyChatRequest(BaseModel):
+    """Chat request sent by api.js to /chat"""
+    message: str = Field(..., min_length=1, max_length=4000)
+
+class SearchRequest(BaseModel):
+    """A disease search to add to the history"""
+    query: str = Field(..., min_length=1, max_length=200)
+
+class SearchRecorded(BaseModel):
+    """The normalized query a search was counted under"""
+    query: str
+
+class SearchHistoryItem(BaseModel):
+    """One entry of a user's search history"""
+    query: str
+    searched_at: datetime
+
+class SearchHistoryResponse(BaseModel):
+    """A user's latest distinct searches, newest first"""
+    searches: List[SearchHistoryItem]
+
+class Suggestion(BaseModel):
+    """An autocomplete suggestion and how often it was searched"""
+    query: str
+    count: int
+
+class AutocompleteResponse(BaseModel):
+    """Most searched queries for a prefix (the most popular overall for an empty prefix)"""
+    prefix: str
+    suggestions: List[Suggestion]
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+class TestCaseRequest(BaseModel):
+    """Test case generation request"""
+    requirement: str = Field(..., min_length=10, max_length=1000)
+    system_type: str = Field(..., min_length=3, max_length=50)
+    priority: str = Field(..., pattern="^(low|medium|high|critical)$")
+    compliance: List[str] = Field(default=["HIPAA"])
+    # Drop near-duplicate cases (dedup.py); the threshold defaults to DEDUP_THRESHOLD
+    dedupe: bool = False
+    dedupe_threshold: Optional[float] = Field(None, gt=0.0, le=1.0)
+
+class LegacyTestCaseRequest(BaseModel):
+    """Test case generation request sent by api.js to /testcases/generate"""
+    requirement: str = Field(..., min_length=1, max_length=1000)
+    systemType: str = Field(..., min_length=1, max_length=50)
+    priority: str = Field(..., pattern="^(low|medium|high|critical)$")
+    compliance: List[str] = Field(default=["HIPAA"])
+    # Drop near-duplicate cases (dedup.py); the threshold defaults to DEDUP_THRESHOLD
+    dedupe: bool = False
+    dedupeThreshold: Optional[float] = Field(None, gt=0.0, le=1.0)
+
+class TestCase(BaseModel):
+    """Generated test case model"""
+    title: str
+    description: str
+    priority: str
+    compliance: List[str]
+    test_steps: Optional[List[str]] = None
+
+class TestCaseResponse(BaseModel):
+    """Test case generation response"""
+    test_cases: List[TestCase]
+    requirement: str
+    duplicates_removed: int = 0
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+# ============================================================================
+# Integrations
+# ============================================================================
+
+class ExportRequest(BaseModel):
+    """Test cases to export to an external test management tool"""
+    testCases: List[TestCase]
+    requirement: Optional[str] = None
+    project: Optional[str] = None
+    # Drop near-duplicate cases (dedup.py) before formatting; the threshold defaults to DEDUP_THRESHOLD
+    dedupe: bool = False
+    dedupeThreshold: Optional[float] = Field(None, gt=0.0, le=1.0)
+
+class ExportResponse(BaseModel):
+    """Payload formatted for the target tool"""
+    target: str
+    count: int
+    items: List[Any]
+    duplicates_removed: int = 0
@@ -0,0 +1,449 @@
+"""
+Disease search history and prefix autocomplete.
+
+Searches are kept per user (``search_history`` table) and counted per
+normalized query within each tenant (``query_counts``). ``record()`` updates
+the in-memory ``PrefixIndex`` at once and only queues the database writes; a
+background task writes them in batches (history rows inserted, counts
+upserted as ``count = count + n``), the same way ``audit.AuditLog`` does.
+
+Each worker holds one index per tenant (``tenancy.TenantPartitions``), loaded
+from ``query_counts`` on the tenant's first search and topped up every
+``SEARCH_INDEX_REFRESH_S`` with counts written by other workers. One tenant's
+searches never show up in another tenant's suggestions.
+"""
+
+import asyncio
+import bisect
+import heapq
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from tenancy import PUBLIC_TENANT_ID, TenantPartitions
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEARCH_HISTORY_ENABLED = os.getenv("SEARCH_HISTORY_ENABLED", "true").lower() != "false"
+SEARCH_HISTORY_BATCH_SIZE = int(os.getenv("SEARCH_HISTORY_BATCH_SIZE", "500"))
+SEARCH_HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("SEARCH_HISTORY_FLUSH_INTERVAL_MS", "1000"))
+SEARCH_INDEX_MAX_QUERIES = int(os.getenv("SEARCH_INDEX_MAX_QUERIES", "100000"))
+SEARCH_INDEX_REFRESH_S = float(os.getenv("SEARCH_INDEX_REFRESH_S", "30"))
+AUTOCOMPLETE_TOP_K = int(os.getenv("AUTOCOMPLETE_TOP_K", "10"))
+
+MAX_QUERY_LENGTH = 100
+# Refreshes re-read this far back, so counts other workers flushed late are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+# Sorts after any character a query can contain, so prefix + _MAX_CHAR bounds a prefix range
+_MAX_CHAR = "\U0010ffff"
+
+
+def clean_query(text: str) -> str:
+    """Query as shown back to the user: single spaces, bounded length"""
+    return " ".join(text.split())[:MAX_QUERY_LENGTH]
+
+
+def normalize_query(text: str) -> str:
+    """Query as counted and indexed: lower case, single spaces, bounded length"""
+    return clean_query(text.lower())
+
+
+def normalize_prefix(text: str) -> str:
+    """Like ``normalize_query`` but keeps one trailing space ("type " completes to "type 2 ...")"""
+    normalized = normalize_query(text)
+    if normalized and text[-1:].isspace() and len(normalized) < MAX_QUERY_LENGTH:
+        normalized += " "
+    return normalized
+
+# ============================================================================
+# Prefix index
+# ============================================================================
+
+class PrefixIndex:
+    """Top-k completions by frequency over a sorted array of queries.
+
+    Queries are kept sorted, so the completions of a prefix are one contiguous
+    range found by bisection. Ranges of at most ``scan_limit`` queries are
+    ranked on the fly; every prefix with a larger range has its top ``k``
+    cached. Counts only ever grow, so an update keeps the cached lists exact
+    by promoting the query in the lists of its own prefixes. Lookups touch at
+    most ``scan_limit`` queries whatever the vocabulary size.
+    """
+
+    def __init__(self, k: int = AUTOCOMPLETE_TOP_K, max_queries: int = SEARCH_INDEX_MAX_QUERIES,
+                 scan_limit: int = 256):
+        self.k = k
+        self.max_queries = max_queries
+        self.scan_limit = scan_limit
+        self._keys: List[str] = []
+        self._counts: Dict[str, int] = {}
+        # prefix -> [(-count, query)], best first, for prefixes with large ranges
+        self._top: Dict[str, List[Tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def count(self, query: str) -> int:
+        return self._counts.get(query, 0)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self._keys, prefix)
+        return lo, bisect.bisect_left(self._keys, prefix + _MAX_CHAR, lo)
+
+    def _rank(self, lo: int, hi: int) -> List[Tuple[int, str]]:
+        counts = self._counts
+        return heapq.nsmallest(self.k, [(-counts[query], query) for query in self._keys[lo:hi]])
+
+    def build(self, items: Iterable[Tuple[str, int]]):
+        """Replace the contents with (query, count) pairs, keeping the most frequent ``max_queries``"""
+        counts = {}
+        for query, count in items:
+            counts[query] = max(count, counts.get(query, 0))
+        if len(counts) > self.max_queries:
+            counts = dict(heapq.nlargest(self.max_queries, counts.items(), key=lambda item: item[1]))
+        keys = sorted(counts)
+
+        with self._lock:
+            self._keys, self._counts, self._top = keys, counts, {}
+            # Walk down from the empty prefix one character at a time; only the
+            # children of a large range can be large themselves
+            ranges = [("", 0, len(keys))]
+            depth = 0
+            while ranges:
+                children = []
+                for prefix, lo, hi in ranges:
+                    if hi - lo <= self.scan_limit:
+                        continue
+                    self._top[prefix] = self._rank(lo, hi)
+                    i = lo
+                    while i < hi:
+                        if len(keys[i]) <= depth:
+                            i += 1
+                            continue
+                        child = keys[i][:depth + 1]
+                        j = bisect.bisect_left(keys, child + _MAX_CHAR, i, hi)
+                        children.append((child, i, j))
+                        i = j
+                ranges = children
+                depth += 1
+
+    def observe(self, query: str, count: int) -> bool:
+        """Raise the count of ``query`` to ``count``; False if it is new and the index is full"""
+        with self._lock:
+            return self._observe(query, count)
+
+    def increment(self, query: str, n: int = 1) -> bool:
+        """Add ``n`` searches of ``query``"""
+        with self._lock:
+            return self._observe(query, self._counts.get(query, 0) + n)
+
+    def _observe(self, query: str, count: int) -> bool:
+        """``observe`` without taking the lock"""
+        current = self._counts.get(query)
+        if current is None:
+            if len(self._keys) >= self.max_queries:
+                return False
+            self._counts[query] = count
+            bisect.insort(self._keys, query)
+            # Only prefixes of the new query can have outgrown the scan limit
+            for length in range(len(query) + 1):
+                prefix = query[:length]
+                if prefix in self._top:
+                    continue
+                lo, hi = self._range(prefix)
+                if hi - lo <= self.scan_limit:
+                    break
+                self._top[prefix] = self._rank(lo, hi)
+        elif count <= current:
+            return True
+        else:
+            self._counts[query] = count
+
+        key = (-count, query)
+        for length in range(len(query) + 1):
+            top = self._top.get(query[:length])
+            if top is not None:
+                self._promote(top, key)
+        return True
+
+    def _promote(self, top: List[Tuple[int, str]], key: Tuple[int, str]):
+        query = key[1]
+        for i, (_, existing) in enumerate(top):
+            if existing == query:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.k and key >= top[-1]:
+                return
+        bisect.insort(top, key)
+        if len(top) > self.k:
+            top.pop()
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """The most searched queries starting with ``prefix`` (normalized), as (query, count)"""
+        limit = self.k if limit is None else min(limit, self.k)
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._rank(*self._range(prefix))
+            return [(query, -negative) for negative, query in top[:limit]]
+
+# ============================================================================
+# History store
+# ============================================================================
+
+class SearchHistory:
+    """Per-user search history and per-tenant query counts with batched writes"""
+
+    def __init__(self, engine=None, max_queries: int = SEARCH_INDEX_MAX_QUERIES,
+                 batch_size: int = SEARCH_HISTORY_BATCH_SIZE,
+                 flush_interval_ms: float = SEARCH_HISTORY_FLUSH_INTERVAL_MS,
+                 refresh_interval_s: float = SEARCH_INDEX_REFRESH_S):
+        self.engine = engine
+        self.max_queries = max_queries
+        # One index per tenant, loaded from query_counts on first use
+        self.indexes = TenantPartitions(self.load)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.refresh_interval = refresh_interval_s
+        # Pending writes: history rows and per-(tenant, query) (increment, last searched)
+        self._rows: List[Tuple[int, str, str, datetime]] = []
+        self._counts: Dict[Tuple[int, str], Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._synced_at: Optional[datetime] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.failed_batches = 0
+
+    def record(self, query: str, username: Optional[str] = None,
+               tenant_id: int = PUBLIC_TENANT_ID) -> Optional[str]:
+        """Count a search (and add it to the user's history); returns the normalized query"""
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        index = self.indexes.get(tenant_id)
+        now = datetime.utcnow()
+        with self._lock:
+            if username:
+                self._rows.append((tenant_id, username, clean_query(query), now))
+            pending = self._counts.get((tenant_id, normalized))
+            self._counts[tenant_id, normalized] = ((pending[0] if pending else 0) + 1, now)
+            waiting = len(self._rows) + len(self._counts)
+        index.increment(normalized)
+        self.recorded += 1
+        if waiting >= self.batch_size and self._wake is not None and not self._wake.is_set():
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return normalized
+
+    def complete(self, prefix: str, limit: Optional[int] = None,
+                 tenant_id: int = PUBLIC_TENANT_ID) -> List[Tuple[str, int]]:
+        return self.indexes.get(tenant_id).complete(normalize_prefix(prefix), limit)
+
+    def recent(self, username: str, limit: int = 10,
+               tenant_id: int = PUBLIC_TENANT_ID) -> List[Tuple[str, datetime]]:
+        """The user's latest distinct searches, newest first, including unwritten ones"""
+        from sqlalchemy import func, select
+        from database import SearchHistory as SearchHistoryRow
+
+        latest: Dict[str, datetime] = {}
+        with self._lock:
+            for row_tenant_id, row_username, query, searched_at in self._rows:
+                if row_tenant_id == tenant_id and row_username == username:
+                    latest[query] = searched_at
+        last = func.max(SearchHistoryRow.created_at)
+        statement = (
+            select(SearchHistoryRow.query, last)
+            .where(SearchHistoryRow.tenant_id == tenant_id, SearchHistoryRow.username == username)
+            .group_by(SearchHistoryRow.query).order_by(last.desc()).limit(limit)
+        )
+        with self.engine.connect() as connection:
+            for query, searched_at in connection.execute(statement):
+                if query not in latest:
+                    latest[query] = searched_at
+        return sorted(latest.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def clear(self, username: str, tenant_id: int = PUBLIC_TENANT_ID) -> int:
+        """Delete the user's history (query counts are kept); returns rows removed"""
+        from sqlalchemy import delete
+        from database import SearchHistory as SearchHistoryRow
+
+        # Holding the flush lock keeps an in-flight batch from re-adding rows afterwards
+        with self._flush_lock:
+            with self._lock:
+                kept = [row for row in self._rows if row[:2] != (tenant_id, username)]
+                removed = len(self._rows) - len(kept)
+                self._rows = kept
+            with self.engine.begin() as connection:
+                result = connection.execute(delete(SearchHistoryRow).where(
+                    SearchHistoryRow.tenant_id == tenant_id, SearchHistoryRow.username == username
+                ))
+        return removed + result.rowcount
+
+    # Writer ---------------------------------------------------------------
+
+    def _upsert_counts(self, connection):
+        from database import QueryCount
+
+        if connection.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(QueryCount)
+        return statement.on_conflict_do_update(
+            index_elements=[QueryCount.tenant_id, QueryCount.query],
+            set_={"count": QueryCount.count + statement.excluded.count,
+                  "last_searched_at": statement.excluded.last_searched_at},
+        )
+
+    def flush(self) -> int:
+        """Write pending rows and count increments in one transaction; returns rows written"""
+        from database import SearchHistory as SearchHistoryRow
+
+        with self._flush_lock:
+            with self._lock:
+                rows, counts = self._rows, self._counts
+                self._rows, self._counts = [], {}
+            if not rows and not counts:
+                return 0
+            try:
+                with self.engine.begin() as connection:
+                    if rows:
+                        connection.execute(SearchHistoryRow.__table__.insert(), [
+                            {"tenant_id": tenant_id, "username": username, "query": query,
+                             "created_at": searched_at}
+                            for tenant_id, username, query, searched_at in rows
+                        ])
+                    if counts:
+                        connection.execute(self._upsert_counts(connection), [
+                            {"tenant_id": tenant_id, "query": query, "count": n,
+                             "last_searched_at": searched_at}
+                            for (tenant_id, query), (n, searched_at) in counts.items()
+                        ])
+            except Exception as e:
+                # Merge the batch back in front of anything recorded meanwhile
+                self.failed_batches += 1
+                with self._lock:
+                    self._rows = rows + self._rows
+                    for key, (n, searched_at) in self._counts.items():
+                        pending = counts.get(key)
+                        counts[key] = ((pending[0] if pending else 0) + n, searched_at)
+                    self._counts = counts
+                logger.error(f"Search history flush failed, {len(rows) + len(counts)} writes kept for retry: {str(e)}")
+                return 0
+        written = len(rows) + len(counts)
+        self.written += written
+        return written
+
+    def load(self, tenant_id: int = PUBLIC_TENANT_ID) -> PrefixIndex:
+        """Build a tenant's index from its most searched queries (plus unwritten ones)"""
+        from sqlalchemy import select
+        from database import QueryCount
+
+        statement = (
+            select(QueryCount.query, QueryCount.count).where(QueryCount.tenant_id == tenant_id)
+            .order_by(QueryCount.count.desc()).limit(self.max_queries)
+        )
+        with self.engine.connect() as connection:
+            counts = dict(connection.execute(statement).all())
+        with self._lock:
+            for (pending_tenant_id, query), (n, _) in self._counts.items():
+                if pending_tenant_id == tenant_id:
+                    counts[query] = counts.get(query, 0) + n
+        index = PrefixIndex(max_queries=self.max_queries)
+        index.build(counts.items())
+        return index
+
+    def refresh(self) -> int:
+        """Pick up counts other workers wrote since the last refresh, for loaded indexes"""
+        from sqlalchemy import select
+        from database import QueryCount
+
+        started = datetime.utcnow()
+        indexes = dict(self.indexes.items())
+        if not indexes:
+            self._synced_at = started
+            return 0
+        statement = select(QueryCount.tenant_id, QueryCount.query, QueryCount.count).where(
+            QueryCount.tenant_id.in_(list(indexes))
+        )
+        if self._synced_at is not None:
+            # Observing a count twice is harmless, missing one is not
+            statement = statement.where(QueryCount.last_searched_at >= self._synced_at - REFRESH_OVERLAP)
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        for tenant_id, query, count in rows:
+            indexes[tenant_id].observe(query, count)
+        self._synced_at = started
+        return len(rows)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        refreshed = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await loop.run_in_executor(None, self.flush)
+                if time.monotonic() - refreshed >= self.refresh_interval:
+                    refreshed = time.monotonic()
+                    await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                logger.error(f"Search index refresh failed: {str(e)}")
+
+    async def start(self):
+        """Load the public index and start the background writer (the tables come from database.init_db)"""
+        if self.engine is None:
+            from database import engine
+            self.engine = engine
+
+        def prepare():
+            self._synced_at = datetime.utcnow()
+            return self.indexes.get(PUBLIC_TENANT_ID)
+
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(None, prepare)
+        logger.info(f"Search index loaded with {len(index)} public queries")
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        if self.engine is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._rows) + len(self._counts)
+        indexes = self.indexes.items()
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "pending": pending,
+            "indexed_tenants": len(indexes),
+            "indexed_queries": sum(len(index) for _, index in indexes),
+            "failed_batches": self.failed_batches,
+        }
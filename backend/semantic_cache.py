@@ -0,0 +1,497 @@
+"""
+Semantic cache for disease questions.
+
+Prompts are embedded as hashed bag-of-words vectors (CPU only, no
+model download), so paraphrases such as "what are diabetes symptoms" and
+"symptoms of diabetes" map to the same vector. Vectors are kept in a NumPy
+matrix and indexed with random-hyperplane LSH: each of ``n_tables`` tables
+stores an ``n_bits`` signature per row, kept sorted so a lookup is a handful
+of ``searchsorted`` calls plus a cosine rescoring of the few candidates.
+
+A candidate is a hit when its cosine similarity reaches ``threshold`` and
+neither prompt contains an *informative* word the other lacks (a word that
+appears in fewer than ``informative_ratio`` of cached prompts). This stops
+long templated prompts that differ only in the disease name from matching.
+Each row also keeps the full 32-bit hashes of up to ``MAX_WORDS`` of its
+rarest words, so two words that collide in the vector are still told apart.
+
+``max_entries`` caps the number of cached prompts (a tenant's quota, see
+``tenancy.py``) and ``shared_room``, when given, reports what is left of a
+budget shared with other caches; once either runs out new answers are not
+admitted and are counted in ``rejected``.
+
+Lookups and inserts may run concurrently in worker threads (the async
+routes call them through the threadpool): inserts are serialised by a lock,
+and lookups read an immutable ``_SegmentView`` that a segment replaces as a
+whole after each append or index rebuild, so they never see half-updated
+arrays.
+
+With a ``path``, the cache lives in memory-mapped files and survives
+restarts. Only one process may write them (an exclusive ``flock``); other
+processes open the files read-only and keep their new entries in memory.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import zlib
+import logging
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no
+nor not now of off on once only or other our out over own same she should so some such than that
+the their them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your please tell know explain give
+""".split())
+
+# Word hashes stored per cached prompt for the informative-word check
+MAX_WORDS = 16
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case content words with a light plural/suffix stemmer"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class HashingEmbedder:
+    """Feature hashing of content words into a unit vector"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Unit vector plus the 32-bit hash of every distinct word"""
+        # Unsigned counts: signed hashing can cancel a short prompt to zero
+        counts = {}
+        words = set()
+        for token in tokenize(text):
+            h = zlib.crc32(token.encode()) or 1  # 0 marks an empty word slot
+            index = h % self.dim
+            counts[index] = counts.get(index, 0.0) + 1.0
+            words.add(h)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if counts:
+            indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            # Sublinear term frequency
+            vector[indices] = 1.0 + np.log(values)
+            vector /= np.linalg.norm(vector)
+        return vector, np.fromiter(words, dtype=np.uint32, count=len(words))
+
+
+class _SegmentView(NamedTuple):
+    """A consistent snapshot of a segment's arrays, row count and index, for lookups"""
+    vectors: np.ndarray
+    words: np.ndarray
+    signatures: np.ndarray
+    answer_ids: np.ndarray
+    count: int
+    order: np.ndarray
+    sorted_signatures: np.ndarray
+    indexed: int
+
+    def candidates(self, signature: np.ndarray, limit: int) -> np.ndarray:
+        """Rows sharing at least one LSH bucket with ``signature``"""
+        found = []
+        for table in range(len(self.order)):
+            keys = self.sorted_signatures[table]
+            lo = np.searchsorted(keys, signature[table], side="left")
+            hi = np.searchsorted(keys, signature[table], side="right")
+            if hi > lo:
+                found.append(self.order[table, lo:min(hi, lo + limit)])
+        if self.count > self.indexed:
+            tail = np.asarray(self.signatures[self.indexed:self.count])
+            matches = np.flatnonzero((tail == signature).any(axis=1))
+            if len(matches):
+                found.append((matches + self.indexed).astype(np.int32))
+        if not found:
+            return np.zeros(0, dtype=np.int32)
+        rows = np.unique(np.concatenate(found))
+        return rows[:limit]
+
+
+class _Segment:
+    """Append-only rows of (vector, word hashes, LSH signature, answer id) with a sorted LSH index.
+
+    Rows are added to an unsorted tail that is scanned linearly; once the
+    tail grows past ``rebuild_fraction`` of the segment the sorted index is
+    rebuilt. Readers use ``view``, which is replaced (never modified) once
+    the rows and the index it describes are complete.
+    """
+
+    def __init__(self, dim: int, n_tables: int, capacity: int, directory: Optional[str] = None,
+                 mode: Optional[str] = None, count: int = 0, rebuild_fraction: float = 0.05):
+        self.dim = dim
+        self.n_tables = n_tables
+        self.directory = directory
+        self.mode = mode
+        self.count = count
+        self.rebuild_fraction = rebuild_fraction
+        self.capacity = 0
+        self._allocate(max(capacity, count, 16))
+        self.rebuild_index()
+
+    # Storage ------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self, name: str, dtype, shape):
+        if self.directory is None:
+            return np.zeros(shape, dtype=dtype)
+        path = self._file(name)
+        if self.mode == "r":
+            return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _allocate(self, capacity: int):
+        old = (self.vectors, self.words, self.signatures, self.answer_ids) if self.capacity else None
+        if old is not None and self.directory is not None:
+            for array in old:
+                array.flush()
+            old = None  # the file already holds the data; it is remapped below
+        # Filled before they are swapped in; the current view keeps the old arrays
+        arrays = (
+            self._open("vectors.f16", np.float16, (capacity, self.dim)),
+            self._open("words.u32", np.uint32, (capacity, MAX_WORDS)),
+            self._open("signatures.u16", np.uint16, (capacity, self.n_tables)),
+            self._open("answer_ids.i32", np.int32, (capacity,)),
+        )
+        if old is not None:
+            for new_array, old_array in zip(arrays, old):
+                new_array[:self.count] = old_array[:self.count]
+        self.vectors, self.words, self.signatures, self.answer_ids = arrays
+        self.capacity = capacity
+
+    def append(self, vectors: np.ndarray, words: np.ndarray, signatures: np.ndarray, answer_ids: np.ndarray):
+        if self.mode == "r":
+            raise RuntimeError("segment is read-only")
+        needed = self.count + len(vectors)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._allocate(capacity)
+        self.vectors[self.count:needed] = vectors
+        self.words[self.count:needed] = words
+        self.signatures[self.count:needed] = signatures
+        self.answer_ids[self.count:needed] = answer_ids
+        self.count = needed
+        if needed - self.indexed > max(1024, self.rebuild_fraction * needed):
+            self.rebuild_index()
+        else:
+            self._publish()
+
+    def flush(self):
+        if self.directory is not None and self.mode != "r":
+            for array in (self.vectors, self.words, self.signatures, self.answer_ids):
+                array.flush()
+
+    # Index --------------------------------------------------------------
+
+    def rebuild_index(self):
+        n = self.count
+        signatures = np.asarray(self.signatures[:n])
+        orders = np.empty((self.n_tables, n), dtype=np.int32)
+        sorted_signatures = np.empty((self.n_tables, n), dtype=np.uint16)
+        for table in range(self.n_tables):
+            order = np.argsort(signatures[:, table], kind="stable").astype(np.int32)
+            orders[table] = order
+            sorted_signatures[table] = signatures[order, table]
+        self.order, self.sorted_signatures, self.indexed = orders, sorted_signatures, n
+        self._publish()
+
+    def _publish(self):
+        self.view = _SegmentView(self.vectors, self.words, self.signatures, self.answer_ids, self.count,
+                                 self.order, self.sorted_signatures, self.indexed)
+
+
+class _AnswerStore:
+    """Answer texts by id: an append-only blob file plus offsets, or a list in memory"""
+
+    def __init__(self, directory: Optional[str] = None, writable: bool = True, count: int = 0):
+        self.directory = directory
+        self.writable = writable
+        self.extra: List[str] = []
+        self._ids = {}
+        self.base_count = 0
+        self.offsets: List[int] = []
+        if directory is not None:
+            offsets_path = os.path.join(directory, "answer_offsets.i64")
+            if os.path.exists(offsets_path):
+                self.offsets = np.fromfile(offsets_path, dtype=np.int64)[:count + 1].tolist()
+            if not self.offsets:
+                self.offsets = [0]
+            self.base_count = len(self.offsets) - 1
+            mode = "a+b" if writable else "rb"
+            self._blob = open(os.path.join(directory, "answers.bin"), mode)
+            self._offsets_file = open(offsets_path, "ab") if writable else None
+            if writable and os.path.getsize(offsets_path) == 0:
+                self._offsets_file.write(np.array([0], dtype=np.int64).tobytes())
+
+    def __len__(self):
+        return self.base_count + len(self.extra)
+
+    def add(self, answer: str) -> int:
+        """Store ``answer`` (deduplicated within this process) and return its id"""
+        key = hash(answer)
+        existing = self._ids.get(key)
+        if existing is not None and self.get(existing) == answer:
+            return existing
+        if self.directory is not None and self.writable:
+            data = answer.encode()
+            self._blob.seek(0, os.SEEK_END)
+            self._blob.write(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+            self._offsets_file.write(np.array([self.offsets[-1]], dtype=np.int64).tobytes())
+            answer_id = self.base_count
+            self.base_count += 1
+        else:
+            answer_id = len(self)
+            self.extra.append(answer)
+        self._ids[key] = answer_id
+        return answer_id
+
+    def get(self, answer_id: int) -> str:
+        if answer_id >= self.base_count:
+            return self.extra[answer_id - self.base_count]
+        start, end = self.offsets[answer_id], self.offsets[answer_id + 1]
+        if self.writable:
+            self._blob.flush()
+        return os.pread(self._blob.fileno(), end - start, start).decode()
+
+    def flush(self):
+        if self.directory is not None and self.writable:
+            self._blob.flush()
+            self._offsets_file.flush()
+
+    def close(self):
+        if self.directory is not None:
+            self._blob.close()
+            if self._offsets_file:
+                self._offsets_file.close()
+
+
+class SemanticCache:
+    """Approximate prompt -> answer cache backed by hashed embeddings and LSH"""
+
+    def __init__(self, path: Optional[str] = None, dim: int = 256, threshold: float = 0.85,
+                 n_tables: int = 8, n_bits: int = 12, informative_ratio: float = 0.2,
+                 capacity: int = 4096, max_candidates: int = 2048, seed: int = 1234,
+                 max_entries: Optional[int] = None, shared_room: Optional[Callable[[], int]] = None):
+        if n_bits > 16:
+            raise ValueError("n_bits must be at most 16")
+        self.path = path
+        self.max_entries = max_entries
+        self.shared_room = shared_room
+        self.closed = False
+        self.rejected = 0
+        self.threshold = threshold
+        self.informative_ratio = informative_ratio
+        self.max_candidates = max_candidates
+        self.embedder = HashingEmbedder(dim)
+        self._lock = threading.Lock()
+        self._lock_file = None
+
+        meta = self._read_meta() if path else None
+        if meta:
+            dim, n_tables, n_bits, seed = meta["dim"], meta["n_tables"], meta["n_bits"], meta["seed"]
+            self.embedder = HashingEmbedder(dim)
+        self.dim, self.n_tables, self.n_bits, self.seed = dim, n_tables, n_bits, seed
+
+        rng = np.random.default_rng(seed)
+        self.hyperplanes = rng.standard_normal((dim, n_tables * n_bits)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(n_bits, dtype=np.uint32)).astype(np.uint32)
+
+        count = meta["count"] if meta else 0
+        self.document_frequency = np.array(meta["df"] if meta else np.zeros(dim), dtype=np.int64)
+
+        self.writable = True
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.writable = self._try_lock()
+            mode = "r+" if self.writable else "r"
+            base = _Segment(dim, n_tables, capacity, directory=path, mode=mode, count=count)
+            self.segments = [base] if self.writable else [base, _Segment(dim, n_tables, capacity)]
+            self.answers = _AnswerStore(path, writable=self.writable, count=meta["answers"] if meta else 0)
+            if not self.writable:
+                logger.info(f"Semantic cache {path} is owned by another process; new entries stay in memory")
+        else:
+            self.segments = [_Segment(dim, n_tables, capacity)]
+            self.answers = _AnswerStore()
+
+    # Persistence ----------------------------------------------------------
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != FORMAT_VERSION:
+            logger.warning(f"Ignoring semantic cache {self.path} with unknown format")
+            return None
+        return meta
+
+    def _try_lock(self) -> bool:
+        self._lock_file = open(os.path.join(self.path, "lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def flush(self):
+        """Persist the row count and word statistics (no-op without a writable path)"""
+        if not self.path or not self.writable:
+            return
+        with self._lock:
+            segment = self.segments[0]
+            segment.flush()
+            self.answers.flush()
+            meta = {
+                "version": FORMAT_VERSION,
+                "dim": self.dim,
+                "n_tables": self.n_tables,
+                "n_bits": self.n_bits,
+                "seed": self.seed,
+                "count": segment.count,
+                "answers": len(self.answers),
+                "df": self.document_frequency.tolist(),
+            }
+            tmp_path = os.path.join(self.path, "meta.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def close(self):
+        """Persist, then release the files and the write lock; later calls miss"""
+        if self.closed:
+            return
+        self.flush()
+        with self._lock:
+            self.closed = True
+            self.answers.close()
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # Cache operations -----------------------------------------------------
+
+    def __len__(self):
+        return sum(segment.count for segment in self.segments)
+
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        bits = (vectors @ self.hyperplanes > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        return (bits.astype(np.uint32) @ self._bit_weights).astype(np.uint16)
+
+    def _vetoed(self, query: np.ndarray, query_words: np.ndarray,
+                vectors: np.ndarray, words: np.ndarray) -> np.ndarray:
+        """Rows where one side has an informative word the other lacks"""
+        informative = self.document_frequency < self.informative_ratio * len(self)
+        query_indices = (query_words % self.dim).astype(np.int64)
+        stored = (words[:, None, :] == query_words[None, :, None]).any(axis=2)
+        # Rows with every slot used may have dropped common words; fall back to the vector
+        truncated = (words != 0).all(axis=1)
+        present = stored | (truncated[:, None] & (vectors[:, query_indices] != 0))
+        query_only = (~present & informative[query_indices]).any(axis=1)
+
+        unmatched = (words != 0) & ~np.isin(words, query_words)
+        candidate_only = (unmatched & informative[(words % self.dim).astype(np.int64)]).any(axis=1)
+        candidate_only |= ((vectors != 0) & (query == 0) & informative).any(axis=1)
+        return query_only | candidate_only
+
+    def get(self, prompt: str, threshold: Optional[float] = None) -> Optional[str]:
+        """Return the cached answer for a prompt similar enough to ``prompt`` (``threshold`` overrides)"""
+        if self.closed:
+            return None
+        query, query_words = self.embedder.embed(prompt)
+        if not query.any() or len(self) == 0:
+            return None
+        signature = self._signatures(query[None, :])[0]
+
+        best_score, best_answer = self.threshold if threshold is None else threshold, None
+        for view in [segment.view for segment in self.segments]:
+            rows = view.candidates(signature, self.max_candidates)
+            if not len(rows):
+                continue
+            vectors = np.asarray(view.vectors[rows], dtype=np.float32)
+            scores = vectors @ query
+            scores[self._vetoed(query, query_words, vectors, np.asarray(view.words[rows]))] = -1.0
+            top = int(np.argmax(scores))
+            if scores[top] >= best_score:
+                best_score = float(scores[top])
+                best_answer = int(view.answer_ids[rows[top]])
+        if best_answer is None:
+            return None
+        try:
+            return self.answers.get(best_answer)
+        except ValueError:
+            # Closed by an eviction while this lookup ran
+            return None
+
+    def put(self, prompt: str, answer: str):
+        """Cache ``answer`` for ``prompt``"""
+        self.put_many([prompt], [answer])
+
+    def put_many(self, prompts: Iterable[str], answers: Iterable[str]):
+        """Cache several prompt/answer pairs with one index update"""
+        vectors, words, answer_ids = [], [], []
+        with self._lock:
+            if self.closed:
+                return
+            room = None if self.max_entries is None else self.max_entries - len(self)
+            if self.shared_room is not None:
+                shared = self.shared_room()
+                room = shared if room is None else min(room, shared)
+            for prompt, answer in zip(prompts, answers):
+                if room is not None and len(vectors) >= room:
+                    self.rejected += 1
+                    continue
+                vector, prompt_words = self.embedder.embed(prompt)
+                if not vector.any():
+                    continue
+                vectors.append(vector)
+                if len(prompt_words) > MAX_WORDS:
+                    frequency = self.document_frequency[(prompt_words % self.dim).astype(np.int64)]
+                    prompt_words = prompt_words[np.argsort(frequency, kind="stable")[:MAX_WORDS]]
+                row = np.zeros(MAX_WORDS, dtype=np.uint32)
+                row[:len(prompt_words)] = prompt_words
+                words.append(row)
+                answer_ids.append(self.answers.add(answer))
+                self.document_frequency[np.flatnonzero(vector)] += 1
+            if not vectors:
+                return
+            matrix = np.vstack(vectors)
+            self.segments[-1].append(
+                matrix.astype(np.float16), np.vstack(words),
+                self._signatures(matrix), np.array(answer_ids, dtype=np.int32),
+            )
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Production launcher: a preforking master running several uvicorn workers.
+
+The master imports the application once, runs database setup once, binds the
+listening socket and then forks the workers. Everything loaded before the
+fork (FastAPI, the routers, the disease catalog and test-case templates) is
+shared copy-on-write; ``gc.freeze()`` moves it out of the collector's reach so
+garbage collection in a worker does not touch, and therefore copy, those
+pages. Per-worker state (DB connections, rate limiters, readiness probe) is
+created after the fork by the application lifespan.
+
+Signals sent to the master:
+    SIGTERM / SIGINT   graceful shutdown of all workers
+    SIGHUP             rolling restart (one worker at a time, no capacity drop)
+    SIGUSR1            log RSS/PSS of every worker
+
+Workers exit after ``--max-requests`` (plus jitter) requests and are replaced,
+which bounds the effect of slow leaks.
+
+Usage (from backend/):
+    python serve.py --workers 4 --port 8000 --max-requests 10000
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+logger = logging.getLogger("serve")
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY, or the number of CPUs this process may run on"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """RSS and PSS in kB from /proc (Linux only; empty elsewhere)"""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Dirty"):
+                    usage[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+class Master:
+    """Forks, supervises and recycles uvicorn worker processes"""
+
+    def __init__(self, app_ref: str, host: str, port: int, workers: int, max_requests: int,
+                 max_requests_jitter: int, graceful_timeout: float, log_level: str):
+        self.app_ref = app_ref
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.app = None
+        self.socket: Optional[socket.socket] = None
+        self._shutdown = False
+        self._reload = False
+        self._report = False
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def preload(self):
+        """Import the app and shared data once, before any fork"""
+        # The master creates the schema; workers must not race to do it again
+        os.environ["DB_INIT_ON_STARTUP"] = "false"
+
+        module_name, _, attribute = self.app_ref.partition(":")
+        module = importlib.import_module(module_name)
+        self.app = getattr(module, attribute or "app")
+
+        from app import DATABASE_ROUTERS
+
+        router_names = getattr(self.app.state, "router_names", [])
+        if DATABASE_ROUTERS.intersection(router_names):
+            from database import engine, init_db
+
+            init_db()
+            if "auth" in router_names:
+                from routers.auth import SEED_DEMO_USERS, seed_demo_users
+
+                if SEED_DEMO_USERS:
+                    seed_demo_users()
+            # Connections must never be shared across a fork
+            engine.dispose()
+
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.socket = sock
+        logger.info(f"Listening on http://{self.host}:{self.port} with {self.num_workers} workers")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        # Child
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            self.run_worker()
+        except BaseException:
+            logger.exception("Worker crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def run_worker(self):
+        import uvicorn
+
+        random.seed()
+        limit = None
+        if self.max_requests:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+            lifespan="on",
+        )
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def reap(self):
+        """Collect exited workers"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is not None and not self._shutdown:
+                code = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+                logger.info(f"Worker {pid} exited ({code}) after {time.monotonic() - started:.0f}s")
+
+    def wait_for(self, pid: int, timeout: float):
+        """Wait for one worker to exit, killing it after ``timeout`` seconds"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            logger.warning(f"Worker {pid} did not stop in {timeout:.0f}s, killing")
+            self.kill(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.workers.pop(pid, None)
+
+    def kill(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def spawn_missing(self):
+        while len(self.workers) < self.num_workers and not self._shutdown:
+            # Avoid a tight crash loop if workers die straight after starting
+            recent = [started for started in self.workers.values() if time.monotonic() - started < 1]
+            if len(recent) >= self.num_workers:
+                time.sleep(1)
+            self.spawn()
+
+    def rolling_restart(self):
+        """Replace each worker in turn, starting the new one before stopping the old"""
+        logger.info("Rolling restart")
+        for pid in list(self.workers):
+            if self._shutdown:
+                return
+            self.spawn()
+            self.kill(pid, signal.SIGTERM)
+            self.wait_for(pid, self.graceful_timeout)
+
+    def report_memory(self):
+        for pid in sorted(self.workers):
+            usage = memory_usage(pid)
+            logger.info(f"Worker {pid}: RSS {usage.get('Rss', 0)} kB, PSS {usage.get('Pss', 0)} kB, "
+                        f"private dirty {usage.get('Private_Dirty', 0)} kB")
+
+    def stop(self):
+        logger.info("Shutting down workers")
+        for pid in list(self.workers):
+            self.kill(pid, signal.SIGTERM)
+        for pid in list(self.workers):
+            self.wait_for(pid, self.graceful_timeout)
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+
+    def handle_signal(self, signum, frame):
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self._shutdown = True
+        elif signum == signal.SIGHUP:
+            self._reload = True
+        elif signum == signal.SIGUSR1:
+            self._report = True
+
+    def run(self):
+        self.preload()
+        self.bind()
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, self.handle_signal)
+
+        self.spawn_missing()
+        while not self._shutdown:
+            time.sleep(0.5)
+            self.reap()
+            if self._reload:
+                self._reload = False
+                self.rolling_restart()
+            if self._report:
+                self._report = False
+                self.report_memory()
+            self.spawn_missing()
+
+        self.stop()
+        self.socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend with preforked uvicorn workers")
+    parser.add_argument("--app", default="app:app", help="application as module:attribute (default app:app)")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "10000")),
+                        help="recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+                        help="random extra requests so workers do not recycle together")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="seconds a worker may take to finish in-flight requests")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py requires a platform with fork(); use uvicorn directly instead")
+
+    Master(
+        args.app, args.host, args.port, args.workers, args.max_requests,
+        args.max_requests_jitter, args.graceful_timeout, args.log_level,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Refresh-token sessions.
+
+Login starts a session: a short-lived JWT access token carrying the session
+id (``sid``) and the user's tenant (``tid``) plus an opaque refresh token. Only the SHA-256 hash of a refresh
+token is stored (``refresh_tokens`` table). Every ``/auth/refresh`` rotates
+it: the presented token is marked used and a new one is issued whose expiry
+slides forward by ``REFRESH_TOKEN_IDLE_DAYS``, capped at
+``REFRESH_TOKEN_MAX_DAYS`` after login. Presenting an already-rotated token
+means it was copied, so the whole session is revoked.
+
+Revoked sessions are kept in ``auth.REVOKED_SESSIONS``, which
+``verify_token`` consults without touching the database. A background task
+loads revocations made by other workers every ``SESSION_SYNC_INTERVAL_S``
+and deletes expired tokens every ``SESSION_COMPACT_INTERVAL_S``.
+"""
+
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+from auth import ACCESS_TOKEN_EXPIRE_MINUTES, REVOKED_SESSIONS, create_access_token
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_IDLE_DAYS = float(os.getenv("REFRESH_TOKEN_IDLE_DAYS", "7"))
+REFRESH_TOKEN_MAX_DAYS = float(os.getenv("REFRESH_TOKEN_MAX_DAYS", "30"))
+SESSION_SYNC_INTERVAL_S = float(os.getenv("SESSION_SYNC_INTERVAL_S", "5"))
+SESSION_COMPACT_INTERVAL_S = float(os.getenv("SESSION_COMPACT_INTERVAL_S", "3600"))
+
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def hash_token(token: str) -> str:
+    """Refresh tokens are 256 random bits, so a plain SHA-256 is enough (no salt or bcrypt)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore:
+    """Issues, rotates and revokes refresh-token sessions"""
+
+    def __init__(self, engine=None, idle: timedelta = timedelta(days=REFRESH_TOKEN_IDLE_DAYS),
+                 max_age: timedelta = timedelta(days=REFRESH_TOKEN_MAX_DAYS),
+                 sync_interval_s: float = SESSION_SYNC_INTERVAL_S,
+                 compact_interval_s: float = SESSION_COMPACT_INTERVAL_S,
+                 revoked=REVOKED_SESSIONS):
+        self.engine = engine
+        self.idle = idle
+        self.max_age = max_age
+        self.sync_interval = sync_interval_s
+        self.compact_interval = compact_interval_s
+        self.revoked = revoked
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _insert(self, connection, session_id: str, username: str, started: datetime, now: datetime) -> str:
+        from database import RefreshToken
+
+        token = secrets.token_urlsafe(32)
+        connection.execute(RefreshToken.__table__.insert().values(
+            token_hash=hash_token(token),
+            session_id=session_id,
+            username=username,
+            created_at=now,
+            session_started_at=started,
+            expires_at=min(now + self.idle, started + self.max_age),
+        ))
+        return token
+
+    @staticmethod
+    def _access_token(username: str, session_id: str, tenant_id: Optional[int]) -> str:
+        claims = {"sub": username, "sid": session_id}
+        if tenant_id is not None:
+            claims["tid"] = tenant_id
+        return create_access_token(data=claims)
+
+    def issue(self, username: str, tenant_id: Optional[int] = None) -> Tuple[str, str]:
+        """Start a session; returns (access token, refresh token)"""
+        session_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            refresh_token = self._insert(connection, session_id, username, now, now)
+        return self._access_token(username, session_id, tenant_id), refresh_token
+
+    def rotate(self, refresh_token: str) -> Optional[Tuple[str, str, str]]:
+        """Swap a refresh token for a new pair; returns (username, access, refresh) or None.
+
+        The session is revoked if its user has since been deleted or deactivated.
+        """
+        from sqlalchemy import select, update
+        from database import RefreshToken, User
+
+        token_hash = hash_token(refresh_token)
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            row = connection.execute(
+                select(RefreshToken.session_id, RefreshToken.username, RefreshToken.session_started_at,
+                       RefreshToken.expires_at, RefreshToken.rotated_at, RefreshToken.revoked_at)
+                .where(RefreshToken.token_hash == token_hash)
+            ).first()
+            if row is None or row.revoked_at is not None or row.expires_at <= now:
+                return None
+            if row.rotated_at is not None:
+                logger.warning(f"Refresh token reused, revoking session of user {row.username}")
+                self._revoke_session(connection, row.session_id, now)
+                return None
+            user = connection.execute(
+                select(User.tenant_id, User.is_active).where(User.username == row.username)
+            ).first()
+            if user is None or not user.is_active:
+                logger.warning(f"Refresh for a deleted or deactivated user {row.username}, revoking session")
+                self._revoke_session(connection, row.session_id, now)
+                return None
+            # Only one of two concurrent refreshes with the same token gets through
+            claimed = connection.execute(
+                update(RefreshToken)
+                .where(RefreshToken.token_hash == token_hash, RefreshToken.rotated_at.is_(None))
+                .values(rotated_at=now)
+            ).rowcount
+            if not claimed:
+                return None
+            new_token = self._insert(connection, row.session_id, row.username, row.session_started_at, now)
+        return row.username, self._access_token(row.username, row.session_id, user.tenant_id), new_token
+
+    def _revoke_session(self, connection, session_id: str, now: datetime):
+        from sqlalchemy import update
+        from database import RefreshToken
+
+        connection.execute(
+            update(RefreshToken)
+            .where(RefreshToken.session_id == session_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+        self.revoked.revoke(session_id, now)
+
+    def revoke(self, session_id: Optional[str] = None, refresh_token: Optional[str] = None) -> bool:
+        """End a session, by id or by any of its refresh tokens; False if it is unknown"""
+        from sqlalchemy import select
+        from database import RefreshToken
+
+        now = datetime.utcnow()
+        with self.engine.begin() as connection:
+            if session_id is None and refresh_token is not None:
+                session_id = connection.execute(
+                    select(RefreshToken.session_id).where(RefreshToken.token_hash == hash_token(refresh_token))
+                ).scalar()
+            if session_id is None:
+                return False
+            self._revoke_session(connection, session_id, now)
+        return True
+
+    # Maintenance ----------------------------------------------------------
+
+    def sync(self) -> int:
+        """Load sessions revoked (by any worker) since the last sync"""
+        from sqlalchemy import func, select
+        from database import RefreshToken
+
+        started = datetime.utcnow()
+        if self._synced_at is None:
+            # Older revocations can no longer match a live access token
+            since = started - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        else:
+            # Overlap so revocations committed just after the last sync are not missed
+            since = self._synced_at - SYNC_OVERLAP
+        statement = (
+            select(RefreshToken.session_id, func.max(RefreshToken.revoked_at))
+            .where(RefreshToken.revoked_at >= since)
+            .group_by(RefreshToken.session_id)
+        )
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        for session_id, revoked_at in rows:
+            self.revoked.revoke(session_id, revoked_at)
+        self._synced_at = started
+        return len(rows)
+
+    def compact(self) -> int:
+        """Delete expired refresh tokens and stale revocations; returns rows deleted"""
+        from sqlalchemy import delete
+        from database import RefreshToken
+
+        with self.engine.begin() as connection:
+            deleted = connection.execute(
+                delete(RefreshToken).where(RefreshToken.expires_at <= datetime.utcnow())
+            ).rowcount
+        self.revoked.compact()
+        return deleted
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        compacted = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await loop.run_in_executor(None, self.sync)
+                if time.monotonic() - compacted >= self.compact_interval:
+                    compacted = time.monotonic()
+                    deleted = await loop.run_in_executor(None, self.compact)
+                    logger.info(f"Compacted {deleted} expired refresh tokens")
+            except Exception as e:
+                logger.error(f"Session maintenance failed: {str(e)}")
+
+    async def start(self):
+        """Load recent revocations and start maintenance (the table comes from database.init_db)"""
+        if self.engine is None:
+            from database import engine
+            self.engine = engine
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.sync)
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,204 @@
+"""
+Tenant scoping and per-tenant cache partitions.
+
+Every user belongs to a tenant (``database.Tenant``) and the tenant id travels
+in the access token as the ``tid`` claim, so handlers can scope queries and
+pick a cache partition without a database lookup. Anonymous requests, and
+accounts created before tenants existed, use ``PUBLIC_TENANT_ID``.
+
+Shared caches are split per tenant so one busy tenant cannot push everyone
+else out:
+
+* ``TenantLRU`` (generated suites) caps each tenant at ``TENANT_CACHE_SHARE``
+  of the total weight and, when the cache as a whole is full, evicts from
+  whichever tenant holds the most.
+* ``TenantPartitions`` (semantic answer caches, autocomplete indexes) keeps
+  one separately bounded structure per tenant, opened on first use, and lets
+  go of the least recently used ones beyond ``TENANT_MAX_PARTITIONS``.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+
+load_dotenv()
+
+TENANT_CACHE_SHARE = float(os.getenv("TENANT_CACHE_SHARE", "0.25"))
+TENANT_MAX_PARTITIONS = int(os.getenv("TENANT_MAX_PARTITIONS", "64"))
+
+PUBLIC_TENANT_ID = 0
+
+# ============================================================================
+# Request helpers
+# ============================================================================
+
+def request_claims(request: Request) -> Optional[dict]:
+    """Claims of the request's bearer token (decoded once per request)"""
+    claims = getattr(request.state, "token_claims", False)
+    if claims is False:
+        from auth import claims_from_authorization
+
+        claims = claims_from_authorization(request.headers.get("authorization"))
+        request.state.token_claims = claims
+    return claims
+
+
+async def get_tenant_id(request: Request) -> int:
+    """Route dependency: the caller's tenant, or ``PUBLIC_TENANT_ID``"""
+    claims = request_claims(request)
+    tenant_id = claims.get("tid") if claims else None
+    return PUBLIC_TENANT_ID if tenant_id is None else tenant_id
+
+
+def require_tenant(request: Request) -> int:
+    """Route dependency: the signed-in caller's tenant; 401 when anonymous"""
+    claims = request_claims(request)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if claims.get("tid") is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account has no tenant")
+    return claims["tid"]
+
+# ============================================================================
+# Partitioned caches
+# ============================================================================
+
+class TenantPartitions:
+    """One structure per tenant, built by ``open(tenant_id)`` on first use.
+
+    At most ``max_partitions`` are kept; the least recently used one is handed
+    to ``evict`` (e.g. to persist it) and dropped. Requests still holding it
+    finish normally.
+    """
+
+    def __init__(self, open: Callable[[int], Any], evict: Optional[Callable[[Any], None]] = None,
+                 max_partitions: int = TENANT_MAX_PARTITIONS):
+        self._open = open
+        self._evict = evict
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[int, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._partitions)
+
+    def peek(self, tenant_id: int) -> Optional[Any]:
+        """The tenant's partition if it is open, without opening it"""
+        return self._partitions.get(tenant_id)
+
+    def get(self, tenant_id: int) -> Any:
+        with self._lock:
+            partition = self._partitions.get(tenant_id)
+            if partition is not None:
+                self._partitions.move_to_end(tenant_id)
+                return partition
+        # Opening may read files or the database, so it happens outside the lock
+        partition = self._open(tenant_id)
+        evicted = []
+        with self._lock:
+            existing = self._partitions.get(tenant_id)
+            if existing is not None:
+                evicted.append(partition)
+                partition = existing
+            else:
+                self._partitions[tenant_id] = partition
+                while len(self._partitions) > self.max_partitions:
+                    evicted.append(self._partitions.popitem(last=False)[1])
+        if self._evict is not None:
+            for stale in evicted:
+                self._evict(stale)
+        return partition
+
+    def items(self):
+        with self._lock:
+            return list(self._partitions.items())
+
+    def clear(self) -> list:
+        """Drop every partition and return them (for closing at shutdown)"""
+        with self._lock:
+            partitions = list(self._partitions.values())
+            self._partitions.clear()
+        return partitions
+
+
+class TenantLRU:
+    """LRU cache shared by tenants, with a per-tenant and a total weight bound"""
+
+    def __init__(self, capacity: int, share: float = TENANT_CACHE_SHARE):
+        self.capacity = capacity
+        self.tenant_capacity = max(1, int(capacity * share))
+        self._entries: Dict[int, "OrderedDict[Hashable, tuple]"] = {}
+        self._usage: Dict[int, int] = {}
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: int, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entries = self._entries.get(tenant_id)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _pop_oldest(self, tenant_id: int):
+        entries = self._entries[tenant_id]
+        _, (_, weight) = entries.popitem(last=False)
+        self._usage[tenant_id] -= weight
+        self.total -= weight
+        self.evictions += 1
+        if not entries:
+            del self._entries[tenant_id]
+            del self._usage[tenant_id]
+
+    def put(self, tenant_id: int, key: Hashable, value: Any, weight: int = 1) -> bool:
+        """Cache ``value``; False if it is heavier than a tenant's whole share"""
+        if weight > self.tenant_capacity:
+            return False
+        with self._lock:
+            entries = self._entries.setdefault(tenant_id, OrderedDict())
+            self._usage.setdefault(tenant_id, 0)
+            previous = entries.pop(key, None)
+            if previous is not None:
+                self._usage[tenant_id] -= previous[1]
+                self.total -= previous[1]
+            # Make room within the tenant's own share first ...
+            while entries and self._usage[tenant_id] + weight > self.tenant_capacity:
+                self._pop_oldest(tenant_id)
+            entries = self._entries.setdefault(tenant_id, OrderedDict())
+            self._usage.setdefault(tenant_id, 0)
+            entries[key] = (value, weight)
+            self._usage[tenant_id] += weight
+            self.total += weight
+            # ... then take from the heaviest tenant while the cache is over capacity
+            while self.total > self.capacity:
+                self._pop_oldest(max(self._usage, key=self._usage.__getitem__))
+        return True
+
+    def usage(self, tenant_id: int) -> int:
+        return self._usage.get(tenant_id, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "capacity": self.capacity,
+                "tenant_capacity": self.tenant_capacity,
+                "tenants": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,85 @@
+"""
+Tests for the batched audit log
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app import create_app
+from audit import AuditLog
+from database import AuditEvent, engine, init_db
+
+
+def events_for(username):
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(AuditEvent.action, AuditEvent.outcome).where(AuditEvent.username == username)
+            .order_by(AuditEvent.id)
+        )
+        return [tuple(row) for row in rows]
+
+
+def test_auth_and_chat_events_are_written_on_shutdown():
+    with TestClient(create_app(routers=["auth", "disease"])) as client:
+        client.post("/auth/signup", json={
+            "username": "auditor", "email": "auditor@example.com", "password": "secret123"
+        })
+        client.post("/auth/login", json={"username": "auditor", "password": "wrong-password"})
+        token = client.post("/auth/login", json={
+            "username": "auditor", "password": "secret123"
+        }).json()["access_token"]
+        client.post("/chat", json={"message": "Tell me about asthma"},
+                    headers={"Authorization": f"Bearer {token}"})
+        stats = client.app.state.audit_log.stats()
+        assert stats["recorded"] == 4 and stats["dropped"] == 0
+
+    assert events_for("auditor") == [
+        ("signup", "success"), ("login", "failure"), ("login", "success"), ("disease.chat", "success"),
+    ]
+
+
+def test_audit_rows_are_append_only():
+    init_db()
+    log = AuditLog(engine=engine)
+    log.record("test.append_only", "append-only-user")
+    log.flush()
+
+    with pytest.raises(Exception, match="append-only"):
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM audit_events WHERE username = 'append-only-user'"))
+    assert events_for("append-only-user") == [("test.append_only", "success")]
+
+
+def test_background_writer_flushes_full_batches():
+    async def scenario():
+        log = AuditLog(batch_size=10, flush_interval_ms=60_000)
+        await log.start()
+        for i in range(25):
+            log.record("test.batch", "batch-user", detail={"i": i})
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if log.written >= 20:
+                break
+        before_stop = log.written
+        await log.stop()
+        return before_stop, log.stats()
+
+    before_stop, stats = asyncio.run(scenario())
+    assert before_stop >= 20
+    assert stats["written"] == 25 and stats["buffered"] == 0
+    assert len(events_for("batch-user")) == 25
+
+
+def test_full_buffer_drops_oldest_events():
+    log = AuditLog(engine=engine, capacity=5)
+    for i in range(8):
+        log.record("test.overflow", f"overflow-{i}")
+    assert log.stats()["dropped"] == 3
+
+    init_db()
+    log.flush()
+    assert events_for("overflow-0") == []
+    assert events_for("overflow-7") == [("test.overflow", "success")]
@@ -0,0 +1,106 @@
+"""
+Tests for prompt micro-batching and the fake LLM backend
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from batching import MicroBatcher
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_prompts_share_one_backend_call():
+    backend = llm.FakeBackend(latency_ms=20)
+
+    async def scenario():
+        batcher = MicroBatcher(
+            lambda prompts: asyncio.get_running_loop().run_in_executor(None, backend.generate_batch, prompts),
+            max_batch_size=8, max_wait_ms=50,
+        )
+        results = await asyncio.gather(*(batcher.submit(f"prompt {i}") for i in range(20)))
+        await batcher.close()
+        return results, batcher.stats()
+
+    results, stats = run(scenario())
+    assert results == [f"[fake response] prompt {i}" for i in range(20)]
+    assert backend.calls == stats["batches"] == 3
+    assert backend.prompts == stats["items"] == 20
+
+
+def test_single_prompt_is_sent_after_max_wait():
+    async def handler(items):
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=100, max_wait_ms=10)
+        start = asyncio.get_running_loop().time()
+        result = await batcher.submit(21)
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = run(scenario())
+    assert result == 42
+    assert 0.005 < elapsed < 1.0
+
+
+def test_handler_errors_reach_every_caller():
+    async def handler(items):
+        raise ValueError("upstream failed")
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=2, max_wait_ms=5)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_callers_are_dropped():
+    seen = []
+
+    async def handler(items):
+        seen.extend(items)
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=10, max_wait_ms=20)
+        abandoned = asyncio.ensure_future(batcher.submit("abandoned"))
+        kept = asyncio.ensure_future(batcher.submit("kept"))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        return await kept
+
+    assert run(scenario()) == "kept"
+    assert seen == ["kept"]
+
+
+def test_closed_batcher_rejects_work():
+    async def handler(items):
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(handler)
+        await batcher.close()
+        await batcher.submit(1)
+
+    with pytest.raises(RuntimeError):
+        run(scenario())
+
+
+def test_chat_goes_through_batcher_with_fake_backend(monkeypatch):
+    backend = llm.FakeBackend(latency_ms=0)
+    monkeypatch.setattr(llm, "_backend", backend)
+
+    with TestClient(create_app(routers=["disease"])) as client:
+        assert client.app.state.llm_batcher is not None
+        response = client.post("/api/disease/chat", json={"prompt": "How is gout treated?"})
+        stats = client.app.state.llm_batcher.stats()
+
+    assert response.json()["response"] == "[fake response] How is gout treated?"
+    assert backend.calls == stats["batches"] == 1
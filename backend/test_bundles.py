@@ -0,0 +1,59 @@
+"""
+Tests for the pre-rendered disease answer bundles
+"""
+
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from bundles import BundleStore, load_bundles, write_blob
+from catalog import DISEASE_CATALOG, GENERAL_HEALTH_INFO, generate_disease_response
+
+
+def test_blob_holds_every_answer_in_every_encoding(tmp_path):
+    path = write_blob(str(tmp_path / "bundles.bin"))
+    store = BundleStore.open(path)
+    try:
+        for key, text in list(DISEASE_CATALOG.items()) + [("general", GENERAL_HEALTH_INFO)]:
+            identity = store.response("chat", key, "identity").body
+            compressed = store.response("chat", key, "gzip, deflate").body
+            assert json.loads(bytes(identity)) == {"response": text}
+            assert gzip.decompress(compressed) == bytes(identity)
+        assert store.response("chat", "unknown") is None
+    finally:
+        store.close()
+
+
+def test_accept_encoding_negotiation():
+    store = BundleStore.build()
+    headers = dict(store.response("chat", "asthma", "gzip;q=0, identity").raw_headers)
+    assert b"content-encoding" not in headers
+    assert dict(store.response("chat", "asthma", "*").raw_headers)[b"content-encoding"] in (b"br", b"gzip")
+    assert b"content-encoding" not in dict(store.response("chat", "asthma", None).raw_headers)
+
+
+def test_unreadable_blob_is_rebuilt(tmp_path):
+    path = tmp_path / "bundles.bin"
+    path.write_bytes(b"not a blob")
+    store = load_bundles(str(path))
+    try:
+        assert store.stats()["memory_mapped"]
+        assert json.loads(bytes(store.response("chat", "diabetes").body))["response"] == DISEASE_CATALOG["diabetes"]
+    finally:
+        store.close()
+
+
+def test_chat_serves_the_same_body_precompressed():
+    message = "Tell me about hypertension"
+    with TestClient(create_app(routers=["disease"])) as client:
+        plain = client.post("/chat", json={"message": message}, headers={"Accept-Encoding": "identity"})
+        compressed = client.post("/chat", json={"message": message}, headers={"Accept-Encoding": "gzip"})
+        hits = client.app.state.disease_bundles.hits
+
+    assert plain.content == json.dumps({"response": generate_disease_response(message)},
+                                       separators=(",", ":"), ensure_ascii=False).encode()
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json()
+    assert hits == 2
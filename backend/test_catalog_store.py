@@ -0,0 +1,125 @@
+"""
+Tests for imported disease catalogs
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from catalog import generate_disease_response
+from catalog_store import CatalogHandle, CatalogStore, import_catalog, read_current
+from routers import disease
+
+ROWS = [
+    {"code": "J45.909", "name": "Unspecified asthma, uncomplicated", "description": "Asthma without complications",
+     "synonyms": ["asthma NOS"]},
+    {"code": "A37.90", "name": "Whooping cough, unspecified species", "description": "Pertussis",
+     "synonyms": ["pertussis", "100-day cough"]},
+    {"code": "B01.9", "name": "Varicella without complication", "description": "Chickenpox",
+     "synonyms": ["chickenpox", "chicken pox"]},
+]
+
+
+def write_csv(path, rows, delimiter=","):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(["Code", "Title", "Long_Description", "Synonyms"])
+        for row in rows:
+            writer.writerow([row["code"], row["name"], row["description"], "; ".join(row["synonyms"])])
+    return str(path)
+
+
+def test_csv_and_json_imports_round_trip(tmp_path):
+    (tmp_path / "icd10.json").write_text(json.dumps(ROWS))
+    for source in (write_csv(tmp_path / "icd10.csv", ROWS), str(tmp_path / "icd10.json")):
+        label = import_catalog(source, str(tmp_path / "catalog"))
+        store = CatalogStore(str(tmp_path / "catalog" / read_current(str(tmp_path / "catalog"))))
+        assert store.label == label and len(store) == len(ROWS)
+        entry = store.by_code("a37.90")
+        assert (entry.name, entry.description, entry.synonyms) == (
+            "Whooping cough, unspecified species", "Pertussis", ["pertussis", "100-day cough"])
+        assert store.lookup("Chicken  Pox").code == "B01.9"
+        assert store.match("My son has had the 100-day cough for a week").code == "A37.90"
+        assert store.match("Tell me about J45.909").code == "J45.909"
+        assert store.match("nothing relevant here") is None
+
+
+def test_json_lines_import_skips_rows_without_a_code(tmp_path):
+    source = tmp_path / "icd10.jsonl"
+    source.write_text("\n".join(json.dumps(row) for row in ROWS + [{"name": "no code"}]))
+    import_catalog(str(source), str(tmp_path))
+    assert len(CatalogHandle(str(tmp_path)).current()) == len(ROWS)
+
+
+def test_tab_and_semicolon_separated_sources_are_detected(tmp_path):
+    for name, delimiter in (("icd10.tsv", "\t"), ("icd10.txt", "\t"), ("icd10.csv", ";")):
+        directory = str(tmp_path / f"catalog-{name}")
+        import_catalog(write_csv(tmp_path / name, ROWS, delimiter), directory)
+        assert CatalogHandle(directory).current().by_code("B01.9").name == "Varicella without complication"
+
+
+def test_source_without_records_is_not_published(tmp_path):
+    directory = str(tmp_path / "catalog")
+    import_catalog(write_csv(tmp_path / "v1.csv", ROWS), directory)
+    current = read_current(directory)
+    with pytest.raises(ValueError):
+        import_catalog(write_csv(tmp_path / "v2.csv", ROWS, "|"), directory, delimiter=",")
+    assert read_current(directory) == current
+    assert len([name for name in os.listdir(directory) if name.endswith((".bin", ".tmp"))]) == 1
+
+
+def test_handle_swaps_to_a_new_version_and_old_versions_are_pruned(tmp_path):
+    directory = str(tmp_path / "catalog")
+    source = write_csv(tmp_path / "v1.csv", ROWS[:1])
+    import_catalog(source, directory)
+    handle = CatalogHandle(directory, check_interval_s=0)
+    assert handle.current().by_code("B01.9") is None
+
+    for _ in range(3):
+        import_catalog(write_csv(tmp_path / "v2.csv", ROWS), directory, keep=2)
+    assert handle.current().by_code("B01.9").name == "Varicella without complication"
+    assert handle.stats()["swaps"] == 2
+    assert len([name for name in os.listdir(directory) if name.endswith(".bin")]) == 2
+
+
+def test_chat_answers_from_the_imported_catalog(tmp_path, monkeypatch):
+    import_catalog(write_csv(tmp_path / "icd10.csv", ROWS), str(tmp_path))
+    monkeypatch.setattr(disease, "DISEASE_CATALOG_DIR", str(tmp_path))
+
+    with TestClient(create_app(routers=["health", "disease"])) as client:
+        imported = client.post("/chat", json={"message": "Is chickenpox contagious?"}).json()["response"]
+        builtin = client.post("/chat", json={"message": "What are diabetes symptoms?"}).json()["response"]
+        unknown = client.post("/api/disease/chat", json={"prompt": "Hello there"}).json()["response"]
+        metrics = client.get("/metrics").json()["disease_catalog"]
+
+    assert imported.startswith("**Varicella without complication** (ICD-10 B01.9)")
+    assert builtin == generate_disease_response("What are diabetes symptoms?")
+    assert unknown == generate_disease_response("Hello there")
+    assert metrics["codes"] == len(ROWS)
+
+
+def test_long_chat_messages_are_matched_in_the_threadpool(tmp_path, monkeypatch):
+    import_catalog(write_csv(tmp_path / "icd10.csv", ROWS), str(tmp_path))
+    monkeypatch.setattr(disease, "DISEASE_CATALOG_DIR", str(tmp_path))
+    offloaded = []
+
+    async def run_in_threadpool(func, *args):
+        offloaded.append(func.__name__)
+        return func(*args)
+
+    monkeypatch.setattr(disease, "run_in_threadpool", run_in_threadpool)
+    long_message = "Is chickenpox contagious? " + "Asking for a friend. " * 20
+
+    with TestClient(create_app(routers=["disease"])) as client:
+        offloaded.clear()
+        short = client.post("/chat", json={"message": "Is chickenpox contagious?"}).json()["response"]
+        assert offloaded == []
+        long = client.post("/chat", json={"message": long_message}).json()["response"]
+        assert offloaded == ["match"]
+
+    assert short == long
@@ -0,0 +1,115 @@
+"""
+Tests for MinHash / LSH near-duplicate removal of test cases
+"""
+
+import json
+
+import numpy as np
+
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from dedup import MinHasher, StreamDeduplicator, case_text, dedupe_cases, find_duplicates
+from records import CompactTestCase
+
+STEPS = ("Open the patient chart", "Select the lab results tab", "Filter results by date",
+         "Open the most recent panel", "Verify abnormal values are flagged")
+
+
+def case(title, description="Verify clinicians can review lab results for their patients.", steps=STEPS):
+    return CompactTestCase(title, description, "high", ("HIPAA",), steps)
+
+
+def duplicated_suite(prompt: str) -> str:
+    if "JSON array of test case" not in prompt:
+        return prompt
+    items = [{"title": title, "description": "Verify clinicians can review lab results.", "steps": list(STEPS)}
+             for title in ("Review lab results", "Review lab results", "Review the lab results",
+                           "Export audit trail")]
+    return json.dumps(items)
+
+
+def test_near_duplicates_are_removed_in_order():
+    suite = [
+        case("Review lab results"),
+        case("Audit trail records chart access", "Every chart view is written to the audit log.",
+             ("Open a chart", "Query the audit log", "Verify the view was recorded")),
+        case("Review lab results", steps=STEPS + ("Sign out",)),
+        case("Review the lab results"),
+        case("Review lab results in PACS", "Radiology images load for the ordering physician.",
+             ("Open the imaging viewer", "Load the latest study")),
+    ]
+    kept, removed = dedupe_cases(suite)
+    assert [test_case.title for test_case in kept] == [
+        "Review lab results", "Audit trail records chart access", "Review lab results in PACS"]
+    assert removed == 2
+    assert dedupe_cases(suite[:1]) == (suite[:1], 0)
+
+
+def test_signatures_estimate_jaccard_similarity():
+    texts = [" ".join(f"word{i}" for i in range(100)), " ".join(f"word{i}" for i in range(50, 150)), "", "x"]
+    signatures = MinHasher(num_perm=256).signatures(texts)
+    # 50 of the 99 + 99 word pairs are shared (Jaccard ~0.34)
+    assert abs((signatures[0] == signatures[1]).mean() - 50 / 148) < 0.1
+    assert (signatures[0] == signatures[2]).mean() < 0.05
+    assert (signatures == MinHasher(num_perm=256, batch_size=1).signatures(texts)).all()
+
+
+def test_every_repeat_is_found_in_a_larger_suite():
+    suite = [case(f"Review lab result panel {i % 50}", f"Check panel {i % 50} for patient group {i % 50}.",
+                  STEPS[:2 + i % 4]) for i in range(2000)]
+    duplicate_of = find_duplicates(MinHasher().signatures([case_text(test_case) for test_case in suite]))
+    # Case i repeats case i % 100
+    assert duplicate_of[0] == -1 and duplicate_of[100] == 0
+    assert (duplicate_of[100:] >= 0).all() and (duplicate_of[100:] < 100).all()
+
+
+def test_duplicate_is_found_behind_an_unrelated_earlier_bucket_member():
+    # 16 bands of 4 values: cases 8 and 9 agree on bands 0-7 (similarity 0.5),
+    # and each of those buckets starts with an unrelated case sharing only that band
+    signatures = np.arange(10 * 64, dtype=np.uint32).reshape(10, 64)
+    signatures[9, :32] = signatures[8, :32]
+    for band in range(8):
+        signatures[band, band * 4:band * 4 + 4] = signatures[8, band * 4:band * 4 + 4]
+
+    assert find_duplicates(signatures, threshold=0.5).tolist() == [-1] * 9 + [8]
+
+
+def test_stream_deduplicator():
+    deduplicator = StreamDeduplicator()
+    kept = list(deduplicator.filter([case("Review lab results"), case("Review lab results"), case("Other",
+                                     "Another description entirely.", ("One step",))]))
+    assert [test_case.title for test_case in kept] == ["Review lab results", "Other"]
+    assert deduplicator.removed == 1
+
+
+def test_generation_and_export_dedupe(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0, responder=duplicated_suite))
+    request = {"requirement": "Clinicians can review lab results", "system_type": "EHR", "priority": "high"}
+
+    with TestClient(create_app(routers=["testcase", "integrations"])) as client:
+        plain = client.post("/api/testcase/generate", json=request).json()
+        deduped = client.post("/api/testcase/generate", json={**request, "dedupe": True}).json()
+        with client.stream("POST", "/api/testcase/generate/stream", json={**request, "dedupe": True}) as response:
+            streamed = [json.loads(line) for line in response.iter_lines() if line]
+        exported = client.post("/integrations/testrail/export",
+                               json={"testCases": plain["test_cases"], "dedupe": True}).json()
+        legacy = client.post("/testcases/generate", json={
+            "requirement": request["requirement"], "systemType": "EHR", "priority": "high", "dedupe": True,
+        }).json()
+        exact_only = client.post("/testcases/generate", json={
+            "requirement": request["requirement"], "systemType": "EHR", "priority": "high", "dedupe": True,
+            "dedupeThreshold": 1.0,
+        }).json()
+
+    assert len(plain["test_cases"]) == 4 and plain["duplicates_removed"] == 0
+    assert [test_case["title"] for test_case in deduped["test_cases"]] == ["Review lab results", "Export audit trail"]
+    assert deduped["duplicates_removed"] == 2
+    assert [test_case["title"] for test_case in streamed[:-1]] == ["Review lab results", "Export audit trail"]
+    assert streamed[-1] == {"done": True, "count": 2}
+    assert exported["count"] == 2 and exported["duplicates_removed"] == 2
+    assert [test_case["title"] for test_case in legacy["testCases"]] == ["Review lab results", "Export audit trail"]
+    assert legacy["duplicatesRemoved"] == 2
+    # Only the identical case reaches a threshold of 1.0
+    assert exact_only["duplicatesRemoved"] == 1 and len(exact_only["testCases"]) == 3
@@ -0,0 +1,74 @@
+"""
+Tests for the liveness and readiness probes
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import health
+from app import create_app
+
+
+@pytest.fixture
+def client():
+    with TestClient(create_app(routers=["health"])) as client:
+        yield client
+
+
+def test_livez_is_plain_ok(client):
+    response = client.get("/livez")
+    assert response.status_code == 200
+    assert response.text == "ok"
+
+
+def test_readyz_reports_dependency_checks(client):
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"database", "pool", "llm"}
+
+
+def test_readiness_result_is_cached(monkeypatch):
+    calls = []
+
+    def fake_database_check():
+        calls.append(1)
+        return {"ok": True}
+
+    monkeypatch.setattr(health, "check_database", fake_database_check)
+    probe = health.ReadinessProbe(ttl=60)
+
+    async def probe_many():
+        return await asyncio.gather(*(probe.check() for _ in range(20)))
+
+    results = asyncio.run(probe_many())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_readyz_returns_503_when_database_is_down(client, monkeypatch):
+    monkeypatch.setattr(health, "check_database", lambda: {"ok": False, "error": "down"})
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+
+def test_database_errors_are_logged_not_returned(monkeypatch, caplog):
+    from database import engine
+
+    def broken_connect():
+        raise RuntimeError("could not connect to db.internal as admin")
+
+    monkeypatch.setattr(engine, "connect", broken_connect)
+    result = health.check_database()
+    assert result == {"ok": False, "error": "unavailable"}
+    assert "db.internal" in caplog.text
+
+
+def test_pool_capacity_uses_the_configured_overflow():
+    from database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+    result = health.check_pool()
+    assert result["ok"] and result["capacity"] == DB_POOL_SIZE + DB_MAX_OVERFLOW
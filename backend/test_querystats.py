@@ -0,0 +1,78 @@
+"""
+Tests for per-request database query statistics
+"""
+
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import querystats
+from app import create_app
+from querystats import RequestQueries, redact_parameters, redact_statement
+
+
+def test_queries_are_attributed_to_the_request(monkeypatch):
+    monkeypatch.setattr("app.QUERY_DEBUG_HEADERS", True)
+    with TestClient(create_app(routers=["health", "auth"])) as client:
+        client.post("/auth/signup", json={"username": "querystats_user", "email": "querystats_user@example.com",
+                                          "password": "secret123"})
+        token = client.post("/auth/login", json={"username": "querystats_user",
+                                                 "password": "secret123"}).json()["access_token"]
+        me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        health = client.get("/health")
+        metrics = client.get("/metrics").json()["query_stats"]
+
+    assert int(me.headers["x-db-query-count"]) >= 1
+    assert me.headers["server-timing"].startswith("db;dur=")
+    assert "x-db-n-plus-one" not in me.headers
+    assert "x-db-query-count" not in health.headers
+    assert metrics["requests_with_queries"] >= 3 and metrics["n_plus_one_requests"] == 0
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(monkeypatch, caplog):
+    from database import SessionLocal, User
+
+    monkeypatch.setattr("app.QUERY_DEBUG_HEADERS", True)
+    app = create_app(routers=["health"])
+
+    @app.get("/users/{count}")
+    def lookup_users(count: int):
+        db = SessionLocal()
+        try:
+            return [db.query(User).filter(User.id == i).first() is not None for i in range(count)]
+        finally:
+            db.close()
+
+    with TestClient(app) as client, caplog.at_level(logging.WARNING, logger="querystats"):
+        few = client.get("/users/2")
+        many = client.get("/users/6")
+        metrics = client.get("/metrics").json()["query_stats"]
+
+    assert "x-db-n-plus-one" not in few.headers
+    assert many.headers["x-db-n-plus-one"] == "6"
+    assert metrics["n_plus_one_routes"] == {"GET /users/{count}": 1}
+    assert "Probable N+1 in GET /users/{count}" in caplog.text
+
+
+def test_slow_query_log_redacts_parameters(monkeypatch, caplog):
+    from database import engine
+
+    monkeypatch.setattr(querystats, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="querystats"), engine.connect() as connection:
+        connection.execute(text("SELECT :name, 'Jane Doe'"), {"name": "John Smith"})
+
+    assert "Slow query" in caplog.text
+    assert "params=(<str:10>)" in caplog.text
+    assert "John Smith" not in caplog.text and "Jane Doe" not in caplog.text
+
+
+def test_redaction_helpers():
+    assert redact_statement("SELECT *\n  FROM users WHERE name = 'O''Brien'") == \
+        "SELECT * FROM users WHERE name = '?'"
+    assert redact_parameters((1, None, b"abc")) == "(<int>, NULL, <bytes:3>)"
+    assert redact_parameters([{"a": "x"}, {"a": "y"}]) == "2 rows of {a: <str:1>}"
+    queries = RequestQueries()
+    for _ in range(3):
+        queries.add("SELECT 1", 0.001, False)
+    assert queries.repeated(3) == {"SELECT 1": 3} and queries.repeated(4) == {}
@@ -0,0 +1,136 @@
+"""
+Tests for the token-bucket rate limiter and concurrency cap
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from auth import create_access_token
+from ratelimit import (
+    BucketPurger,
+    ConcurrencyLimiter,
+    RateLimiter,
+    SQLiteTokenBucketStore,
+    TokenBucketStore,
+    client_key,
+    rate_limit,
+)
+
+
+def make_request(headers=None, query=b"", host="10.0.0.1", app=None):
+    scope = {
+        "type": "http",
+        "app": app,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "query_string": query,
+        "client": (host, 1234),
+    }
+    return Request(scope)
+
+
+def test_bucket_admits_burst_then_reports_retry_after():
+    store = TokenBucketStore(rate=1.0, burst=3)
+    assert [store.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.acquire("a", now=0.0) == pytest.approx(1.0)
+    # Half a second later half a token has accumulated
+    assert store.acquire("a", now=0.5) == pytest.approx(0.5)
+    assert store.acquire("a", now=1.0) == 0.0
+
+
+def test_bucket_keys_are_independent():
+    store = TokenBucketStore(rate=1.0, burst=1)
+    assert store.acquire("a", now=0.0) == 0.0
+    assert store.acquire("b", now=0.0) == 0.0
+    assert store.acquire("a", now=0.0) > 0
+
+
+def test_bucket_reuses_idle_slots_when_full():
+    store = TokenBucketStore(rate=1.0, burst=1, max_keys=2)
+    store.acquire("a", now=0.0)
+    store.acquire("b", now=0.0)
+    assert store.acquire("c", now=10.0) == 0.0
+    assert len(store) == 2
+
+
+def test_full_store_of_drained_buckets_is_not_reset_by_new_keys():
+    store = TokenBucketStore(rate=0.01, burst=2, max_keys=100)
+    for i in range(100):
+        store.acquire(f"client{i}", cost=2, now=0.0)
+
+    # A client rotating through new keys gets one shared overflow bucket...
+    assert store.acquire("rotating0", now=1.0) == store.acquire("rotating1", now=1.0) == 0.0
+    assert store.acquire("rotating2", now=1.0) > 0
+    # ...and the drained buckets it could not displace are still drained
+    assert all(store.acquire(f"client{i}", now=1.0) > 0 for i in range(100))
+    assert len(store) == 100
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first = SQLiteTokenBucketStore("chat", rate=1.0, burst=2, path=path)
+    second = SQLiteTokenBucketStore("chat", rate=1.0, burst=2, path=path)
+    assert first.acquire("a", now=100.0) == 0.0
+    assert second.acquire("a", now=100.0) == 0.0
+    assert first.acquire("a", now=100.0) == pytest.approx(1.0)
+    assert second.purge_idle(now=200.0) == 1
+
+
+def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(1)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+
+
+def test_client_key_uses_the_verified_user_else_the_ip():
+    token = create_access_token({"sub": "alice"})
+    assert client_key(make_request({"Authorization": f"Bearer {token}"})) == "user:alice"
+    # Made-up tokens must not buy a fresh bucket
+    assert client_key(make_request({"Authorization": "Bearer abc"})) == "ip:10.0.0.1"
+    assert client_key(make_request(query=b"token=abc")) == "ip:10.0.0.1"
+    assert client_key(make_request()) == "ip:10.0.0.1"
+
+
+def test_rate_limiter_sheds_load_when_saturated():
+    limiter = RateLimiter("test_route", rate=100, burst=100, max_concurrency=1)
+    app = SimpleNamespace(state=SimpleNamespace(rate_limiters={"test_route": limiter}))
+    dependency = rate_limit("test_route")
+
+    async def run():
+        first = dependency(make_request(app=app))
+        await first.__anext__()
+        with pytest.raises(HTTPException) as exc_info:
+            await dependency(make_request(app=app)).__anext__()
+        await first.aclose()
+        return exc_info.value
+
+    exc = asyncio.run(run())
+    assert exc.status_code == 503
+    assert exc.headers["Retry-After"] == "1"
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_sqlite_buckets_are_taken_off_the_event_loop_and_purged(tmp_path):
+    limiter = RateLimiter("chat", rate=1000, burst=1, max_concurrency=4)
+    limiter.buckets = SQLiteTokenBucketStore("chat", rate=1000.0, burst=1, path=str(tmp_path / "buckets.db"))
+    purger = BucketPurger({"chat": limiter}, interval=0.01)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        acquired_in = []
+        acquire = limiter.buckets.acquire
+        limiter.buckets.acquire = lambda key: acquired_in.append(threading.get_ident()) or acquire(key)
+        await limiter.admit(make_request())
+        limiter.release()
+        await purger.start()
+        await asyncio.sleep(0.2)
+        await purger.stop()
+        return acquired_in[0] != loop_thread
+
+    assert asyncio.run(run())
+    assert purger.purged == 1
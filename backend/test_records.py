@@ -0,0 +1,60 @@
+"""
+Tests for compact test-case records
+"""
+
+import json
+import sys
+
+import schemas
+from catalog import generate_compact_test_cases, generate_test_cases_logic
+from records import CompactTestCase, StringPool
+
+
+def test_equal_values_share_objects():
+    pool = StringPool()
+    first = CompactTestCase.create("Login", "desc", "high", json.loads('["HIPAA", "GDPR"]'),
+                                   json.loads('["Open app", "Log in"]'), pool)
+    second = CompactTestCase.create("Login", "desc", "high", json.loads('["HIPAA", "GDPR"]'),
+                                    json.loads('["Open app", "Log in"]'), pool)
+
+    assert first == second
+    assert first.compliance is second.compliance
+    assert first.test_steps is second.test_steps
+    assert first.title is second.title
+    assert not hasattr(first, "__dict__")
+
+
+def test_pool_is_bounded():
+    pool = StringPool(max_tuples=10)
+    for i in range(25):
+        pool.strings([f"value {i}"])
+    assert len(pool) <= 10
+
+
+def test_pool_keeps_free_text_out_of_the_interpreter():
+    pool = StringPool(max_strings=10)
+    text = "".join(["a requirement ", "typed by a user"])
+    assert pool.string(text) is text
+    # Interning the text would have made it the interpreter's canonical copy
+    assert sys.intern("".join(["a requirement ", "typed by a user"])) is not text
+
+    for i in range(25):
+        pool.string(f"value {i}")
+    assert len(pool._strings) <= 10
+
+
+def test_generated_suites_share_steps_and_compliance():
+    first = generate_compact_test_cases("r1", "EHR", "high", ["HIPAA"])
+    second = generate_compact_test_cases("r2", "EHR", "high", ["HIPAA"])
+    assert first[0].test_steps is second[0].test_steps
+    assert first[0].compliance is second[0].compliance
+
+
+def test_conversion_matches_the_model():
+    compact = generate_compact_test_cases("r", "PACS", "low", ["FDA"])
+    models = generate_test_cases_logic("r", "PACS", "low", ["FDA"])
+
+    assert [case.to_dict() for case in compact] == [model.model_dump() for model in models]
+    assert isinstance(compact[0].to_model(), schemas.TestCase)
+    assert CompactTestCase.from_model(models[0]) == compact[0]
+    assert compact[0].to_model().model_dump_json() == models[0].model_dump_json()
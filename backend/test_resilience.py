@@ -0,0 +1,213 @@
+"""
+Tests for hedged LLM calls, the circuit breaker and fallback answers
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from catalog import generate_disease_response
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, UpstreamError, UpstreamTimeout
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hedge_answers_when_the_first_attempt_stalls():
+    delays = [5.0, 0.0]
+
+    async def attempt():
+        await asyncio.sleep(delays.pop(0))
+        return "answer"
+
+    caller = ResilientCaller(hedge_delay_ms=20, hedge_ratio=1.0)
+    started = time.monotonic()
+    assert run(caller.call(attempt)) == "answer"
+    assert time.monotonic() - started < 1.0
+    assert caller.hedges == caller.hedge_wins == 1
+
+
+def test_hedges_are_limited_to_a_share_of_calls():
+    async def attempt():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario(caller):
+        for _ in range(10):
+            await caller.call(attempt)
+
+    caller = ResilientCaller(hedge_delay_ms=1, min_hedge_delay_ms=1, hedge_ratio=0.2)
+    run(scenario(caller))
+    assert caller.hedges == 2
+
+
+def test_deadline_and_errors_are_reported_as_unavailable():
+    async def stalled():
+        await asyncio.sleep(5)
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    caller = ResilientCaller(timeout_s=0.05, hedge=False)
+    with pytest.raises(UpstreamTimeout):
+        run(caller.call(stalled))
+    with pytest.raises(UpstreamError):
+        run(caller.call(failing))
+    assert caller.timeouts == 1 and caller.failures == 2
+
+
+def test_breaker_opens_then_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_ratio=0.5, window=4, min_calls=4, open_s=10, clock=clock)
+    for success in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(success)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_slow_calls_count_as_failures():
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "late"
+
+    caller = ResilientCaller(CircuitBreaker(window=2, min_calls=2), hedge=False, slow_call_ms=1)
+    assert run(caller.call(slow)) == "late"
+    assert run(caller.call(slow)) == "late"
+    with pytest.raises(CircuitOpenError):
+        run(caller.call(slow))
+
+
+def test_chat_falls_back_to_catalog_when_the_backend_fails(monkeypatch):
+    backend = llm.FakeBackend(latency_ms=0, error_rate=1.0, seed=1)
+    monkeypatch.setattr(llm, "_backend", backend)
+    prompt = "What are diabetes symptoms?"
+
+    with TestClient(create_app(routers=["health", "disease"])) as client:
+        client.app.state.llm_guard = ResilientCaller(CircuitBreaker(window=2, min_calls=2), hedge=False)
+        answers = [client.post("/chat", json={"message": prompt}).json()["response"] for _ in range(3)]
+        metrics = client.get("/metrics").json()["llm_guard"]
+
+    assert answers == [generate_disease_response(prompt)] * 3
+    assert backend.errors == 2
+    assert metrics["breaker_state"] == "open"
+    assert metrics["rejected"] == 1 and metrics["fallbacks"] == 3
+
+
+def test_stalled_backend_answers_from_the_catalog_before_the_deadline(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0, stall_rate=1.0, stall_ms=300))
+
+    with TestClient(create_app(routers=["disease"])) as client:
+        client.app.state.llm_guard = ResilientCaller(timeout_s=0.05, hedge=False)
+        started = time.monotonic()
+        response = client.post("/api/disease/chat", json={"prompt": "How is asthma treated?"})
+        elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert response.json()["response"] == generate_disease_response("How is asthma treated?")
+    assert elapsed < 0.25
+
+
+def test_failed_stream_falls_back_to_templates_and_opens_the_breaker(monkeypatch):
+    backend = llm.FakeBackend(latency_ms=0, error_rate=1.0, seed=1)
+    monkeypatch.setattr(llm, "_backend", backend)
+    request = {"requirement": "Clinicians can review lab results", "system_type": "EHR", "priority": "high"}
+
+    with TestClient(create_app(routers=["health", "testcase"])) as client:
+        client.app.state.llm_guard = ResilientCaller(CircuitBreaker(window=2, min_calls=2), hedge=False)
+        bodies = [client.post("/api/testcase/generate/stream", json=request).text for _ in range(3)]
+        metrics = client.get("/metrics").json()["llm_guard"]
+
+    for body in bodies:
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert len(lines) == 5 and lines[0]["title"] == "Validate EHR System Access"
+        assert lines[-1] == {"done": True, "count": 4}
+    assert backend.errors == 2
+    assert metrics["breaker_state"] == "open" and metrics["rejected"] == 1 and metrics["fallbacks"] == 3
+
+
+def test_stalled_stream_falls_back_before_the_deadline(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0, stall_rate=1.0, stall_ms=300))
+    request = {"requirement": "Clinicians can review lab results", "system_type": "EHR", "priority": "high"}
+
+    with TestClient(create_app(routers=["testcase"])) as client:
+        guard = client.app.state.llm_guard = ResilientCaller(timeout_s=0.05, hedge=False)
+        started = time.monotonic()
+        body = client.post("/api/testcase/generate/stream", json=request).text
+        elapsed = time.monotonic() - started
+
+    assert len(body.splitlines()) == 5
+    assert elapsed < 0.25
+    assert guard.timeouts == 1
+
+
+def test_completed_stream_is_recorded_as_a_success():
+    async def items():
+        for i in range(3):
+            yield i
+
+    async def consume(caller):
+        return [item async for item in caller.stream(items)]
+
+    caller = ResilientCaller(CircuitBreaker(window=3, min_calls=3), hedge=False)
+    caller.breaker.record(False)
+    assert run(consume(caller)) == [0, 1, 2]
+    assert run(consume(caller)) == [0, 1, 2]
+    # One failure and two successes: below the failure ratio
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+    assert caller.calls == 2 and caller.failures == 0
+
+
+def test_slow_but_steady_stream_runs_past_the_idle_timeout():
+    async def items():
+        for i in range(6):
+            await asyncio.sleep(0.03)
+            yield i
+
+    async def consume(caller):
+        return [item async for item in caller.stream(items)]
+
+    caller = ResilientCaller(timeout_s=0.1, hedge=False)
+    started = time.monotonic()
+    assert run(consume(caller)) == [0, 1, 2, 3, 4, 5]
+    assert time.monotonic() - started > caller.timeout
+    assert caller.timeouts == 0 and caller.failures == 0
+
+
+def test_stream_is_capped_by_the_total_timeout():
+    async def items():
+        while True:
+            await asyncio.sleep(0.02)
+            yield 0
+
+    async def consume(caller):
+        return [item async for item in caller.stream(items)]
+
+    caller = ResilientCaller(timeout_s=0.1, stream_timeout_s=0.15, hedge=False)
+    with pytest.raises(UpstreamTimeout, match="did not finish"):
+        run(consume(caller))
+    assert caller.timeouts == 1
@@ -0,0 +1,106 @@
+"""
+Tests for the consolidated application and its routers
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def test_disabled_routers_are_not_mounted():
+    app = create_app(routers=["health", "disease"])
+    paths = app.openapi()["paths"]
+    assert "/chat" in paths
+    assert "/auth/login" not in paths
+
+
+def test_unknown_router_is_rejected():
+    with pytest.raises(ValueError):
+        create_app(routers=["health", "billing"])
+
+
+def test_signup_login_and_me(client):
+    signup = client.post("/auth/signup", json={
+        "username": "alice", "email": "alice@example.com", "password": "secret123"
+    })
+    assert signup.status_code == 200
+    assert signup.json()["username"] == "alice"
+
+    assert client.post("/auth/signup", json={
+        "username": "alice", "email": "other@example.com", "password": "secret123"
+    }).status_code == 400
+
+    login = client.post("/auth/login", json={"username": "alice", "password": "secret123"})
+    assert login.status_code == 200
+    token = login.json()["access_token"]
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.status_code == 200
+    assert me.json()["email"] == "alice@example.com"
+
+    assert client.get("/auth/me", params={"token": token}).status_code == 200
+    assert client.get("/auth/me").status_code == 401
+
+
+def test_demo_user_can_log_in(client):
+    response = client.post("/api/auth/login", json={"username": "demo", "password": "demo123"})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Demo User"
+
+    wrong = client.post("/api/auth/login", json={"username": "demo", "password": "wrong-password"})
+    assert wrong.status_code == 401
+
+
+def test_chat_routes_share_catalog(client):
+    api = client.post("/api/disease/chat", json={"prompt": "Tell me about asthma"})
+    legacy = client.post("/chat", json={"message": "Tell me about asthma"})
+    assert api.status_code == legacy.status_code == 200
+    assert api.json()["response"] == legacy.json()["response"]
+    assert api.json()["response"].startswith("**Asthma**")
+
+
+def test_generate_and_export(client):
+    generated = client.post("/testcases/generate", json={
+        "requirement": "Patients can view lab results",
+        "systemType": "EHR",
+        "priority": "high",
+        "compliance": ["HIPAA"],
+    })
+    assert generated.status_code == 200
+    test_cases = generated.json()["testCases"]
+    assert len(test_cases) == 4
+
+    exported = client.post("/integrations/testrail/export", json={"testCases": test_cases})
+    assert exported.status_code == 200
+    body = exported.json()
+    assert body["count"] == 4
+    assert body["items"][0]["priority_id"] == 3
+
+
+def test_startup_creates_a_new_database_through_init_db(tmp_path):
+    # Only the audit log uses the database here; its table must still come from init_db
+    path = tmp_path / "fresh.db"
+    subprocess.run(
+        [sys.executable, "-c", "from fastapi.testclient import TestClient; from app import create_app; "
+                               "TestClient(create_app(routers=['testcase'])).__enter__().__exit__(None, None, None)"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}"},
+    )
+    from database import SCHEMA_REVISION, Base
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT version_num FROM alembic_version").fetchall() == [(SCHEMA_REVISION,)]
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert set(Base.metadata.tables) <= tables
@@ -0,0 +1,162 @@
+"""
+Tests for server-side search history and prefix autocomplete
+"""
+
+import asyncio
+import random
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import create_app
+from database import QueryCount, engine, init_db
+from search_history import PrefixIndex, SearchHistory, normalize_prefix
+
+
+def brute_force(counts, prefix, k):
+    matches = [(query, count) for query, count in counts.items() if query.startswith(prefix)]
+    return sorted(matches, key=lambda item: (-item[1], item[0]))[:k]
+
+
+def test_prefix_index_matches_brute_force_under_updates():
+    rng = random.Random(7)
+    words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 6))) for _ in range(400)]
+    counts = {word: rng.randint(1, 20) for word in words[:200]}
+    index = PrefixIndex(k=5, scan_limit=8)
+    index.build(counts.items())
+
+    for word in rng.choices(words, k=2000):
+        counts[word] = counts.get(word, 0) + 1
+        index.increment(word)
+    for prefix in ["", "a", "b", "ab", "abc", "ca", "cccc", "x"]:
+        assert index.complete(prefix) == brute_force(counts, prefix, 5)
+    assert index.complete("a", limit=2) == brute_force(counts, "a", 2)
+
+
+def test_concurrent_increments_are_not_lost():
+    index = PrefixIndex()
+
+    def search():
+        for _ in range(2000):
+            index.increment("measles")
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert index.count("measles") == 8000
+
+
+def test_prefix_index_is_bounded():
+    index = PrefixIndex(max_queries=3)
+    index.build([("asthma", 5), ("acne", 4), ("anemia", 3), ("angina", 1)])
+    assert len(index) == 3 and index.count("angina") == 0
+    assert not index.increment("arthritis")
+    assert index.increment("acne", 3)
+    assert index.complete("a") == [("acne", 7), ("asthma", 5), ("anemia", 3)]
+
+
+def test_prefix_normalization():
+    assert normalize_prefix("  Type ") == "type "
+    assert normalize_prefix("TYPE   2") == "type 2"
+    assert normalize_prefix("") == ""
+
+
+def test_flush_aggregates_counts_into_one_row():
+    init_db()
+
+    def total(query):
+        with engine.connect() as connection:
+            return connection.execute(select(QueryCount.count).where(QueryCount.query == query)).scalar()
+
+    async def scenario():
+        history = SearchHistory(flush_interval_ms=60_000)
+        await history.start()
+        for _ in range(3):
+            history.record("Flushitis", "flush-user")
+        assert history.flush() == 4
+        history.record("  FLUSHITIS ")
+        history.record("flushitis")
+        await history.stop()
+        return history
+
+    history = asyncio.run(scenario())
+    assert total("flushitis") == 5
+    assert history.stats()["pending"] == 0
+    assert [query for query, _ in history.recent("flush-user")] == ["Flushitis"]
+
+
+def test_refresh_picks_up_counts_flushed_after_the_last_refresh():
+    init_db()
+
+    async def scenario():
+        reader, writer = SearchHistory(flush_interval_ms=60_000), SearchHistory(flush_interval_ms=60_000)
+        await reader.start()
+        await writer.start()
+        # Searched before the reader's refresh but only written after it
+        writer.record("lateflushitis")
+        reader.refresh()
+        writer.flush()
+        reader.refresh()
+        await writer.stop()
+        await reader.stop()
+        return reader
+
+    assert asyncio.run(scenario()).complete("lateflush") == [("lateflushitis", 1)]
+
+
+def test_history_and_autocomplete_endpoints():
+    with TestClient(create_app(routers=["auth", "disease"])) as client:
+        client.post("/auth/signup", json={
+            "username": "searcher", "email": "searcher@example.com", "password": "secret123"
+        })
+        token = client.post("/auth/login", json={
+            "username": "searcher", "password": "secret123"
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for query in ["Qdiabetes", "qdiabetes", "QDIABETES type 2", "qdengue"]:
+            assert client.post("/api/disease/history", json={"query": query}, headers=headers).status_code == 200
+        # Anonymous searches count in the public tenant
+        assert client.post("/api/disease/history", json={"query": "qdengue"}).json() == {"query": "qdengue"}
+        assert client.post("/api/disease/history", json={"query": "   "}).status_code == 422
+
+        # Signed-in searches count in the user's tenant
+        suggestions = client.get("/api/disease/autocomplete", params={"prefix": "QD"},
+                                 headers=headers).json()["suggestions"]
+        assert suggestions == [
+            {"query": "qdiabetes", "count": 2},
+            {"query": "qdengue", "count": 1},
+            {"query": "qdiabetes type 2", "count": 1},
+        ]
+        assert client.get("/api/disease/autocomplete", params={"prefix": "qdiabetes "},
+                          headers=headers).json()["suggestions"] == [
+            {"query": "qdiabetes type 2", "count": 1},
+        ]
+        assert client.get("/api/disease/autocomplete", params={"prefix": "qd"}).json()["suggestions"] == [
+            {"query": "qdengue", "count": 1},
+        ]
+
+        assert client.get("/api/disease/history").status_code == 401
+        searches = client.get("/api/disease/history", headers=headers).json()["searches"]
+        assert [item["query"] for item in searches] == ["qdengue", "QDIABETES type 2", "qdiabetes", "Qdiabetes"]
+
+        assert client.delete("/api/disease/history", headers=headers).json() == {"deleted": 4}
+        assert client.get("/api/disease/history", headers=headers).json()["searches"] == []
+
+    # Counts were written on shutdown and the next worker starts with them
+    with TestClient(create_app(routers=["disease"])) as client:
+        suggestions = client.get("/api/disease/autocomplete", params={"prefix": "qdi", "limit": 1},
+                                 headers=headers).json()
+        assert suggestions["suggestions"] == [{"query": "qdiabetes", "count": 2}]
+
+
+def test_anonymous_searches_past_their_rate_limit_are_not_counted(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ANONYMOUS_SEARCH_BURST", "2")
+    with TestClient(create_app(routers=["disease"])) as client:
+        for _ in range(5):
+            assert client.post("/api/disease/history", json={"query": "Qmalaria"}).json() == {"query": "qmalaria"}
+        suggestions = client.get("/api/disease/autocomplete", params={"prefix": "qmal"}).json()["suggestions"]
+    assert suggestions == [{"query": "qmalaria", "count": 2}]
@@ -0,0 +1,107 @@
+"""
+Tests for the semantic answer cache
+"""
+
+import threading
+
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from semantic_cache import SemanticCache
+
+TEMPLATE = ("As a medical AI assistant, provide comprehensive information about {}. "
+            "Include: 1. Brief description 2. Common symptoms 3. Treatment options")
+
+
+def test_paraphrase_hits_and_other_questions_miss():
+    cache = SemanticCache()
+    cache.put("What are diabetes symptoms?", "diabetes answer")
+
+    assert cache.get("symptoms of diabetes") == "diabetes answer"
+    assert cache.get("diabetes treatment") is None
+    assert cache.get("asthma symptoms") is None
+    assert cache.get("the of and") is None
+
+
+def test_templated_prompts_do_not_match_on_boilerplate():
+    cache = SemanticCache()
+    cache.put(TEMPLATE.format("diabetes"), "diabetes answer")
+
+    assert cache.get(TEMPLATE.format("asthma")) is None
+    assert cache.get(TEMPLATE.format("diabetes")) == "diabetes answer"
+
+
+def test_index_grows_past_capacity():
+    cache = SemanticCache(capacity=16)
+    prompts = [f"question about condition{i}" for i in range(3000)]
+    cache.put_many(prompts, [f"answer {i}" for i in range(3000)])
+
+    assert len(cache) == 3000
+    assert cache.get("question about condition2999") == "answer 2999"
+    assert cache.get("condition17 question") == "answer 17"
+
+
+def test_lookups_stay_consistent_while_another_thread_inserts(tmp_path):
+    cache = SemanticCache(path=str(tmp_path), capacity=16)
+    cache.put_many([f"question about condition{i}" for i in range(100)], [f"answer {i}" for i in range(100)])
+    stop = threading.Event()
+
+    def insert():
+        # Small batches reallocate the arrays and rebuild the index many times
+        for start in range(100, 4000, 50):
+            cache.put_many([f"question about condition{i}" for i in range(start, start + 50)],
+                           [f"answer {i}" for i in range(start, start + 50)])
+        stop.set()
+
+    writer = threading.Thread(target=insert)
+    writer.start()
+    lookups = 0
+    while not stop.is_set() or not lookups:
+        i = lookups % 100
+        assert cache.get(f"question about condition{i}") == f"answer {i}"
+        lookups += 1
+    writer.join()
+    assert cache.get("question about condition3999") == "answer 3999"
+
+
+def test_persists_and_second_process_is_read_only(tmp_path):
+    cache = SemanticCache(path=str(tmp_path))
+    cache.put("what are diabetes symptoms", "diabetes answer")
+    cache.flush()
+
+    # The first instance still holds the writer lock
+    reader = SemanticCache(path=str(tmp_path))
+    assert not reader.writable
+    assert reader.get("symptoms of diabetes") == "diabetes answer"
+    reader.put("gout pain", "gout answer")
+    assert reader.get("gout pain") == "gout answer"
+    reader.close()
+    cache.close()
+
+    reopened = SemanticCache(path=str(tmp_path))
+    assert reopened.writable
+    assert len(reopened) == 1
+    assert reopened.get("diabetes symptoms") == "diabetes answer"
+    assert reopened.get("gout pain") is None
+    reopened.close()
+
+
+def test_chat_uses_cache_for_llm_answers(monkeypatch):
+    calls = []
+
+    def fake_generate(prompt):
+        calls.append(prompt)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(llm, "is_configured", lambda: True)
+    monkeypatch.setattr(llm, "generate_content", fake_generate)
+
+    with TestClient(create_app(routers=["disease"])) as client:
+        first = client.post("/api/disease/chat", json={"prompt": "What are diabetes symptoms?"})
+        second = client.post("/chat", json={"message": "symptoms of diabetes"})
+        other = client.post("/chat", json={"message": "How is asthma treated?"})
+
+    assert first.json()["response"] == second.json()["response"] == "answer 1"
+    assert other.json()["response"] == "answer 2"
+    assert len(calls) == 2
@@ -0,0 +1,101 @@
+"""
+Tests for the preforking launcher (serve.py), run as a real master process
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/task"), reason="needs fork() and /proc")
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def worker_pids(master: subprocess.Popen) -> set:
+    try:
+        with open(f"/proc/{master.pid}/task/{master.pid}/children") as f:
+            return {int(pid) for pid in f.read().split()}
+    except OSError:
+        return set()
+
+
+def wait_until(condition, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError("condition not met in time")
+
+
+def get(port: int, path: str = "/livez") -> int:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=2) as response:
+            return response.status
+    except OSError:
+        return 0
+
+
+@pytest.fixture
+def serve():
+    masters = []
+
+    def start(*args, workers: int = 2):
+        port = free_port()
+        master = subprocess.Popen(
+            [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--graceful-timeout", "5", "--log-level", "warning", *args],
+            cwd=BACKEND, env={**os.environ, "ENABLED_ROUTERS": "health"},
+        )
+        masters.append(master)
+        wait_until(lambda: len(worker_pids(master)) == workers and get(port) == 200)
+        return master, port
+
+    yield start
+    for master in masters:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
+
+
+def test_killed_worker_is_respawned(serve):
+    master, port = serve()
+    before = worker_pids(master)
+    victim = min(before)
+    os.kill(victim, signal.SIGKILL)
+
+    after = wait_until(lambda: (pids := worker_pids(master)) and len(pids) == 2 and victim not in pids and pids)
+    assert after & before == before - {victim}
+    assert get(port) == 200
+
+
+def test_workers_are_recycled_after_max_requests(serve):
+    master, port = serve("--max-requests", "5", "--max-requests-jitter", "0", workers=1)
+    first = worker_pids(master)
+    for _ in range(6):
+        wait_until(lambda: get(port) == 200)
+    wait_until(lambda: (pids := worker_pids(master)) and pids != first)
+
+
+def test_sigterm_stops_the_workers_and_the_master(serve):
+    master, port = serve()
+    workers = worker_pids(master)
+    master.send_signal(signal.SIGTERM)
+
+    assert master.wait(timeout=15) == 0
+    # The master waited for (reaped) every worker before exiting
+    assert not any(os.path.exists(f"/proc/{pid}") for pid in workers)
+    assert get(port) == 0
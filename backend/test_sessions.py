@@ -0,0 +1,132 @@
+"""
+Tests for refresh-token sessions and revocation
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app import create_app
+from auth import RevocationList, decode_token
+from database import RefreshToken, User, engine, init_db
+from sessions import SessionStore, hash_token
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(create_app(routers=["auth"])) as client:
+        client.post("/auth/signup", json={
+            "username": "rotator", "email": "rotator@example.com", "password": "secret123"
+        })
+        yield client
+
+
+def login(client):
+    response = client.post("/auth/login", json={"username": "rotator", "password": "secret123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def me(client, access_token):
+    return client.get("/auth/me", headers={"Authorization": f"Bearer {access_token}"}).status_code
+
+
+def test_refresh_rotates_and_only_hashes_are_stored(client):
+    tokens = login(client)
+    refreshed = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    rotated = refreshed.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert me(client, rotated["access_token"]) == 200
+    assert decode_token(rotated["access_token"])["sid"] == decode_token(tokens["access_token"])["sid"]
+
+    with engine.connect() as connection:
+        stored = set(connection.execute(select(RefreshToken.token_hash)).scalars())
+    assert hash_token(rotated["refresh_token"]) in stored
+    assert rotated["refresh_token"] not in stored
+
+
+def test_reused_refresh_token_revokes_the_session(client):
+    tokens = login(client)
+    rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+    assert me(client, rotated["access_token"]) == 401
+    assert me(client, login(client)["access_token"]) == 200
+
+
+def test_refresh_revokes_the_session_of_a_deactivated_user(client):
+    client.post("/auth/signup", json={
+        "username": "leaver", "email": "leaver@example.com", "password": "secret123"
+    })
+    tokens = client.post("/auth/login", json={"username": "leaver", "password": "secret123"}).json()
+    with engine.begin() as connection:
+        connection.execute(update(User).where(User.username == "leaver").values(is_active=False))
+
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert me(client, tokens["access_token"]) == 401
+
+
+def test_logout_revokes_access_tokens_immediately(client):
+    tokens = login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.post("/auth/logout", json={}, headers=headers).status_code == 200
+    assert me(client, tokens["access_token"]) == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    by_refresh = login(client)
+    assert client.post("/auth/logout", json={"refresh_token": by_refresh["refresh_token"]}).status_code == 200
+    assert me(client, by_refresh["access_token"]) == 401
+    assert client.post("/auth/logout", json={}).status_code == 400
+
+
+def test_sliding_expiry_is_capped_by_session_age():
+    init_db()
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(
+            username="slider", email="slider@example.com", hashed_password="x", is_active=True))
+    store = SessionStore(engine=engine, idle=timedelta(days=7), max_age=timedelta(days=10))
+    _, refresh_token = store.issue("slider")
+    started = datetime.utcnow() - timedelta(days=5)
+    with engine.begin() as connection:
+        connection.execute(update(RefreshToken).where(RefreshToken.username == "slider")
+                           .values(session_started_at=started))
+
+    _, _, rotated = store.rotate(refresh_token)
+    with engine.connect() as connection:
+        expires_at = connection.execute(
+            select(RefreshToken.expires_at).where(RefreshToken.token_hash == hash_token(rotated))
+        ).scalar()
+    assert expires_at == started + timedelta(days=10)
+
+
+def test_sync_loads_revocations_and_compact_drops_expired_tokens():
+    init_db()
+    revoked = RevocationList()
+    writer = SessionStore(engine=engine, revoked=RevocationList())
+    reader = SessionStore(engine=engine, revoked=revoked)
+    access_token, refresh_token = writer.issue("syncer")
+    session_id = decode_token(access_token)["sid"]
+
+    assert writer.revoke(refresh_token=refresh_token)
+    assert session_id not in revoked
+    reader.sync()
+    assert session_id in revoked
+
+    _, expired = writer.issue("compactor")
+    with engine.begin() as connection:
+        connection.execute(update(RefreshToken).where(RefreshToken.username == "compactor")
+                           .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    assert writer.compact() >= 1
+    assert writer.rotate(expired) is None
+
+
+def test_revocation_list_expires_entries():
+    revoked = RevocationList()
+    revoked.revoke("old", datetime.utcnow() - timedelta(hours=1))
+    revoked.revoke("new")
+    assert "old" not in revoked and "new" in revoked
+    assert revoked.compact() == 1 and len(revoked) == 1
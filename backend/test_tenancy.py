@@ -0,0 +1,219 @@
+"""
+Tests for tenants, projects and per-tenant cache partitions
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from auth import decode_token
+from semantic_cache import SemanticCache
+from tenancy import TenantLRU, TenantPartitions
+
+REQUEST = {
+    "requirement": "Nurses can record vitals", "system_type": "EHR",
+    "priority": "high", "compliance": ["HIPAA"],
+}
+
+
+def signup_and_login(client, username, organization=None):
+    response = client.post("/auth/signup", json={
+        "username": username, "email": f"{username}@example.com", "password": "secret123",
+        "organization": organization,
+    })
+    assert response.status_code == 200
+    token = client.post("/auth/login", json={"username": username, "password": "secret123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_tenant_lru_caps_each_tenant_and_evicts_the_heaviest():
+    cache = TenantLRU(capacity=10, share=0.5)
+    for i in range(8):
+        cache.put(1, f"a{i}", i)
+    assert cache.usage(1) == 5
+    assert cache.get(1, "a2") is None and cache.get(1, "a7") == 7
+
+    for i in range(4):
+        cache.put(2, f"b{i}", i)
+    cache.put(3, "c0", 0, weight=3)
+    # Tenant 1 held the most, so it gave up room for tenant 3
+    assert cache.total == 10
+    assert (cache.usage(1), cache.usage(2), cache.usage(3)) == (3, 4, 3)
+    assert cache.get(2, "b0") == 0 and cache.get(1, "b0") is None
+    assert not cache.put(3, "too-big", None, weight=6)
+
+
+def test_partitions_open_lazily_and_evict_least_recently_used():
+    opened, evicted = [], []
+    partitions = TenantPartitions(lambda tenant_id: opened.append(tenant_id) or {"tenant": tenant_id},
+                                  evict=evicted.append, max_partitions=2)
+    partitions.get(1)
+    partitions.get(2)
+    partitions.get(1)
+    partitions.get(3)
+    assert opened == [1, 2, 3]
+    assert evicted == [{"tenant": 2}]
+    assert partitions.peek(2) is None and partitions.peek(1) == {"tenant": 1}
+
+
+def test_semantic_cache_stops_growing_at_max_entries():
+    cache = SemanticCache(max_entries=3)
+    cache.put_many([f"question about condition{i}" for i in range(5)], [f"answer {i}" for i in range(5)])
+    assert len(cache) == 3 and cache.rejected == 2
+    assert cache.get("question about condition4") is None
+
+
+def test_projects_are_scoped_to_the_tenant():
+    with TestClient(create_app(routers=["auth", "projects"])) as client:
+        acme = signup_and_login(client, "acme-admin", "Acme Health")
+        globex = signup_and_login(client, "globex-admin", "Globex Clinic")
+        assert client.post("/auth/signup", json={
+            "username": "acme-copy", "email": "acme-copy@example.com", "password": "secret123",
+            "organization": "ACME health",
+        }).status_code == 400
+
+        created = client.post("/projects", json={"name": "Lab portal"}, headers=acme)
+        assert created.status_code == 201
+        project = created.json()
+        assert project["created_by"] == "acme-admin"
+        assert client.post("/projects", json={"name": "Lab portal"}, headers=acme).status_code == 409
+        assert client.post("/projects", json={"name": "Lab portal"}, headers=globex).status_code == 201
+
+        assert [p["id"] for p in client.get("/projects", headers=acme).json()] == [project["id"]]
+        assert client.get(f"/projects/{project['id']}", headers=acme).status_code == 200
+        assert client.get(f"/projects/{project['id']}", headers=globex).status_code == 404
+        assert client.get("/projects").status_code == 401
+
+        # Rotated access tokens keep the tenant
+        tokens = client.post("/auth/login", json={"username": "acme-admin", "password": "secret123"}).json()
+        rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+        assert decode_token(rotated["access_token"])["tid"] == decode_token(tokens["access_token"])["tid"]
+
+
+def test_autocomplete_is_scoped_to_the_tenant():
+    with TestClient(create_app(routers=["auth", "disease"])) as client:
+        first = signup_and_login(client, "tenant-one")
+        second = signup_and_login(client, "tenant-two")
+        client.post("/api/disease/history", json={"query": "zzsecret condition"}, headers=first)
+
+        def suggestions(headers):
+            response = client.get("/api/disease/autocomplete", params={"prefix": "zzs"}, headers=headers)
+            return response.json()["suggestions"]
+
+        assert suggestions(first) == [{"query": "zzsecret condition", "count": 1}]
+        assert suggestions(second) == []
+        assert suggestions({}) == []
+
+
+def test_generated_suites_are_cached_per_tenant(monkeypatch):
+    calls = []
+
+    def responder(prompt):
+        calls.append(prompt)
+        return llm.fake_response(prompt, cases=3)
+
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0, responder=responder))
+    with TestClient(create_app(routers=["auth", "testcase"])) as client:
+        headers = signup_and_login(client, "suite-owner")
+        first = client.post("/api/testcase/generate", json=REQUEST, headers=headers).json()
+        second = client.post("/api/testcase/generate", json=REQUEST, headers=headers).json()
+        assert first["test_cases"] == second["test_cases"] and len(calls) == 1
+
+        client.post("/api/testcase/generate", json=REQUEST)
+        assert len(calls) == 2
+        assert client.app.state.suite_cache.stats()["tenants"] == 2
+
+
+def test_evicted_semantic_caches_are_closed_and_reopen_writable(tmp_path):
+    from routers import disease
+
+    caches = disease.open_semantic_caches(str(tmp_path))
+    caches.max_partitions = 1
+    first = caches.get(1)
+    first.put("question about condition1", "answer 1")
+    caches.get(2)
+    assert first.closed and first.get("question about condition1") is None
+
+    reopened = caches.get(1)
+    assert reopened.writable
+    assert reopened.get("question about condition1") == "answer 1"
+    for cache in caches.clear():
+        cache.close()
+
+
+def test_semantic_cache_partitions_share_one_budget(monkeypatch):
+    from routers import disease
+
+    monkeypatch.setattr(disease, "SEMANTIC_CACHE_MAX_ENTRIES", 8)
+    monkeypatch.setattr(disease, "TENANT_CACHE_SHARE", 0.5)
+    caches = disease.open_semantic_caches(directory=None)
+    for tenant_id in range(1, 4):
+        caches.get(tenant_id).put_many([f"question about condition{i}" for i in range(6)],
+                                       [f"answer {i}" for i in range(6)])
+    assert [len(caches.get(tenant_id)) for tenant_id in range(1, 4)] == [4, 4, 0]
+
+
+def test_init_db_migrates_a_database_from_before_migrations(tmp_path):
+    # The users table as the first release created it, with no alembic_version
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL, username VARCHAR NOT NULL, "
+            "hashed_password VARCHAR NOT NULL, full_name VARCHAR, is_active BOOLEAN, is_superuser BOOLEAN, "
+            "created_at DATETIME, updated_at DATETIME)"
+        )
+        connection.execute("INSERT INTO users (email, username, hashed_password) VALUES ('a@example.com', 'alice', 'x')")
+    # A fresh interpreter, so the database module binds its engine to this file
+    subprocess.run(
+        [sys.executable, "-c", "from database import init_db; init_db(); "
+                               "from routers.auth import seed_demo_users; seed_demo_users()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}"},
+    )
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT version_num FROM alembic_version").fetchall() == [("0005",)]
+        users = dict(connection.execute("SELECT username, tenant_id FROM users").fetchall())
+    assert users["alice"] is not None and "demo" in users
+
+
+def test_init_db_upgrades_a_database_whose_tables_were_created_from_the_models(tmp_path):
+    # What older startup hooks left behind: every table but users, created
+    # from the current models, and no alembic_version
+    path = tmp_path / "partial.db"
+    subprocess.run(
+        [sys.executable, "-c", "from database import Base, engine, init_db; "
+                               "Base.metadata.create_all(engine, tables=[table for name, table in "
+                               "Base.metadata.tables.items() if name != 'users']); init_db()"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}"},
+    )
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT version_num FROM alembic_version").fetchall() == [("0005",)]
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(users)")}
+    assert "tenant_id" in columns
+
+
+def test_schema_revision_is_the_latest_migration():
+    from alembic.script import ScriptDirectory
+
+    from database import SCHEMA_REVISION
+
+    migrations = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+    assert ScriptDirectory(migrations).get_current_head() == SCHEMA_REVISION
+
+
+def test_init_db_skips_alembic_for_a_current_database(tmp_path):
+    script = "from database import init_db; init_db(); import sys; print('alembic' in sys.modules)"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'current.db'}"}
+    runs = [
+        subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                       env=env, check=True, capture_output=True, text=True).stdout.split()[-1]
+        for _ in range(2)
+    ]
+    # The first run creates and stamps the database; the second finds it current
+    assert runs == ["True", "False"]
@@ -0,0 +1,105 @@
+"""
+Tests for incremental parsing of LLM test-case output
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from testcase_parser import TestCaseStreamParser, parse_test_cases, repair_json
+
+DEFAULTS = {"priority": "high", "compliance": ["HIPAA"]}
+
+CASE = {"title": "Login", "description": "Valid users can log in", "steps": ["Open app", "Log in"]}
+
+
+def test_fenced_output_with_prose_and_trailing_commas():
+    output = (
+        "Here are the test cases you asked for [2 total]:\n```json\n[\n"
+        '  {"title": "Login", "description": "Valid users, can log in", "steps": ["Open app", "Log in",],},\n'
+        '  {"title": "Logout", "description": "Session ends", "priority": "Low", "compliance": "GDPR"},\n'
+        "]\n```\nLet me know if you need more."
+    )
+    cases, errors = parse_test_cases(output, DEFAULTS)
+
+    assert errors == []
+    assert [case.title for case in cases] == ["Login", "Logout"]
+    assert cases[0].test_steps == ["Open app", "Log in"]
+    assert cases[0].description == "Valid users, can log in"
+    assert cases[0].priority == "high" and cases[0].compliance == ["HIPAA"]
+    assert cases[1].priority == "low" and cases[1].compliance == ["GDPR"]
+
+
+def test_cases_are_emitted_as_soon_as_each_object_closes():
+    output = json.dumps([CASE, dict(CASE, title="Second")])
+    parser = TestCaseStreamParser(DEFAULTS)
+    emitted = []
+    for i, char in enumerate(output):
+        for case in parser.feed(char):
+            emitted.append((case.title, i))
+    parser.close()
+
+    first_end = output.index("}") + 1
+    assert emitted[0] == ("Login", first_end - 1)
+    assert emitted[1][0] == "Second"
+    assert parser.done
+
+
+def test_invalid_items_are_skipped_individually():
+    output = json.dumps([CASE, {"title": "No description"}, "just a string", dict(CASE, title="Last")])
+    cases, errors = parse_test_cases(output, DEFAULTS)
+
+    assert [case.title for case in cases] == ["Login", "Last"]
+    assert len(errors) == 1  # the bare string is not an object and is ignored
+
+
+def test_braces_inside_strings_and_wrapper_objects():
+    output = json.dumps({"test_cases": [dict(CASE, description='Handles "quotes" and {braces} ]')]})
+    cases, errors = parse_test_cases([output[:10], output[10:]], DEFAULTS)
+    assert errors == []
+    assert cases[0].description == 'Handles "quotes" and {braces} ]'
+
+
+def test_truncated_output_keeps_completed_cases():
+    output = json.dumps([CASE, CASE])[:-20]
+    cases, errors = parse_test_cases(output, DEFAULTS)
+    assert len(cases) == 1
+    assert errors == ["output ended inside a test case object"]
+
+
+def test_no_array_is_reported():
+    cases, errors = parse_test_cases("Sorry, I cannot help with that.", DEFAULTS)
+    assert cases == [] and errors == ["no JSON array of test cases found"]
+
+
+def test_repair_leaves_commas_in_strings_alone():
+    assert repair_json('{"a": ",}", "b": [1, 2,],}') == '{"a": ",}", "b": [1, 2]}'
+
+
+def test_generation_uses_llm_output(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0))
+
+    with TestClient(create_app(routers=["testcase"])) as client:
+        response = client.post("/api/testcase/generate", json={
+            "requirement": "Clinicians can review lab results", "system_type": "EHR",
+            "priority": "high", "compliance": ["HIPAA"],
+        })
+
+    test_cases = response.json()["test_cases"]
+    assert len(test_cases) == 5
+    assert test_cases[0]["title"] == "Fake test case 1"
+    assert test_cases[0]["test_steps"] == ["Step 1", "Step 2", "Step 3"]
+
+
+def test_generation_falls_back_to_templates(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", llm.FakeBackend(latency_ms=0, responder=lambda prompt: "no json"))
+
+    with TestClient(create_app(routers=["testcase"])) as client:
+        response = client.post("/testcases/generate", json={
+            "requirement": "Clinicians can review lab results", "systemType": "EHR",
+            "priority": "high", "compliance": ["HIPAA"],
+        })
+
+    assert len(response.json()["testCases"]) == 4
@@ -0,0 +1,101 @@
+"""
+Tests for NDJSON streaming of generated test cases
+"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import llm
+from app import create_app
+from routers.testcase import stream_cases
+
+REQUEST = {
+    "requirement": "Clinicians can review lab results", "system_type": "EHR",
+    "priority": "high", "compliance": ["HIPAA"],
+}
+
+
+def many_cases(prompt: str) -> str:
+    return llm.fake_response(prompt, cases=300)
+
+
+class CountingBackend(llm.FakeBackend):
+    """Fake backend that records how many chunks have been read"""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency_ms=0, responder=many_cases, chunk_size=32, **kwargs)
+        self.chunks_read = 0
+        self.total_chunks = 0
+
+    def stream(self, prompt):
+        self.total_chunks = -(-len(self.responder(prompt)) // self.chunk_size)
+        for chunk in super().stream(prompt):
+            self.chunks_read += 1
+            yield chunk
+
+
+class FailingBackend(CountingBackend):
+    """Fake backend whose stream breaks after ``fail_after`` chunks"""
+
+    def __init__(self, fail_after: int, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def stream(self, prompt):
+        for chunk in super().stream(prompt):
+            if self.chunks_read > self.fail_after:
+                raise RuntimeError("connection reset")
+            yield chunk
+
+
+def stream_lines(client):
+    with client.stream("POST", "/api/testcase/generate/stream", json=REQUEST) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_streams_templates_without_llm():
+    with TestClient(create_app(routers=["testcase"])) as client:
+        lines = stream_lines(client)
+    assert len(lines) == 5
+    assert lines[0]["title"] == "Validate EHR System Access"
+    assert lines[-1] == {"done": True, "count": 4}
+
+
+def test_streams_every_llm_case(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", CountingBackend())
+    with TestClient(create_app(routers=["testcase"])) as client:
+        lines = stream_lines(client)
+    assert len(lines) == 301
+    assert lines[-2]["title"] == "Fake test case 300"
+    assert lines[0]["priority"] == "medium"
+    assert lines[-1] == {"done": True, "count": 300}
+
+
+def test_stream_that_fails_part_way_ends_with_an_error_line(monkeypatch):
+    monkeypatch.setattr(llm, "_backend", FailingBackend(fail_after=20))
+    with TestClient(create_app(routers=["testcase"])) as client:
+        lines = stream_lines(client)
+    cases, last = lines[:-1], lines[-1]
+    assert 0 < len(cases) < 300
+    assert all("title" in test_case for test_case in cases)
+    assert last == {"error": "Error generating test cases", "count": len(cases)}
+
+
+def test_first_case_is_yielded_before_upstream_finishes(monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(llm, "_backend", backend)
+
+    async def first_case():
+        cases = stream_cases(REQUEST["requirement"], "EHR", "high", ["HIPAA"])
+        test_case = await cases.__anext__()
+        read = backend.chunks_read
+        await cases.aclose()
+        return test_case, read
+
+    test_case, chunks_read = asyncio.run(first_case())
+    assert test_case.title == "Fake test case 1"
+    assert chunks_read < backend.total_chunks / 50
@@ -0,0 +1,182 @@
+"""
+Incremental parsing of LLM test-case output.
+
+LLMs asked for "a JSON array of test cases" often wrap it in a Markdown code
+fence or a sentence of prose, leave trailing commas, or get one item wrong.
+``TestCaseStreamParser`` scans the output as it arrives, finds the first
+array of objects, and emits each ``TestCase`` as soon as its object closes.
+Every object is repaired and validated on its own, so one bad item costs
+that item only.
+"""
+
+import json
+import re
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from schemas import TestCase
+
+logger = logging.getLogger(__name__)
+
+# A JSON string, or a comma followed only by whitespace and a closing bracket
+_TRAILING_COMMA_RE = re.compile(r'("(?:[^"\\]|\\.)*")|,\s*([}\]])', re.DOTALL)
+
+STEP_KEYS = ("test_steps", "steps", "testSteps")
+
+
+def build_test_case_prompt(requirement: str, system_type: str, priority: str, compliance: List[str]) -> str:
+    """Prompt asking the LLM for test cases as a JSON array"""
+    return f"""Generate comprehensive test cases for the following healthcare requirement:
+
+Requirement: {requirement}
+System Type: {system_type}
+Priority: {priority}
+Compliance Requirements: {', '.join(compliance)}
+
+Please generate 5-8 detailed test cases. Format the response as a JSON array of test case
+objects with keys: title, description, test_steps (list of strings), priority, compliance
+(list of strings)."""
+
+
+def repair_json(text: str) -> str:
+    """Remove trailing commas before ``}`` or ``]`` (outside strings)"""
+    return _TRAILING_COMMA_RE.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def normalize_test_case(item, defaults: Optional[dict] = None) -> dict:
+    """Map common LLM variations onto the ``TestCase`` fields"""
+    if not isinstance(item, dict):
+        raise ValueError(f"expected an object, got {type(item).__name__}")
+    defaults = defaults or {}
+    data = dict(item)
+
+    for key in STEP_KEYS:
+        if key in data:
+            steps = data.pop(key)
+            break
+    else:
+        steps = None
+    if isinstance(steps, str):
+        steps = [line.strip() for line in steps.splitlines() if line.strip()]
+    elif isinstance(steps, list):
+        steps = [step if isinstance(step, str) else json.dumps(step) for step in steps]
+    data["test_steps"] = steps
+
+    priority = data.get("priority") or defaults.get("priority")
+    data["priority"] = priority.lower() if isinstance(priority, str) else priority
+
+    compliance = data.get("compliance", defaults.get("compliance"))
+    data["compliance"] = [compliance] if isinstance(compliance, str) else compliance
+    return data
+
+
+class TestCaseStreamParser:
+    """Feed LLM output in chunks; get back each valid ``TestCase`` as its object closes"""
+
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, defaults: Optional[dict] = None):
+        self.defaults = defaults or {}
+        self.errors: List[str] = []
+        self.count = 0
+        self._buffer: List[str] = []
+        self._state = "seek"  # seek -> open ([ seen) -> array -> done
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[TestCase]:
+        """Consume ``chunk`` and return the test cases completed by it"""
+        completed = []
+        for char in chunk:
+            if self._state == "seek":
+                if char == "[":
+                    self._state = "open"
+            elif self._state == "open":
+                # Only an array whose first item is an object is the case list
+                if char == "{":
+                    self._state = "array"
+                    self._start_object(char)
+                elif not char.isspace():
+                    self._state = "seek" if char != "[" else "open"
+            elif self._state == "array":
+                case = self._scan(char)
+                if case is not None:
+                    completed.append(case)
+            else:
+                break
+        return completed
+
+    def close(self) -> None:
+        """Finish parsing; report an unterminated object as an error"""
+        if self._buffer:
+            self.errors.append("output ended inside a test case object")
+            self._buffer = []
+        elif self._state != "done" and self.count == 0:
+            self.errors.append("no JSON array of test cases found")
+        self._state = "done"
+
+    def _start_object(self, char: str):
+        self._buffer = [char]
+        self._depth = 1
+
+    def _scan(self, char: str) -> Optional[TestCase]:
+        if self._buffer:
+            self._buffer.append(char)
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+            return None
+
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            if self._depth == 0 and char == "{":
+                self._start_object(char)
+            else:
+                self._depth += 1
+        elif char in "}]":
+            if self._depth == 0:
+                if char == "]":
+                    self._state = "done"
+                return None
+            self._depth -= 1
+            if self._depth == 0 and self._buffer:
+                text = "".join(self._buffer)
+                self._buffer = []
+                return self._emit(text)
+        return None
+
+    def _emit(self, text: str) -> Optional[TestCase]:
+        try:
+            item = json.loads(repair_json(text), strict=False)
+            case = TestCase.model_validate(normalize_test_case(item, self.defaults))
+        except (ValueError, ValidationError) as e:
+            index = self.count + len(self.errors)
+            self.errors.append(f"item {index}: {str(e).splitlines()[0]}")
+            logger.warning(f"Skipping invalid test case from LLM output: {self.errors[-1]}")
+            return None
+        self.count += 1
+        return case
+
+
+def parse_test_cases(chunks: Iterable[str], defaults: Optional[dict] = None) -> Tuple[List[TestCase], List[str]]:
+    """Parse complete (or chunked) LLM output; returns the valid cases and the errors"""
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    parser = TestCaseStreamParser(defaults)
+    cases = []
+    for chunk in chunks:
+        cases.extend(parser.feed(chunk))
+    parser.close()
+    return cases, parser.errors
@@ -10,16 +10,60 @@ const DiseaseLookup = ({ darkMode = false }) => {
     const saved = localStorage.getItem('diseaseSearchHistory');
     return saved ? JSON.parse(saved) : [];
   });
+  const [suggestions, setSuggestions] = useState([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+  const [popularSearches, setPopularSearches] = useState([]);
+  const signedIn = Boolean(localStorage.getItem('access_token'));
 
   useEffect(() => {
     // Persist search history
     localStorage.setItem('diseaseSearchHistory', JSON.stringify(searchHistory));
   }, [searchHistory]);
 
+  useEffect(() => {
+    // Signed-in users get their history from the server so it follows them across
+    // devices; localStorage stays as the offline fallback and keeps cached results
+    if (signedIn) {
+      api.getSearchHistory(5)
+        .then(searches => setSearchHistory(prev => searches.map(item => {
+          const local = prev.find(entry => entry.disease.toLowerCase() === item.query.toLowerCase());
+          return {
+            disease: item.query,
+            result: local ? local.result : null,
+            timestamp: new Date(`${item.searched_at}Z`).toLocaleString()
+          };
+        })))
+        .catch(() => {});
+    }
+    api.autocomplete('', 6)
+      .then(items => setPopularSearches(items.map(item => item.query)))
+      .catch(() => {});
+  }, [signedIn]);
+
+  useEffect(() => {
+    // Debounced autocomplete; a newer keystroke aborts the previous request
+    if (!showSuggestions || !disease.trim()) {
+      setSuggestions([]);
+      return undefined;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      api.autocomplete(disease, 8, { signal: controller.signal })
+        .then(items => setSuggestions(items.map(item => item.query)))
+        .catch(() => {});
+    }, 150);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [disease, showSuggestions]);
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     if (!disease.trim()) return;
 
+    setShowSuggestions(false);
+    api.recordSearch(disease.trim()).catch(() => {});
     setLoading(true);
     setError('');
     setSolutions('');
@@ -160,11 +204,19 @@ Please provide accurate, helpful information based on medical knowledge. If this
 
   const clearHistory = () => {
     setSearchHistory([]);
+    if (signedIn) {
+      api.clearSearchHistory().catch(() => {});
+    }
   };
 
   const loadFromHistory = (item) => {
     setDisease(item.disease);
-    setSolutions(item.result);
+    setSolutions(item.result || '');
+  };
+
+  const selectSuggestion = (suggestion) => {
+    setDisease(suggestion);
+    setShowSuggestions(false);
   };
 
   const exportResults = () => {
@@ -197,14 +249,38 @@ Please provide accurate, helpful information based on medical knowledge. If this
           <div className="lg:col-span-2 space-y-6">
             <form onSubmit={handleSubmit} className="space-y-4">
               <div className="flex gap-3">
-                <input
-                  type="text"
-                  value={disease}
-                  onChange={(e) => setDisease(e.target.value)}
-                  placeholder="Enter disease name (e.g., diabetes, hypertension, asthma)"
-                  className={`input-field flex-1 text-base transition-smooth ${darkMode ? 'bg-gray-700 border-gray-600 text-white' : ''}`}
-                  required
-                />
+                <div className="relative flex-1">
+                  <input
+                    type="text"
+                    value={disease}
+                    onChange={(e) => {
+                      setDisease(e.target.value);
+                      setShowSuggestions(true);
+                    }}
+                    onBlur={() => setShowSuggestions(false)}
+                    placeholder="Enter disease name (e.g., diabetes, hypertension, asthma)"
+                    className={`input-field w-full text-base transition-smooth ${darkMode ? 'bg-gray-700 border-gray-600 text-white' : ''}`}
+                    autoComplete="off"
+                    required
+                  />
+                  {showSuggestions && suggestions.length > 0 && (
+                    <ul className={`absolute z-10 mt-1 w-full rounded-lg shadow-lg border overflow-hidden ${darkMode ? 'bg-gray-700 border-gray-600' : 'bg-white border-indigo-100'}`}>
+                      {suggestions.map((suggestion) => (
+                        <li
+                          key={suggestion}
+                          // mousedown fires before the input's blur hides the list
+                          onMouseDown={(e) => {
+                            e.preventDefault();
+                            selectSuggestion(suggestion);
+                          }}
+                          className={`px-4 py-2 text-sm cursor-pointer transition-smooth ${darkMode ? 'text-gray-200 hover:bg-indigo-600/40' : 'text-gray-700 hover:bg-indigo-50'}`}
+                        >
+                          {suggestion}
+                        </li>
+                      ))}
+                    </ul>
+                  )}
+                </div>
                 <button
                   type="submit"
                   disabled={loading}
@@ -293,10 +369,13 @@ Please provide accurate, helpful information based on medical knowledge. If this
           {/* Quick Search Suggestions */}
           <div className={`card-premium p-5 bg-gradient-to-br transition-smooth ${darkMode ? 'from-gray-700 to-gray-800 border-gray-600' : 'from-indigo-50 to-white border-indigo-200'}`}>
             <h4 className={`text-sm font-bold mb-4 flex items-center gap-2 ${darkMode ? 'text-yellow-400' : 'text-indigo-900'}`}>
-              <span>⭐</span> Quick Conditions
+              <span>⭐</span> {popularSearches.length > 0 ? 'Popular Searches' : 'Quick Conditions'}
             </h4>
             <div className="space-y-2">
-              {['Diabetes', 'Hypertension', 'Asthma', 'Migraine', 'Anxiety', 'Depression'].map((condition) => (
+              {(popularSearches.length > 0
+                ? popularSearches
+                : ['Diabetes', 'Hypertension', 'Asthma', 'Migraine', 'Anxiety', 'Depression']
+              ).map((condition) => (
                 <button
                   key={condition}
                   onClick={() => setDisease(condition)}
@@ -7,7 +7,8 @@ const SignupPage = ({ onSignupSuccess, onSwitchToLogin }) => {
     username: '',
     password: '',
     confirmPassword: '',
-    full_name: ''
+    full_name: '',
+    organization: ''
   });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
@@ -43,7 +44,9 @@ const SignupPage = ({ onSignupSuccess, onSwitchToLogin }) => {
         email: formData.email,
         username: formData.username,
         password: formData.password,
-        full_name: formData.full_name || undefined
+        full_name: formData.full_name || undefined,
+        // Without an organization the account gets a personal workspace
+        organization: formData.organization || undefined
       };
 
       await api.signup(signupData);
@@ -119,6 +122,18 @@ const SignupPage = ({ onSignupSuccess, onSwitchToLogin }) => {
                 onChange={handleChange}
               />
             </div>
+            <div>
+              <label htmlFor="organization" className="block text-sm font-semibold text-gray-700 mb-2">Organization</label>
+              <input
+                id="organization"
+                name="organization"
+                type="text"
+                className="input-field"
+                placeholder="Organization (optional)"
+                value={formData.organization}
+                onChange={handleChange}
+              />
+            </div>
             <div>
               <label htmlFor="password" className="block text-sm font-semibold text-gray-700 mb-2">Password</label>
               <input
@@ -46,20 +46,35 @@ const TestCaseForm = ({ darkMode = false }) => {
     e.preventDefault();
     setLoading(true);
     setError('');
+    setGeneratedTestCases([]);
 
+    // Cases are rendered as they stream in; the list is saved once complete
+    const testCases = [];
     try {
-      const response = await api.generateTestCases(formData);
-      setGeneratedTestCases(response.testCases);
-      
+      try {
+        await api.generateTestCasesStream(formData, (testCase) => {
+          testCases.push(testCase);
+          setGeneratedTestCases(prev => [...prev, testCase]);
+        });
+      } catch (streamError) {
+        if (testCases.length > 0) throw streamError;
+        // Older backends without the streaming endpoint
+        const response = await api.generateTestCases(formData);
+        testCases.push(...response.testCases);
+        setGeneratedTestCases(response.testCases);
+      }
+
       // Save to local storage
       setSavedCases(prev => [...prev, {
         id: Date.now(),
         formData,
-        testCases: response.testCases,
+        testCases,
         createdAt: new Date().toLocaleString()
       }]);
     } catch (err) {
-      setError('Failed to generate test cases. Please try again.');
+      setError(testCases.length > 0
+        ? `Generation stopped after ${testCases.length} test cases; the suite is incomplete. Please try again.`
+        : 'Failed to generate test cases. Please try again.');
       console.error('Test case generation error:', err);
     } finally {
       setLoading(false);
@@ -184,7 +199,7 @@ const TestCaseForm = ({ darkMode = false }) => {
             {loading ? (
               <span className="flex items-center justify-center gap-2">
                 <div className="animate-spin rounded-full h-4 w-4 border-2 border-white border-r-transparent"></div>
-                Generating...
+                {generatedTestCases.length > 0 ? `Generating... (${generatedTestCases.length} so far)` : 'Generating...'}
               </span>
             ) : (
               '🚀 Generate Test Cases'
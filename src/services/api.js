@@ -29,10 +29,13 @@ class HealthTestAPI {
     this.client.interceptors.response.use(
       (response) => response,
       async (error) => {
-        if (error.response?.status === 401) {
-          // Handle token refresh
+        const config = error.config || {};
+        const tokenEndpoint = ['/auth/login', '/auth/refresh', '/auth/logout'].includes(config.url);
+        if (error.response?.status === 401 && !config._retried && !tokenEndpoint) {
+          // Handle token refresh, retrying the request once with the new access token
+          config._retried = true;
           await this.refreshToken();
-          return this.client.request(error.config);
+          return this.client.request(config);
         }
         return Promise.reject(error);
       }
@@ -68,8 +71,18 @@ class HealthTestAPI {
   }
 
   async logout() {
-    localStorage.removeItem('access_token');
-    localStorage.removeItem('refresh_token');
+    // Revoke the session server-side so copies of its tokens stop working too
+    const refreshToken = localStorage.getItem('refresh_token');
+    try {
+      if (refreshToken || localStorage.getItem('access_token')) {
+        await this.client.post('/auth/logout', { refresh_token: refreshToken });
+      }
+    } catch (error) {
+      // Logging out locally still succeeds when the server cannot be reached
+    } finally {
+      localStorage.removeItem('access_token');
+      localStorage.removeItem('refresh_token');
+    }
   }
 
   async refreshToken() {
@@ -80,7 +93,9 @@ class HealthTestAPI {
       refresh_token: refreshToken
     });
 
+    // Refresh tokens are single use: keep the rotated one for the next refresh
     localStorage.setItem('access_token', response.data.access_token);
+    localStorage.setItem('refresh_token', response.data.refresh_token);
     return response.data;
   }
 
@@ -107,6 +122,64 @@ class HealthTestAPI {
     return response.data;
   }
 
+  // Streams NDJSON from the backend and calls onTestCase for each case as it arrives.
+  // Throws if the backend reports an error or the stream ends without its final line.
+  // Uses fetch because axios cannot read a response body incrementally in the browser.
+  async generateTestCasesStream(data, onTestCase, { signal } = {}) {
+    const token = localStorage.getItem('access_token');
+    const response = await fetch(`${API_BASE_URL}/api/testcase/generate/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {})
+      },
+      body: JSON.stringify({
+        requirement: data.requirement,
+        system_type: data.systemType,
+        priority: data.priority,
+        compliance: data.compliance
+      }),
+      signal
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Streaming generation failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let count = 0;
+    let finished = false;
+    // The last line is {"done": true, "count": n}, or {"error": ...} if generation failed
+    // part-way; a stream that ends without either was cut off.
+    const handleLine = (line) => {
+      if (!line.trim()) return;
+      const item = JSON.parse(line);
+      if (item.error) {
+        throw new Error(`Streaming generation failed after ${count} test cases: ${item.error}`);
+      }
+      if (item.done) {
+        finished = true;
+        return;
+      }
+      onTestCase(item);
+      count += 1;
+    };
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.forEach(handleLine);
+      if (done) break;
+    }
+    handleLine(buffer);
+    if (!finished) {
+      throw new Error(`Streaming generation ended early after ${count} test cases`);
+    }
+    return count;
+  }
+
   // Integration exports
   async exportToJira(data) {
     const response = await this.client.post('/integrations/jira/export', data);
@@ -128,6 +201,31 @@ class HealthTestAPI {
     const response = await this.client.post('/chat', { message });
     return response.data;
   }
+
+  // Disease search history (stored per user when signed in) and autocomplete
+  async recordSearch(query) {
+    const response = await this.client.post('/api/disease/history', { query });
+    return response.data;
+  }
+
+  async getSearchHistory(limit = 5) {
+    const response = await this.client.get('/api/disease/history', { params: { limit } });
+    return response.data.searches;
+  }
+
+  async clearSearchHistory() {
+    const response = await this.client.delete('/api/disease/history');
+    return response.data;
+  }
+
+  // An empty prefix returns the most popular searches
+  async autocomplete(prefix, limit = 8, { signal } = {}) {
+    const response = await this.client.get('/api/disease/autocomplete', {
+      params: { prefix, limit },
+      signal
+    });
+    return response.data.suggestions;
+  }
 }
 
 export default new HealthTestAPI();